@@ -1,32 +1,190 @@
-from collections import MutableMapping, OrderedDict, ChainMap
-
+from collections import Mapping, MutableMapping, OrderedDict, ChainMap
+from collections import namedtuple
+from types import MappingProxyType
+
+import bisect
+import codecs
+import functools
+import io
 import itertools
+import mmap
+import os
 
 import re
+import sys
 import json
+import time
 
 __all__ = ['ParseError', 'JSONError', 'MissingSectionHeaderError',
            'InvalidSectionNameError', 'InvalidOptionNameError',
            'NoSectionError', 'NoOptionError',
            'DuplicateSectionError', 'DuplicateOptionError',
-           'JSONConfigParser']
+           'JSONConfigParser', 'FeedParser', 'iterparse',
+           'check_string', 'check_file',
+           'FrozenConfig', 'FrozenSection']
 
 DEFAULT_SECT = 'DEFAULT'
 _UNSET = object()
 
+_GetCacheInfo = namedtuple('GetCacheInfo', [
+    'hits', 'misses', 'maxsize', 'currsize',
+])
+
+_InternInfo = namedtuple('InternInfo', ['hits', 'misses', 'saved_bytes'])
+
+
+_QUERY_CACHE_SIZE = 1024
+
+_PATH_TMPL = r"""
+    \.(?P<key>[^.\[\]]+)
+    | \[(?P<index>-?[0-9]+)\]
+    | \[(?P<quoted>"(?:[^"\\]|\\.)*")\]
+    | \[(?P<wildcard>\*)\]
+    """
+
+_path_option_re = re.compile(r"[\-\w]+")
+_path_re = re.compile(_PATH_TMPL, re.VERBOSE)
+
+
+class _Path(object):
+    """A compiled query path.  `steps' holds a string for each dictionary
+    member, an integer for each list item and None for each wildcard.
+    """
+    __slots__ = ('option', 'steps', 'wildcard')
+
+    def __init__(self, option, steps):
+        self.option = option
+        self.steps = steps
+        self.wildcard = None in steps
+
+    def resolve(self, value):
+        """Returns the result of following the path from `value', or _UNSET
+        if it does not exist.
+        """
+        if self.wildcard:
+            matches = []
+            self._collect(value, 0, matches)
+            return matches
+
+        for step in self.steps:
+            if type(step) is int:
+                if not isinstance(value, (list, tuple)):
+                    return _UNSET
+                try:
+                    value = value[step]
+                except IndexError:
+                    return _UNSET
+            else:
+                if not isinstance(value, dict):
+                    return _UNSET
+                value = value.get(step, _UNSET)
+                if value is _UNSET:
+                    return _UNSET
+        return value
+
+    def _collect(self, value, i, matches):
+        steps = self.steps
+        while i < len(steps):
+            step = steps[i]
+            i += 1
+            if step is None:
+                if isinstance(value, dict):
+                    children = value.values()
+                elif isinstance(value, (list, tuple)):
+                    children = value
+                else:
+                    return
+                for child in children:
+                    self._collect(child, i, matches)
+                return
+            elif type(step) is int:
+                if not isinstance(value, (list, tuple)):
+                    return
+                try:
+                    value = value[step]
+                except IndexError:
+                    return
+            else:
+                if not isinstance(value, dict) or step not in value:
+                    return
+                value = value[step]
+        matches.append(value)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_path(path):
+    mo = _path_option_re.match(path)
+    if mo is None:
+        raise ValueError('Invalid path: %r' % path)
+    option = mo.group()
+    steps = []
+    idx = mo.end()
+    while idx < len(path):
+        mo = _path_re.match(path, idx)
+        if mo is None:
+            raise ValueError('Invalid path: %r' % path)
+        kind = mo.lastgroup
+        if kind == 'key':
+            key = mo.group('key')
+            steps.append(None if key == '*' else key)
+        elif kind == 'index':
+            steps.append(int(mo.group('index')))
+        elif kind == 'quoted':
+            steps.append(json.loads(mo.group('quoted')))
+        else:
+            steps.append(None)
+        idx = mo.end()
+    return _Path(option, tuple(steps))
+
+
+class _LineIndex(object):
+    """The offset of the start of every line in a string, split the same way as
+    `str.splitlines'.  Lines are found with a binary search.
+    """
+    __slots__ = ('source', 'starts')
+
+    def __init__(self, source):
+        self.source = source
+        self.starts = [0]
+        self.starts.extend(
+            itertools.accumulate(map(len, source.splitlines(True)))
+        )
+
+    def locate(self, idx):
+        """Returns the number and contents of the line containing `idx' and the
+        index of the character on that line.
+        """
+        if idx >= len(self.source):
+            raise IndexError()
+        lineno = bisect.bisect_right(self.starts, idx)
+        start = self.starts[lineno - 1]
+        return lineno, idx - start, self.source[start:self.starts[lineno]]
+
+
+# characters other than line feeds that `str.splitlines' breaks lines on
+_LINE_BREAKS = '\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
 
 def get_line(string, idx):
     """ Given a string and the index of a character in the string, returns the
     number and contents of the line containing the referenced character and the
     index of the character on that line.
 
-    Spectacularly inefficient but only called in exception handling
+    `string' may also be a `_LineIndex', which code that locates several
+    errors in the same text builds once and passes in place of the text.
     """
-    for lineno, line in enumerate(string.splitlines(True)):
-        if idx < len(line):
-            return lineno + 1, idx, line
-        idx -= len(line)
-    raise IndexError()
+    if isinstance(string, _LineIndex):
+        return string.locate(idx)
+    if idx >= len(string):
+        raise IndexError()
+    for c in _LINE_BREAKS:
+        if c in string:
+            return _LineIndex(string).locate(idx)
+
+    # only line feeds, so the line can be found without splitting the string
+    start = string.rfind('\n', 0, idx) + 1
+    end = string.find('\n', idx) + 1 or len(string)
+    return string.count('\n', 0, start) + 1, idx - start, string[start:end]
 
 
 class ParseError(ValueError):
@@ -75,7 +233,7 @@ class JSONError(ParseError):
         \ line\ (?P<lineno> [0-9]+)                 # line number
         \ column\ (?P<column> [0-9]+)               # column
         (\ -\ line\ [0-9]+\ column\ [0-9]+\ -)?     # optional end of error
-        \ \(char\ ([0-9]+)\)                        # index in string
+        \ \(char\ (?P<index> [0-9]+)\)              # index in string
         $
         """
     _json_error_re = re.compile(_JSON_ERROR_TMPL, re.VERBOSE | re.MULTILINE)
@@ -89,7 +247,12 @@ class JSONError(ParseError):
         lineno = int(mo.group('lineno'))
         column = int(mo.group('column'))
 
-        line = source.splitlines()[lineno-1]
+        # the json module numbers lines by counting line feeds only
+        index = int(mo.group('index'))
+        start = source.rfind('\n', 0, index) + 1
+        end = source.find('\n', index)
+        line = source[start:end] if end >= 0 else source[start:]
+        line = line.rstrip('\r')
 
         super(JSONError, self).__init__(
             message,
@@ -153,47 +316,90 @@ class NoOptionError(KeyError):
 
 class JSONConfigParser(MutableMapping):
 
-    _BLANK_TMPL = r"""
-        ^
-        (\#[^\n\r]*)?                # optional comment
-        [\n\r]*([\n\r]|\Z)           # end-of-line or end-of-file
+    # all statements that can occur at the start of a line
+    _STATEMENT_TMPL = r"""
+        (?P<key>[\-\w]+)\s*=\s*                               # option
+        | \[(?P<section>[\-\w]+)\][\n\r]*(?:[\n\r]|\Z)        # header
+        | (?P<blank>(?:\#[^\n\r]*)?[\n\r]*(?:[\n\r]|\Z))      # blank
         """
 
-    _HEADER_TMPL = r"""
-        ^
-        \[
-        (?P<section>[\-\w]+)
-        \]
-        [\n\r]*([\n\r]|\Z)          # end-of-line or end-of-file
+    # as above, but common scalar values are matched along with their
+    # option.  `lastgroup' is then set to the kind of value so that it can be
+    # decoded without json.  Anything else, including every invalid value, is
+    # left to the json decoder.  Integers are limited in length so that they
+    # can never exceed the limits of `int'.
+    #
+    # The c scanner used by eager and lazy parsing is faster than this, so it
+    # is only used where values are decoded separately to collect errors.
+    _SCALAR_STATEMENT_TMPL = r"""
+        (?P<key>[\-\w]+)\s*=\s*                               # option
+        (?:
+            (?:
+                (?P<int>-?(?:0|[1-9][0-9]{0,17}))
+                | (?P<float>-?(?:0|[1-9][0-9]*)
+                    (?:\.[0-9]+(?:[eE][-+]?[0-9]+)?|[eE][-+]?[0-9]+))
+                | (?P<string>"[^"\\\x00-\x1f]*")
+                | (?P<literal>true|false|null)
+            )
+            (?=[\n\r]|\Z)
+        )?
+        | \[(?P<section>[\-\w]+)\][\n\r]*(?:[\n\r]|\Z)        # header
+        | (?P<blank>(?:\#[^\n\r]*)?[\n\r]*(?:[\n\r]|\Z))      # blank
         """
 
-    _KEY_TMPL = r"""
-        ^
-        (?P<key>[\-\w]+)            # at least one letter underscore or hyphen
-        \s*                         # optional whitespace
-        =                           # followed by '='
-        \s*                         # optional whitespace
-        """
-
-    _EOL_TMPL = r"""
-        [\n\r]*([\n\r]|\Z)          # end-of-line or end-of-file
-        """
+    _NAME_TMPL = r"^\w[\-\w]*$"
 
-    _blank_re = re.compile(_BLANK_TMPL, re.VERBOSE | re.MULTILINE)
-    _header_re = re.compile(_HEADER_TMPL, re.VERBOSE | re.MULTILINE)
-    _key_re = re.compile(_KEY_TMPL, re.VERBOSE | re.MULTILINE)
-    _eol_re = re.compile(_EOL_TMPL, re.VERBOSE | re.MULTILINE)
+    _statement_re = re.compile(_STATEMENT_TMPL, re.VERBOSE)
+    _scalar_statement_re = re.compile(_SCALAR_STATEMENT_TMPL, re.VERBOSE)
+    _name_re = re.compile(_NAME_TMPL)
 
     _json_decoder = json.JSONDecoder()
 
+    _literals = {'true': True, 'false': False, 'null': None}
+    _option_kinds = frozenset(['key', 'int', 'float', 'string', 'literal'])
+
     def __init__(self, defaults=None, *,
-                 dict_type=OrderedDict, default_section=DEFAULT_SECT):
+                 dict_type=OrderedDict, default_section=DEFAULT_SECT,
+                 lazy=False, track_locations=False, get_cache_size=0,
+                 compact=False, intern_values=False):
         self._dict = dict_type
         self._default_section = default_section
+        self._lazy = lazy
+        # if set, identical values in each file or string that is read share a
+        # single frozen instance.  See `intern_info'.
+        self._intern_values = intern_values
+        self._intern_hits = 0
+        self._intern_misses = 0
+        self._intern_saved = 0
+        # least recently used cache of the values returned by `get', keyed by
+        # `(section, option)'.  Cleared whenever the parser is modified.
+        self._get_cache = OrderedDict() if get_cache_size > 0 else None
+        self._get_cache_size = get_cache_size
+        self._get_cache_hits = 0
+        self._get_cache_misses = 0
+        # results of `query' and `query_all' keyed by section and path, valid
+        # until the parser is next modified
+        self._query_cache = OrderedDict()
+        # digests of the options set in each section, computed by
+        # `jsonconfigparser.diff' and valid until the parser is next modified
+        self._digests = {}
+        # maps `(section, option)' to the location returned by `location'
+        self._locations = {} if track_locations else None
+        # see `jsonconfigparser.instrument'
+        self._instrument = None
         self._defaults = self._dict()
         self._sections = self._dict()
-        self._proxies = self._dict()
-        self._proxies[default_section] = SectionProxy(self, default_section)
+        if compact:
+            # sections are stored as `_CompactSection's sharing the layouts
+            # that grow from this root, and proxies are created on demand
+            self._layouts = _Layout()
+            self._proxies = None
+        else:
+            self._layouts = None
+            self._proxies = self._dict()
+            self._proxies[default_section] = SectionProxy(
+                self, default_section
+            )
         if defaults:
             self.read_dict({default_section: defaults})
 
@@ -214,8 +420,14 @@ class JSONConfigParser(MutableMapping):
         if section in self._sections:
             return True
 
-        self._sections[section] = ChainMap({}, self._defaults)
-        self._proxies[section] = SectionProxy(self, section)
+        if self._layouts is not None:
+            self._sections[section] = _CompactSection(
+                self._layouts, self._defaults
+            )
+        else:
+            self._sections[section] = ChainMap({}, self._defaults)
+            self._proxies[section] = SectionProxy(self, section)
+        self._invalidate()
 
         return False
 
@@ -230,12 +442,16 @@ class JSONConfigParser(MutableMapping):
         existed = section in self._sections
         if existed:
             del self._sections[section]
-            del self._proxies[section]
+            if self._proxies is not None:
+                del self._proxies[section]
+            self._invalidate()
         return existed
 
     def __getitem__(self, key):
         if key != self.default_section and not self.has_section(key):
             raise KeyError(key)
+        if self._proxies is None:
+            return SectionProxy(self, key)
         return self._proxies[key]
 
     def __setitem__(self, key, value):
@@ -245,6 +461,7 @@ class JSONConfigParser(MutableMapping):
             self._defaults.clear()
         elif key in self._sections:
             self._sections[key].clear()
+        self._invalidate()
         self.read_dict({key: value})
 
     def __delitem__(self, key):
@@ -267,7 +484,79 @@ class JSONConfigParser(MutableMapping):
         if not self.has_section(section):
             raise NoSectionError(section)
 
-        return self._sections.keys()
+        return self._sections[section].keys()
+
+    def items(self, section=_UNSET):
+        """Without `section', return a view of `(name, SectionProxy)' pairs
+        for every section, including the default section.  Otherwise return a
+        list of `(option, value)' pairs for every option in `section',
+        including those it inherits from the default section.
+        """
+        if section is _UNSET:
+            return super().items()
+        defaults = self._export(self.default_section, self._defaults)
+        if not section or section == self.default_section:
+            return list(defaults.items())
+        try:
+            options = self._sections[section].maps[0]
+        except KeyError:
+            raise NoSectionError(section)
+        defaults.update(self._export(section, options))
+        return list(defaults.items())
+
+    def to_dict(self, *, merge_defaults=False):
+        """Return a new dictionary mapping the name of every section,
+        starting with the default section, to a dictionary of its options.
+
+        If `merge_defaults' is true the dictionary of each section also
+        includes the options that it inherits from the default section.
+        Values are not copied.
+        """
+        defaults = self._export(self.default_section, self._defaults)
+        result = {self.default_section: defaults}
+        for section, options in self._sections.items():
+            options = self._export(section, options.maps[0])
+            if merge_defaults:
+                merged = dict(defaults)
+                merged.update(options)
+                options = merged
+            result[section] = options
+        return result
+
+    def iteroptions(self, *, merge_defaults=False):
+        """Iterate over `(section, option, value)' for every option in every
+        section, starting with the default section.  Sections are read one at
+        a time, so the parser should not be modified while iterating.
+
+        If `merge_defaults' is true the options that each section inherits
+        from the default section are included as well.
+        """
+        default = self.default_section
+        defaults = self._export(default, self._defaults)
+        for option, value in defaults.items():
+            yield default, option, value
+        for section in list(self._sections):
+            options = self._export(section, self._sections[section].maps[0])
+            if merge_defaults:
+                merged = dict(defaults)
+                merged.update(options)
+                options = merged
+            for option, value in options.items():
+                yield section, option, value
+
+    def _export(self, section, options):
+        """Returns a new dictionary of `options', the options set in
+        `section' itself, with any lazily parsed values decoded.
+        """
+        if type(options) is _CompactOptions:
+            result = dict(zip(options._layout.keys, options._values))
+        else:
+            result = dict(options)
+        if self._lazy:
+            for option, value in result.items():
+                if type(value) is _LazyValue:
+                    result[option] = self._decode(section, option, value)
+        return result
 
     def get(self, section, option, fallback=_UNSET, *, vars=None):
         """Get an option value for a given section.
@@ -279,6 +568,9 @@ class JSONConfigParser(MutableMapping):
 
         The section DEFAULT is special.
         """
+        if self._instrument is not None:
+            self._instrument._lookup(self, section, option, fallback, vars)
+
         if section is self.default_section:
             section_dict = self._defaults
         elif section in self._sections:
@@ -286,17 +578,103 @@ class JSONConfigParser(MutableMapping):
         else:
             raise NoSectionError(section)
 
-        if vars is not None:
-            section_dict = ChainMap(vars, section_dict)
+        if vars is not None and option in vars:
+            return vars[option]
+
+        if self._get_cache is not None:
+            value = self._cached_get(section, option, section_dict)
+        elif option in section_dict:
+            value = section_dict[option]
+            if type(value) is _LazyValue:
+                value = self._decode(section, option, value)
+        else:
+            value = _UNSET
 
-        if option in section_dict:
-            return section_dict[option]
+        if value is not _UNSET:
+            return value
 
         if fallback is _UNSET:
             raise NoOptionError(option)
 
         return fallback
 
+    def _cached_get(self, section, option, section_dict):
+        """Returns the value of an option, or _UNSET if it does not exist,
+        from the cache if possible.
+        """
+        cache = self._get_cache
+        key = (section, option)
+        try:
+            value = cache[key]
+        except KeyError:
+            pass
+        else:
+            self._get_cache_hits += 1
+            try:
+                cache.move_to_end(key)
+            except KeyError:
+                # evicted by another thread
+                pass
+            return value
+
+        self._get_cache_misses += 1
+        value = section_dict.get(option, _UNSET)
+        if type(value) is _LazyValue:
+            value = self._decode(section, option, value)
+        cache[key] = value
+        while len(cache) > self._get_cache_size:
+            try:
+                cache.popitem(last=False)
+            except KeyError:
+                break
+        return value
+
+    def get_cache_info(self):
+        """Return a named tuple of the hits, misses, maximum size and current
+        size of the cache used by `get'.
+        """
+        cache = self._get_cache
+        return _GetCacheInfo(
+            self._get_cache_hits, self._get_cache_misses,
+            self._get_cache_size, 0 if cache is None else len(cache),
+        )
+
+    def intern_info(self):
+        """Return a named tuple of the number of values read that were shared
+        with an identical value read before them, the number that were
+        decoded, and an estimate of the bytes saved by sharing.
+
+        Only counts values read by a parser created with `intern_values' and
+        not in other processes.
+        """
+        return _InternInfo(
+            self._intern_hits, self._intern_misses, self._intern_saved,
+        )
+
+    def _invalidate(self):
+        if self._get_cache is not None:
+            self._get_cache.clear()
+        self._query_cache.clear()
+        self._digests.clear()
+
+    def _decode(self, section, option, lazy):
+        """Decode a lazily parsed value and replace it in the parser with the
+        result so that it is only decoded once.
+        """
+        if self._instrument is None:
+            value = lazy.decode()
+        else:
+            start = time.perf_counter()
+            value = lazy.decode()
+            self._instrument._decoded(time.perf_counter() - start)
+        if section in self._sections:
+            options = self._sections[section].maps[0]
+            if options.get(option) is lazy:
+                options[option] = value
+        if self._defaults.get(option) is lazy:
+            self._defaults[option] = value
+        return value
+
     def has_option(self, section, option):
         if not section or section == self.default_section:
             return option in self._defaults
@@ -307,6 +685,7 @@ class JSONConfigParser(MutableMapping):
 
     def set(self, section, option, value=None):
         if not section or section == self.default_section:
+            section = self.default_section
             sectdict = self._defaults
         else:
             try:
@@ -314,9 +693,13 @@ class JSONConfigParser(MutableMapping):
             except KeyError:
                 raise NoSectionError(section)
         sectdict[option] = value
+        self._invalidate()
+        if self._locations is not None:
+            self._locations.pop((section, option), None)
 
     def remove_option(self, section, option):
         if not section or section == self._default_section:
+            section = self._default_section
             section_dict = self._defaults
         elif section in self._sections:
             section_dict = self._sections[section]
@@ -327,117 +710,441 @@ class JSONConfigParser(MutableMapping):
             section_dict.pop(option)
         except KeyError:
             return False
+        self._invalidate()
+        if self._locations is not None:
+            self._locations.pop((section, option), None)
         return True
 
-    def read(self, filenames, encoding=None, *, skip=False):
+    def read(self, filenames, encoding=None, *, skip=False, cache=None,
+             executor=None, sections=None, index=False):
+        """Read and parse a filename or a list of filenames.
+
+        If `sections' is given only the named sections and the default
+        section are read.  Other sections are skipped over without decoding
+        their values, although duplicate sections are still reported.  If
+        `index' is also true a sidecar index of the byte offset of each
+        section is kept next to each file, see `jsonconfigparser.index'.
+
+        If `cache' is given it should be a `ConfigCache' from
+        `jsonconfigparser.cache'.  Files whose cached artifact is still valid
+        are loaded from it instead of being parsed again.
+
+        If `executor' is given it should be a `concurrent.futures.Executor'.
+        Files are parsed concurrently on the executor but are still merged in
+        the order they were given.  Executors other than thread pools, such
+        as process pools, parse each file with a new parser created with the
+        same settings, so those files aren't counted by `intern_info' or by
+        instrumentation.
+        """
         if isinstance(filenames, str):
             filenames = [filenames]
-        for f in filenames:
-            try:
-                with open(f, 'r', encoding=encoding) as fp:
-                    self.read_file(fp)
-            except OSError:
-                # if file could not be found, skip it
-                if skip:
-                    continue
-                else:
-                    raise
+
+        parse, cache = self._file_parser(cache, executor)
+
+        indexed = None
+        if sections is not None:
+            sections = frozenset(sections)
+            if cache is None:
+                parse = functools.partial(parse, sections=sections)
+                if index:
+                    indexed = sections | {self._default_section}
+
+        if executor is not None:
+            filenames = list(filenames)
+            futures = [
+                executor.submit(
+                    _read_config, parse, f, encoding, cache, indexed
+                )
+                for f in filenames
+            ]
+
+        try:
+            for i, f in enumerate(filenames):
+                try:
+                    if executor is None:
+                        config, hit = _read_config(
+                            parse, f, encoding, cache, indexed
+                        )
+                    else:
+                        config, hit = futures[i].result()
+                except OSError:
+                    # if file could not be found, skip it
+                    if skip:
+                        continue
+                    else:
+                        raise
+                if cache is not None:
+                    cache._record(f, hit)
+                    if sections is not None:
+                        # artifacts hold every section of the file
+                        config = _select_sections(
+                            config, sections | {self._default_section}
+                        )
+                self._update(config)
+        finally:
+            if executor is not None:
+                for future in futures:
+                    future.cancel()
+
+    def _file_parser(self, cache, executor=None):
+        """Returns the function used to parse each file read by `read' and the
+        cache to read them through, if any.
+
+        Files parsed on a thread pool, or without an executor, are parsed by
+        the parser itself.  Other executors, such as process pools, pickle
+        the function along with every file, so they are given one that
+        creates a new parser with the same settings instead.
+        """
+        if self._locations is not None or self._intern_values:
+            # the cache does not store locations or shared values
+            cache = None
+
+        if executor is None or _is_thread_pool(executor):
+            parse = self._parse_string
+        else:
+            parse = functools.partial(_parse_detached, (
+                self._default_section, self._lazy,
+                self._locations is not None, self._intern_values,
+            ))
+        if cache is not None and self._lazy:
+            # lazily parsed values can't be stored in the cache
+            parse = functools.partial(parse, lazy=False)
+        return parse, cache
+
+    def aread(self, filenames, encoding=None, **kwargs):
+        """Coroutine version of `read' for use with asyncio.  See
+        `jsonconfigparser.aio.aread'.  Requires Python 3.5.
+        """
+        from jsonconfigparser.aio import aread
+        return aread(self, filenames, encoding, **kwargs)
+
+    def aread_stream(self, reader, fpname=None, **kwargs):
+        """Read and parse the contents of an `asyncio.StreamReader'.  See
+        `jsonconfigparser.aio.aread_stream'.  Requires Python 3.5.
+        """
+        from jsonconfigparser.aio import aread_stream
+        return aread_stream(self, reader, fpname, **kwargs)
 
     def read_file(self, fp, fpname=None):
-        self.read_string(fp.read(), fpname=fpname)
+        """Read and parse a file object incrementally.
+
+        Unless the parser is lazy the file is consumed in chunks so the full
+        text never needs to be held in memory.
+        """
+        if self._lazy or self._locations is not None:
+            # lazily decoded values keep a reference to the source anyway, and
+            # locations are found from the full text
+            self.read_string(fp.read(), fpname=fpname)
+            return
+
+        parser = self._feed_parser(fpname)
+        while True:
+            data = fp.read(64 * 1024)
+            if not data:
+                break
+            parser.feed(data)
+        parser.close()
+        self._update(self._result(parser, None))
+
+    def read_bytes(self, data, fpname=None, *, encoding='utf-8-sig',
+                   chunk_size=64 * 1024):
+        """Read and parse a bytes-like object, such as `bytes', a
+        `memoryview' or an `mmap.mmap' of a file.
+
+        Unless the parser is lazy or tracks locations, the data is decoded a
+        chunk at a time as it is parsed so that the full text is never held
+        in memory alongside it.  A UTF-8 byte order mark is skipped and line
+        endings are translated as they are for files opened in text mode, so
+        results and errors are otherwise the same as for `read'.
+        """
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(), translate=True
+        )
+        with memoryview(data) as view:
+            if self._lazy or self._locations is not None:
+                # see `read_file'
+                self.read_string(
+                    decoder.decode(view, final=True), fpname=fpname
+                )
+                return
+
+            parser = self._feed_parser(fpname)
+            for start in range(0, len(view), chunk_size):
+                parser.feed(decoder.decode(view[start:start + chunk_size]))
+            parser.close(decoder.decode(b'', final=True))
+        self._update(self._result(parser, None))
+
+    def read_mmap(self, filename, *, encoding='utf-8-sig'):
+        """Read and parse a file by mapping it into memory and passing it to
+        `read_bytes'.
+        """
+        with open(filename, 'rb') as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                # empty files can't be mapped
+                self.read_bytes(b'', filename, encoding=encoding)
+                return
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self.read_bytes(data, filename, encoding=encoding)
 
     def read_dict(self, dictionary):
-        # validate dictionary
+        self._validate(dictionary)
+        self._update(dictionary)
+
+    @classmethod
+    def _validate(cls, dictionary):
         for section, options in dictionary.items():
-            if not re.match(r'^\w[\-\w]*$', section):
+            if not cls._name_re.match(section):
                 raise InvalidSectionNameError(section)
 
             for option in options:
-                if not re.match(r'^\w[\-\w]*$', option):
+                if not cls._name_re.match(option):
                     raise InvalidOptionNameError(option, section=section)
 
-        # update config
+    def _update(self, dictionary):
+        """Merge an already validated dictionary of sections into the parser.
+        """
+        sections = self._sections
         for section, options in dictionary.items():
-            if section not in self:
+            if section == self._default_section:
+                self._defaults.update(options)
+                continue
+
+            if section not in sections:
                 self.add_section(section)
 
-            self[section].update(options)
+            sections[section].maps[0].update(options)
+
+        self._invalidate()
+        if self._locations is not None:
+            self._update_locations(dictionary)
+
+    def _update_locations(self, dictionary):
+        locations = getattr(dictionary, 'locations', {})
+        for section, options in dictionary.items():
+            for option in options:
+                key = (section, option)
+                if key in locations:
+                    self._locations[key] = locations[key]
+                else:
+                    self._locations.pop(key, None)
 
     def read_string(self, string, fpname=None):
-        config = {}
-        section = None
+        self._update(self._parse_string(string, fpname=fpname))
 
-        idx = 0
+    def _parse_string(self, string, fpname=None, *, lazy=None,
+                      sections=None):
+        """Parse `string' into a dictionary mapping section names to
+        dictionaries of options without modifying the parser.
 
-        while idx < len(string):
-            if string[idx] == '[':
-                mo = self._header_re.match(string, idx)
-                if not mo:
-                    raise ParseError(
-                        'Could not parse section header',
-                        string, idx, filename=fpname, section=section
-                    )
-                section = mo.group('section')
-
-                # check that section has not occured in this file before
-                if section in config:
-                    raise DuplicateSectionError(
-                        section,
-                        string, idx, filename=fpname, section=section
-                    )
-
-                # find or create the section
-                if section not in config:
-                    config[section] = {}
-
-                idx = mo.end()
-            elif string[idx] in ['#', '\n', '\r']:
-                # consume blank lines and comments
-                mo = self._blank_re.match(string, idx)
-                idx = mo.end()
+        If `sections' is given only those sections and the default section
+        are returned, and the options in any other section are skipped
+        without being checked.
+        """
+        if lazy is None:
+            lazy = self._lazy
+        if self._intern_values:
+            # values are decoded as they are read so that they can be shared
+            lazy = False
+        if sections is not None:
+            wanted = set(sections)
+            wanted.add(self._default_section)
+            parser = self._feed_parser(fpname)
+            parser._lazy = lazy
+            parser._wanted = wanted
+            parser._headers = [mo.start() for mo in _find_headers(string)]
+            try:
+                parser.close(string)
+                return self._result(parser, string)
+            except ParseError:
+                # a line in a multi-line value that was skipped over might
+                # have been mistaken for a header.  Parse everything to find
+                # out if the error is genuine.
+                config = self._parse_string(string, fpname, lazy=lazy)
+                return _select_sections(config, wanted)
+        if lazy:
+            parser = self._feed_parser(fpname)
+            parser._lazy = True
+            try:
+                parser.close(string)
+                return self._result(parser, string)
+            except ParseError:
+                # values before the error that were only scanned might hold
+                # an earlier error.  Parse again without scanning so that
+                # the same error is raised as by a parser that isn't lazy.
+                pass
+        parser = self._feed_parser(fpname)
+        parser.close(string)
+        return self._result(parser, string)
+
+    def _feed_parser(self, fpname):
+        parser = FeedParser(fpname)
+        parser._config = {}
+        if self._locations is not None:
+            parser._locations = {}
+        if self._intern_values:
+            parser._memo = {}
+        if self._instrument is not None:
+            parser._timer = self._instrument._timer()
+        return parser
+
+    def _result(self, parser, string):
+        config = parser._result()
+        if parser._memo is not None:
+            self._intern_hits += parser._memo_hits
+            self._intern_misses += parser._memo_misses
+            self._intern_saved += parser._memo_saved
+        if self._instrument is not None and parser._timer is not None:
+            self._instrument._parsed(parser, config)
+        if parser._locations is None:
+            return config
+
+        index = _LineIndex(string)
+        config = _LocatedConfig(config)
+        config.locations = {}
+        for key, offset in parser._locations.items():
+            lineno, _, line = index.locate(offset)
+            config.locations[key] = (parser._fpname, lineno, line)
+        return config
+
+    def location(self, section, option):
+        """Return a `(filename, lineno, line)' tuple describing the statement
+        that set `option' in `section'.
+
+        Returns None if the parser was not created with `track_locations' or
+        the option was not read from a file or string.
+        """
+        if self._locations is None:
+            return None
+        if section in self._sections and section != self._default_section:
+            if option in self._sections[section].maps[0]:
+                return self._locations.get((section, option))
+        return self._locations.get((self._default_section, option))
+
+    def write(self, fp, *, indent=None, compact=False):
+        """Write the configuration to a file object in the format accepted by
+        `read_file'.
+
+        Values are encoded as json on a single line unless `indent' is given,
+        in which case it is used to indent the members of lists and
+        dictionaries as it would be by `json.dumps'.  If `compact' is true no
+        whitespace is written after separators.  Values that have not yet been
+        decoded by a lazy parser are written exactly as they were read.
+
+        Output is written one section at a time.
+        """
+        if compact:
+            separators = (',', ':')
+        elif indent is not None:
+            # avoid trailing whitespace at the end of indented lines
+            separators = (',', ': ')
+        else:
+            separators = (', ', ': ')
+        encode = json.JSONEncoder(
+            indent=indent, separators=separators
+        ).encode
+
+        if self._defaults:
+            self._write_section(fp, self._default_section, self._defaults,
+                                encode)
+        for section, options in self._sections.items():
+            self._write_section(fp, section, options.maps[0], encode)
+
+    def _write_section(self, fp, section, options, encode):
+        lines = ['[%s]\n' % section]
+        for option, value in options.items():
+            if type(value) is _LazyValue:
+                value = value._source[value._start:value._end]
             else:
-                # hopefully a key value pair
-                # read option
-                mo = self._key_re.match(string, idx)
-                if not mo:
-                    raise ParseError(
-                        "Expected section, option, comment or empty line",
-                        string, idx, filename=fpname, section=section
-                    )
-
-                if section is None:
-                    raise MissingSectionHeaderError(
-                        string, idx, filename=fpname
-                    )
-
-                option = mo.group('key')
-                if option in config[section]:
-                    raise DuplicateOptionError(
-                        string, idx, filename=fpname, section=section
-                    )
-
-                idx = mo.end()
-
-                # read value
-                try:
-                    value, idx = self._json_decoder.raw_decode(string, idx)
-                except ValueError as e:
-                    raise JSONError(
-                        e, string, idx,
-                        filename=fpname, section=section
-                    )
-
-                config[section][option] = value
-
-                # consume remaining comments and whitespace
-                mo = self._eol_re.match(string, idx)
-                if not mo:
-                    raise ParseError(
-                        "Unexpected symbol or whitespace",
-                        string, idx, filename=fpname
-                    )
-                idx = mo.end()
-        self.read_dict(config)
+                value = encode(value)
+            lines.append('%s = %s\n' % (option, value))
+        lines.append('\n')
+        fp.write(''.join(lines))
+
+    def dumps(self, *, indent=None, compact=False):
+        """Return the configuration as a string.  See `write'."""
+        fp = io.StringIO()
+        self.write(fp, indent=indent, compact=compact)
+        return fp.getvalue()
+
+    def query(self, section, path, fallback=_UNSET):
+        """Return the part of an option's value found by following `path'.
+
+        Paths start with the name of an option and continue with `.key' or
+        `["key"]' to look up a member of a dictionary and `[index]' to look
+        up an item of a list, for example `routes.eu[3].host'.  If `path'
+        contains a wildcard, `.*' or `[*]', every member or item at that
+        point is followed and a list of all of the matches is returned.
+
+        Raises NoOptionError if the option does not exist and KeyError if
+        the rest of the path does not, unless `fallback' is given.  Paths are
+        compiled once and results are kept until the parser is modified, so
+        values returned should not be modified in place.
+        """
+        cache = self._query_cache
+        key = (section, path)
+        try:
+            result = cache[key]
+        except KeyError:
+            result = self._query(section, _compile_path(path))
+            cache[key] = result
+            while len(cache) > _QUERY_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        if result is _UNSET:
+            if fallback is not _UNSET:
+                return fallback
+            compiled = _compile_path(path)
+            if not self.has_option(section, compiled.option):
+                raise NoOptionError(compiled.option)
+            raise KeyError(path)
+        if type(result) is list:
+            return list(result)
+        return result
+
+    def _query(self, section, compiled):
+        try:
+            value = self.get(section, compiled.option)
+        except NoOptionError:
+            return _UNSET
+        return compiled.resolve(value)
+
+    def query_all(self, path, sections=None):
+        """Query `path' in every section, or in each of `sections', and
+        return an ordered dictionary mapping the name of every section in
+        which it was found to the result.  See `query'.
+        """
+        if sections is not None:
+            sections = tuple(sections)
+        cache = self._query_cache
+        key = (sections, path)
+        try:
+            results = cache[key]
+        except KeyError:
+            compiled = _compile_path(path)
+            results = OrderedDict()
+            for section in (self.sections() if sections is None
+                            else sections):
+                if section != self._default_section and \
+                        section not in self._sections:
+                    continue
+                result = self._query(section, compiled)
+                if result is not _UNSET:
+                    results[section] = result
+            cache[key] = results
+            while len(cache) > _QUERY_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        results = results.copy()
+        if _compile_path(path).wildcard:
+            for section, result in results.items():
+                results[section] = list(result)
+        return results
+
+    def freeze(self):
+        """Return an immutable, flattened snapshot of the parser as a
+        `FrozenConfig'.
+        """
+        return FrozenConfig(self)
 
     @property
     def default_section(self):
@@ -447,6 +1154,7 @@ class JSONConfigParser(MutableMapping):
 
 class SectionProxy(MutableMapping):
     """A proxy for a single section from a parser."""
+    __slots__ = ('_parser', '_name')
 
     def __init__(self, parser, name):
         """Creates a view on a section of the specified `name` in `parser`."""
@@ -457,9 +1165,10 @@ class SectionProxy(MutableMapping):
         return '<Section: {}>'.format(self._name)
 
     def __getitem__(self, key):
-        if not self._parser.has_option(self._name, key):
+        try:
+            return self._parser.get(self._name, key)
+        except (NoSectionError, NoOptionError):
             raise KeyError(key)
-        return self._parser.get(self._name, key)
 
     def __setitem__(self, key, value):
         return self._parser.set(self._name, key, value)
@@ -481,11 +1190,20 @@ class SectionProxy(MutableMapping):
         if self._name != self._parser.default_section:
             return self._parser.options(self._name)
         else:
-            return self._parser.defaults()
+            return self._parser._defaults.keys()
+
+    def items(self):
+        """Return a list of `(option, value)' pairs for every option in the
+        section, including those inherited from the default section.
+        """
+        return self._parser.items(self._name)
 
     def get(self, option, *args, **kwargs):
         return self._parser.get(self._name, option, *args, **kwargs)
 
+    def query(self, path, fallback=_UNSET):
+        return self._parser.query(self._name, path, fallback)
+
     @property
     def parser(self):
         # The parser object of the proxy is read-only.
@@ -495,3 +1213,1048 @@ class SectionProxy(MutableMapping):
     def name(self):
         # The name of the section on a proxy is read-only.
         return self._name
+
+
+# a line break followed by something that could only be the start of a new
+# statement, never the continuation of a valid json value.  Lines that look
+# like section headers are included even though they might be part of a
+# nested array.
+_NEXT_STATEMENT_TMPL = r'''
+    [\n\r]
+    (?= \# | [\-\w]+\s*= | \[[\-\w]+\][\n\r]*(?:[\n\r]|\Z) )
+    '''
+_next_statement_re = re.compile(_NEXT_STATEMENT_TMPL, re.VERBOSE)
+
+_header_line_re = re.compile(r'\[(?P<section>[\-\w]+)\](?=[\n\r]|\Z)')
+
+
+def _find_headers(string):
+    """Returns a match object, in order, for every line in `string' that looks
+    like a section header, including any in the middle of multi-line values.
+    """
+    match = _header_line_re.match
+    find = string.find
+    headers = []
+    mo = match(string)
+    if mo:
+        headers.append(mo)
+    # searching for line breaks followed by a bracket is much quicker than
+    # trying a pattern at the start of every line
+    newlines = ('\n', '\r') if '\r' in string else ('\n',)
+    for newline in newlines:
+        needle = newline + '['
+        i = find(needle)
+        while i != -1:
+            mo = match(string, i + 1)
+            if mo:
+                headers.append(mo)
+            i = find(needle, i + 2)
+    if len(newlines) > 1:
+        headers.sort(key=lambda mo: mo.start())
+    return headers
+
+
+_CLOSING = {'[': ']', '{': '}'}
+
+
+def _scan_value(string, idx):
+    """Find the end of the json container starting at `idx' without decoding
+    it.
+
+    Only containers that finish at the end of their line are scanned, as
+    other values cost less to decode than to check.  Their brackets, outside
+    of strings, must balance, so that decoding them can't continue onto the
+    next line and the line after the value is always parsed as a statement.
+    Returns None if the end of the value could not be found this way, in
+    which case it should be decoded normally.
+    """
+    end = string.find('\n', idx)
+    if end == -1:
+        end = len(string)
+    value = string[idx:end].rstrip(' \t\r')
+    if value[-1] != _CLOSING[string[idx]] or '\r' in value:
+        return None
+
+    outside = value
+    if '"' in value:
+        if '\\' in value:
+            return None
+        pieces = value.split('"')
+        if not len(pieces) % 2:
+            # strings can't span lines
+            return None
+        outside = ''.join(pieces[::2])
+    if outside.count('[') != outside.count(']') or \
+            outside.count('{') != outside.count('}'):
+        return None
+    return idx + len(value)
+
+
+class _LazyValue(object):
+    """Placeholder for a json value that has been scanned but not decoded.
+    """
+    __slots__ = (
+        '_source', '_start', '_end', '_filename', '_section', '_newlines',
+    )
+
+    def __init__(self, source, start, end, filename, section, newlines=0):
+        self._source = source
+        self._start = start
+        self._end = end
+        self._filename = filename
+        self._section = section
+        # number of lines that preceded `source' in the input
+        self._newlines = newlines
+
+    def __repr__(self):
+        return '<LazyValue: {}>'.format(repr(self._source[self._start:][:20]))
+
+    def decode(self):
+        try:
+            value, end = JSONConfigParser._json_decoder.raw_decode(
+                self._source, self._start
+            )
+            if end != self._end:
+                raise ParseError(
+                    "Unexpected symbol or whitespace",
+                    self._source, end, filename=self._filename
+                )
+        except ValueError as e:
+            if not isinstance(e, ParseError):
+                e = JSONError(
+                    e, self._source, self._start,
+                    filename=self._filename, section=self._section
+                )
+            if e.lineno is not None:
+                e.lineno += self._newlines
+                e.args = (str(e),)
+            raise e
+        return value
+
+
+def _decoded(value):
+    if type(value) is _LazyValue:
+        return value.decode()
+    return value
+
+
+def _freeze_value(value):
+    """Returns a deep, immutable copy of a decoded json value.  Lists become
+    tuples and dictionaries become read-only mappings.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({
+            k: _freeze_value(v) for k, v in value.items()
+        })
+    if isinstance(value, list):
+        return tuple(_freeze_value(v) for v in value)
+    return value
+
+
+class _FrozenDict(dict):
+    """A read-only dictionary.  Used instead of a `MappingProxyType' for
+    values shared by parsers created with `intern_values' as, unlike a
+    proxy, it can still be pickled and encoded as json.
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("'FrozenDict' object is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (_FrozenDict, (dict(self),))
+
+
+def _freeze_json(value):
+    """Like `_freeze_value', but dictionaries become `_FrozenDict's."""
+    if isinstance(value, dict):
+        return _FrozenDict({k: _freeze_json(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze_json(v) for v in value)
+    return value
+
+
+def _deep_sizeof(value):
+    """Returns the number of bytes used by a decoded json value, including
+    everything that it contains.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + _deep_sizeof(v)
+    elif isinstance(value, list):
+        for v in value:
+            size += _deep_sizeof(v)
+    return size
+
+
+def _hash_key(value):
+    """Returns a hashable representation of a frozen value."""
+    if isinstance(value, MappingProxyType):
+        return frozenset((k, _hash_key(v)) for k, v in value.items())
+    if isinstance(value, tuple):
+        return tuple(_hash_key(v) for v in value)
+    return value
+
+
+class FrozenSection(Mapping):
+    """An immutable, flattened view of a single section.
+
+    Options inherited from the default section are merged in so that lookups
+    are a single dictionary probe.
+    """
+    __slots__ = ('_name', '_options', '_hash')
+
+    def __init__(self, name, options):
+        self._name = name
+        self._options = options
+        self._hash = None
+
+    def __repr__(self):
+        return '<FrozenSection: {}>'.format(self._name)
+
+    def __getitem__(self, key):
+        return self._options[key]
+
+    def __contains__(self, key):
+        return key in self._options
+
+    def __len__(self):
+        return len(self._options)
+
+    def __iter__(self):
+        return iter(self._options)
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenSection):
+            return NotImplemented
+        return self._name == other._name and self._options == other._options
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self._name, _hash_key(
+                MappingProxyType(self._options)
+            )))
+        return self._hash
+
+    def get(self, option, fallback=_UNSET, *, vars=None):
+        if vars is not None and option in vars:
+            return vars[option]
+        try:
+            return self._options[option]
+        except KeyError:
+            if fallback is _UNSET:
+                raise NoOptionError(option)
+            return fallback
+
+    @property
+    def name(self):
+        return self._name
+
+
+class FrozenConfig(Mapping):
+    """An immutable snapshot of a `JSONConfigParser'.
+
+    Created by `JSONConfigParser.freeze'.  Values are deep copies of those in
+    the parser with lists converted to tuples and dictionaries to read-only
+    mappings, so a snapshot can be shared between threads without locking.
+    Snapshots with the same contents compare equal and have the same hash.
+    """
+    __slots__ = ('_default_section', '_sections', '_hash')
+
+    def __init__(self, parser):
+        self._default_section = parser.default_section
+
+        defaults = {
+            option: _freeze_value(_decoded(value))
+            for option, value in parser._defaults.items()
+        }
+
+        self._sections = {
+            self._default_section: FrozenSection(
+                self._default_section, defaults
+            ),
+        }
+        for name, section in parser._sections.items():
+            options = dict(defaults)
+            for option, value in section.maps[0].items():
+                options[option] = _freeze_value(_decoded(value))
+            self._sections[name] = FrozenSection(name, options)
+
+        self._hash = None
+
+    @classmethod
+    def _from_sections(cls, default_section, sections):
+        """Create a snapshot from a dictionary of `FrozenSection's, which
+        must include the default section.
+        """
+        self = cls.__new__(cls)
+        self._default_section = default_section
+        self._sections = sections
+        self._hash = None
+        return self
+
+    def __repr__(self):
+        return '<FrozenConfig: {} sections>'.format(len(self._sections) - 1)
+
+    def __getitem__(self, key):
+        return self._sections[key]
+
+    def __contains__(self, key):
+        return key in self._sections
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenConfig):
+            return NotImplemented
+        return (
+            self._default_section == other._default_section and
+            self._sections == other._sections
+        )
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._sections.values()))
+        return self._hash
+
+    def sections(self):
+        """Return a list of section names, excluding [DEFAULT]"""
+        return [
+            name for name in self._sections
+            if name != self._default_section
+        ]
+
+    def has_section(self, section):
+        return section != self._default_section and section in self._sections
+
+    def options(self, section):
+        """Return a list of option names for the given section name."""
+        if not self.has_section(section):
+            raise NoSectionError(section)
+        return list(self._sections[section])
+
+    def has_option(self, section, option):
+        if not section:
+            section = self._default_section
+        try:
+            return option in self._sections[section]._options
+        except KeyError:
+            return False
+
+    def get(self, section, option, fallback=_UNSET, *, vars=None):
+        """Get an option value for a given section.
+
+        Behaves the same as `JSONConfigParser.get'.
+        """
+        if vars is not None and option in vars:
+            if section not in self._sections:
+                raise NoSectionError(section)
+            return vars[option]
+        try:
+            return self._sections[section]._options[option]
+        except KeyError:
+            if section not in self._sections:
+                raise NoSectionError(section)
+            if fallback is _UNSET:
+                raise NoOptionError(option)
+            return fallback
+
+    @property
+    def default_section(self):
+        return self._default_section
+
+
+class _Layout(object):
+    """The names of the options in a compact section, in order.
+
+    Layouts are shared by every section with the same option names.  They
+    form a tree rooted at the empty layout with an edge for each option
+    added, so that sections filled in the same order end up with the same
+    layout without having to compare keys.
+    """
+    __slots__ = ('keys', 'index', 'root', '_children')
+
+    def __init__(self, keys=(), root=None):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.root = self if root is None else root
+        self._children = {}
+
+    def add(self, key):
+        """Return the layout with `key' appended."""
+        try:
+            return self._children[key]
+        except KeyError:
+            pass
+        if type(key) is str:
+            key = sys.intern(key)
+        child = _Layout(self.keys + (key,), self.root)
+        self._children[key] = child
+        return child
+
+    def __reduce__(self):
+        # the tree is as deep as the longest layout, which is too deep to
+        # pickle recursively.  Layouts are rebuilt from their keys instead,
+        # sharing the root so that they are shared again once unpickled.
+        if self.root is self:
+            return _Layout, ()
+        return _rebuild_layout, (self.root, self.keys)
+
+
+def _rebuild_layout(root, keys):
+    layout = root
+    for key in keys:
+        layout = layout.add(key)
+    return layout
+
+
+class _CompactOptions(MutableMapping):
+    """The options of a single section, stored as a list of values in the
+    order given by a shared `_Layout'.
+    """
+    __slots__ = ('_layout', '_values')
+
+    def __init__(self, layout):
+        self._layout = layout
+        self._values = []
+
+    def __getitem__(self, key):
+        return self._values[self._layout.index[key]]
+
+    def __setitem__(self, key, value):
+        index = self._layout.index.get(key)
+        if index is None:
+            self._layout = self._layout.add(key)
+            self._values.append(value)
+        else:
+            self._values[index] = value
+
+    def __delitem__(self, key):
+        index = self._layout.index[key]
+        keys = self._layout.keys
+        layout = self._layout.root
+        for other in keys[:index] + keys[index + 1:]:
+            layout = layout.add(other)
+        del self._values[index]
+        self._layout = layout
+
+    def __contains__(self, key):
+        return key in self._layout.index
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def items(self):
+        return list(zip(self._layout.keys, self._values))
+
+    def clear(self):
+        self._layout = self._layout.root
+        self._values = []
+
+
+class _CompactSection(MutableMapping):
+    """Used in place of `ChainMap(options, defaults)' by compact parsers."""
+    __slots__ = ('_options', '_defaults')
+
+    def __init__(self, layout, defaults):
+        self._options = _CompactOptions(layout)
+        self._defaults = defaults
+
+    @property
+    def maps(self):
+        return [self._options, self._defaults]
+
+    def __getitem__(self, key):
+        options = self._options
+        if key in options:
+            return options[key]
+        return self._defaults[key]
+
+    def __setitem__(self, key, value):
+        self._options[key] = value
+
+    def __delitem__(self, key):
+        del self._options[key]
+
+    def __contains__(self, key):
+        return key in self._options or key in self._defaults
+
+    def __len__(self):
+        return len(set(self._options).union(self._defaults))
+
+    def __iter__(self):
+        # same order as `ChainMap'
+        options = self._options
+        for key in self._defaults:
+            yield key
+        for key in options:
+            if key not in self._defaults:
+                yield key
+
+    def pop(self, key, *args):
+        return self._options.pop(key, *args)
+
+    def clear(self):
+        self._options.clear()
+
+
+class _LocatedConfig(dict):
+    """Parsed sections along with a `locations' dictionary mapping
+    `(section, option)' to the location of each option in the source.
+    """
+    __slots__ = ('locations',)
+
+
+def _select_sections(config, wanted):
+    """Returns the sections of a parsed config whose names are in `wanted'.
+    """
+    selected = {
+        section: options for section, options in config.items()
+        if section in wanted
+    }
+    if isinstance(config, _LocatedConfig):
+        selected = _LocatedConfig(selected)
+        selected.locations = config.locations
+    return selected
+
+
+def _is_thread_pool(executor):
+    from concurrent.futures import ThreadPoolExecutor
+    return isinstance(executor, ThreadPoolExecutor)
+
+
+def _parse_detached(settings, string, fpname=None, **kwargs):
+    """Parse `string' with a new parser created with `settings', which are
+    the default section name and whether values are lazy, locations tracked
+    and values interned.  Module level so that it can be pickled without
+    the parser that is doing the reading.
+    """
+    default_section, lazy, track_locations, intern_values = settings
+    parser = JSONConfigParser(
+        default_section=default_section, lazy=lazy,
+        track_locations=track_locations, intern_values=intern_values,
+    )
+    return parser._parse_string(string, fpname, **kwargs)
+
+
+def _read_config(parse, filename, encoding, cache, indexed=None):
+    """Parse a single file, returning the parsed sections and whether they were
+    loaded from `cache'.  Module level so that it can be run in a process pool.
+
+    If `indexed' is given it is the set of sections that `parse' selects, and
+    the file is read through its sidecar section index.
+    """
+    if cache is not None:
+        return cache._load(filename, parse, encoding)
+    if indexed is not None:
+        from jsonconfigparser.index import _load
+        return _load(filename, parse, encoding, indexed)
+    with open(filename, 'r', encoding=encoding) as fp:
+        return parse(fp.read(), fpname=filename), False
+
+
+class FeedParser(object):
+    """An incremental parser for config files.
+
+    Text is passed in chunks of any size to `feed' and `close'.  Both return a
+    list of `(section, option, value)' events for every option whose value
+    has been completely read, including values that span several lines.  A
+    section header is reported as `(section, None, None)'.
+
+    Only the text of the statement currently being read is buffered.  If a
+    value is incomplete it is not decoded again until the buffer has doubled
+    in size or `close' is called, so very long values are parsed in linear
+    time.
+    """
+    _newline_re = re.compile(r'[\n\r]')
+
+    def __init__(self, fpname=None):
+        self._fpname = fpname
+        # if set, values in the final block of input are only scanned and are
+        # reported as placeholders to be decoded by `JSONConfigParser.get'
+        self._lazy = False
+        # if set to a dictionary, options are collected into it rather than
+        # being returned as events
+        self._config = None
+
+        self._buffer = ''
+        self._pending = []
+        self._pending_size = 0
+        # don't try to parse again until this many characters are pending
+        self._retry = 0
+
+        # number of lines, as counted by `str.splitlines', and of newline
+        # characters, as counted by the json module, that have already been
+        # consumed.  Used to fix up the locations in errors.
+        self._lines = 0
+        self._newlines = 0
+        self._consumed = 0
+
+        # offset in the input of each section header that has been read
+        self._offsets = []
+
+        self._section = None
+        self._sections = set()
+        self._options = {}
+        # set if a name was read that the grammar accepts but `read_dict'
+        # would reject
+        self._invalid_names = False
+        # if set to a list, errors are appended to it and parsing resumes
+        # after the statement that caused them.  Only supported for input
+        # passed in a single call to `close'.
+        self._errors = None
+        # offset in the buffer of the statement being read when parsing last
+        # stopped
+        self._statement = 0
+        # line index of the buffer, kept while errors are being collected
+        self._index = None
+        # if set to a dictionary, the offset in the input of each option is
+        # recorded in it, keyed by `(section, option)'
+        self._locations = None
+        # if set to a set of section names, the options in any other section
+        # are skipped without being read by jumping to the next offset in
+        # `_headers', a sorted list of the offsets of every line that looks
+        # like a section header.  Only supported for input passed in a single
+        # call to `close'.
+        self._wanted = None
+        self._headers = None
+        # if set to a dictionary, maps the text of each value that has been
+        # decoded to its frozen value and decoded size, so that values with
+        # the same text share a single instance
+        self._memo = None
+        self._memo_hits = 0
+        self._memo_misses = 0
+        self._memo_saved = 0
+        # if set, accumulates the time spent decoding json values
+        self._timer = None
+        # number of characters passed to `feed' and `close'
+        self._size = 0
+
+        self._closed = False
+
+    def feed(self, data):
+        if self._closed:
+            raise ValueError("feed() called after close()")
+
+        self._pending.append(data)
+        self._pending_size += len(data)
+        self._size += len(data)
+        if self._pending_size < self._retry:
+            return []
+
+        return self._parse(final=False)
+
+    def close(self, data=''):
+        """Parse any remaining buffered text, followed by `data', and check
+        that the input did not end part way through a statement.
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        if data:
+            self._pending.append(data)
+            self._size += len(data)
+        return self._parse(final=True)
+
+    def _result(self):
+        """Returns the options collected into `_config', raising the same
+        errors that `read_dict' would for any invalid names.
+        """
+        if self._invalid_names:
+            JSONConfigParser._validate(self._config)
+        return self._config
+
+    def _parse(self, final):
+        if self._pending:
+            self._buffer += ''.join(self._pending)
+            self._pending = []
+            self._pending_size = 0
+        self._retry = 0
+
+        events = [] if self._config is None else None
+        string = self._buffer
+        held = ''
+        if not final and string.endswith('\r'):
+            # the line feed of a carriage return and line feed pair might be
+            # at the start of the next chunk.  Splitting the pair between two
+            # buffers would count it as two line breaks.
+            string, held = string[:-1], '\r'
+        end = len(string)
+        idx = 0
+        while True:
+            try:
+                idx = self._parse_statements(string, end, final, events, idx)
+                break
+            except ParseError as e:
+                if isinstance(e, JSONError):
+                    e.lineno += self._newlines
+                elif e.lineno is not None:
+                    e.lineno += self._lines
+                e.args = (str(e),)
+                if self._errors is None:
+                    raise
+                self._errors.append(e)
+
+            # skip the rest of the statement.  The value of an option might
+            # continue over several lines.
+            start = self._statement
+            mo = JSONConfigParser._statement_re.match(string, start)
+            if mo and mo.lastgroup == 'key':
+                mo = _next_statement_re.search(string, start)
+            else:
+                mo = self._newline_re.search(string, start)
+            idx = mo.end() if mo else end
+
+        if final:
+            self._buffer = ''
+            self._index = None
+            return events or []
+
+        consumed = string[:idx]
+        # statements always finish at the end of a line, and never between a
+        # carriage return and a line feed, so every line in `consumed' is
+        # complete
+        self._lines += len(consumed.splitlines())
+        self._newlines += consumed.count('\n')
+        self._consumed += idx
+
+        self._buffer = string[idx:] + held
+        return events or []
+
+    def _statement_error(self, string, idx, section):
+        if string[idx] == '[':
+            message = 'Could not parse section header'
+        else:
+            message = "Expected section, option, comment or empty line"
+        return ParseError(
+            message, self._source(string), idx,
+            filename=self._fpname, section=section
+        )
+
+    def _source(self, string):
+        """Returns what to locate errors in the buffer `string' against.  When
+        errors are being collected this is a line index that is shared by all
+        of them until parsing finishes.
+        """
+        if self._errors is None:
+            return string
+        index = self._index
+        if index is None or index.source is not string:
+            index = self._index = _LineIndex(string)
+        return index
+
+    def _decode_bounded(self, string, start, idx, section):
+        """Decode the value at `idx' of the statement starting at `start'.
+
+        The json module counts the lines before an error from the start of its
+        input, so when collecting errors the value is decoded from a copy of
+        the statement that ends at the next line that looks like the start of
+        another statement.
+        """
+        decoder = JSONConfigParser._json_decoder
+        mo = _next_statement_re.search(string, idx)
+        stop = mo.end() if mo else len(string)
+        statement = string[start:stop]
+        try:
+            try:
+                value, end = decoder.scan_once(statement, idx - start)
+            except StopIteration:
+                value, end = decoder.raw_decode(statement, idx - start)
+            return value, start + end
+        except ValueError as e:
+            error = JSONError._json_error_re.match(e.args[0])
+            if not mo or int(error.group('index')) < len(statement.rstrip()):
+                e = JSONError(
+                    e, statement, idx - start,
+                    filename=self._fpname, section=section
+                )
+                e.lineno += get_line(self._source(string), start)[0] - 1
+                raise e
+
+        # the value ran into the following line so may have been cut short.
+        # Decode it again from the original.
+        try:
+            return decoder.raw_decode(string, idx)
+        except ValueError as e:
+            raise JSONError(
+                e, string, idx, filename=self._fpname, section=section
+            )
+
+    def _interned(self, string, idx, final, scan, decode):
+        """Decode the value at `idx', returning the same frozen instance for
+        every value with the same text.
+
+        A value must be followed by the end of its line, so if the rest of
+        the line is the text of a value that has already been seen it is not
+        decoded again.  Values that span several lines are always decoded.
+        """
+        memo = self._memo
+        eol = string.find('\n', idx)
+        if eol == -1 and final:
+            eol = len(string)
+        if eol != -1:
+            entry = memo.get(string[idx:eol])
+            if entry is not None:
+                self._memo_hits += 1
+                self._memo_saved += entry[1]
+                return entry[0], eol
+
+        try:
+            value, end = scan(string, idx)
+        except StopIteration:
+            value, end = decode(string, idx)
+        if end == len(string) and not final:
+            # numbers might continue in the next chunk, in which case the
+            # statement will be read again
+            return value, end
+
+        text = string[idx:end]
+        entry = memo.get(text)
+        if entry is not None:
+            self._memo_hits += 1
+            self._memo_saved += entry[1]
+            return entry[0], end
+
+        self._memo_misses += 1
+        frozen = _freeze_json(value)
+        memo[text] = (frozen, _deep_sizeof(value))
+        return frozen, end
+
+    def _parse_statements(self, string, end, final, events, idx=0):
+        cls = JSONConfigParser
+        decode = cls._json_decoder.raw_decode
+        # the c scanner behind `raw_decode', called directly to save a python
+        # level function call per value
+        scan = cls._json_decoder.scan_once
+        literals = cls._literals
+        option_kinds = cls._option_kinds
+        newline = self._newline_re.search
+        lazy = self._lazy and final
+        collect = self._errors is not None
+        if collect:
+            match = cls._scalar_statement_re.match
+        else:
+            match = cls._statement_re.match
+        locations = self._locations
+        memo = self._memo
+        wanted = self._wanted
+        headers = self._headers
+        if self._timer is not None:
+            scan = self._timer.wrap(scan)
+            decode = self._timer.wrap(decode)
+
+        fpname = self._fpname
+        config = self._config
+        section = self._section
+        options = self._options
+
+        start = idx
+        try:
+            while idx < end:
+                if not final and not newline(string, idx):
+                    # wait for the rest of the line
+                    break
+
+                start = idx
+                mo = match(string, idx)
+                if mo is None:
+                    raise self._statement_error(string, idx, section)
+                kind = mo.lastgroup
+
+                if kind in option_kinds:
+                    if section is None:
+                        raise MissingSectionHeaderError(
+                            self._source(string), idx, filename=fpname
+                        )
+
+                    option = mo.group('key')
+                    if option in options:
+                        raise DuplicateOptionError(
+                            option, self._source(string), idx,
+                            filename=fpname, section=section
+                        )
+
+                    idx = mo.end()
+
+                    # read value
+                    if kind != 'key':
+                        # scalar fast path
+                        value = string[mo.start(kind):idx]
+                        if kind == 'string':
+                            value = value[1:-1]
+                        elif kind == 'int':
+                            value = int(value)
+                        elif kind == 'float':
+                            value = float(value)
+                        else:
+                            value = literals[value]
+                    elif collect:
+                        value, idx = self._decode_bounded(
+                            string, start, idx, section
+                        )
+                    else:
+                        try:
+                            # only containers are scanned
+                            value_end = (
+                                _scan_value(string, idx)
+                                if lazy and idx < end and
+                                string[idx] in _CLOSING else None
+                            )
+                            if memo is not None:
+                                value, idx = self._interned(
+                                    string, idx, final, scan, decode
+                                )
+                            elif value_end is not None:
+                                value = _LazyValue(
+                                    string, idx, value_end, fpname, section,
+                                    self._newlines
+                                )
+                                idx = value_end
+                            else:
+                                try:
+                                    value, idx = scan(string, idx)
+                                except StopIteration:
+                                    # let `raw_decode' build the error
+                                    value, idx = decode(string, idx)
+                        except ValueError as e:
+                            if not final:
+                                # the value may not have been completely read
+                                # yet.  Wait for the buffer to double in size
+                                # before trying again to avoid quadratic
+                                # behaviour.
+                                self._retry = end - start
+                                return start
+                            raise JSONError(
+                                e, string, idx,
+                                filename=fpname, section=section
+                            )
+
+                    if idx == end and not final:
+                        # numbers and literals might continue in the next
+                        # chunk
+                        return start
+
+                    # the value must be followed by the end of the line.  Any
+                    # further blank lines are consumed as separate statements
+                    c = string[idx:idx + 1]
+                    if c == '\n' or c == '\r':
+                        idx += 1
+                    elif c:
+                        raise ParseError(
+                            "Unexpected symbol or whitespace",
+                            self._source(string), idx, filename=fpname
+                        )
+
+                    if events is None:
+                        options[option] = value
+                    else:
+                        options[option] = None
+                        events.append((section, option, value))
+                    if locations is not None:
+                        locations[section, option] = self._consumed + start
+                    if option[0] == '-':
+                        # names are validated once parsing has finished
+                        # unless errors are being collected
+                        if collect:
+                            self._errors.append(InvalidOptionNameError(
+                                option, self._source(string), start,
+                                filename=fpname, section=section
+                            ))
+                        else:
+                            self._invalid_names = True
+
+                elif kind == 'section':
+                    section = mo.group('section')
+
+                    # check that section has not occured in this file before
+                    if section in self._sections:
+                        # when collecting errors, discard the options that
+                        # follow rather than reporting them as duplicates
+                        options = {}
+                        raise DuplicateSectionError(
+                            section, self._source(string), idx,
+                            filename=fpname
+                        )
+                    self._sections.add(section)
+                    self._offsets.append(self._consumed + idx)
+                    if section[0] == '-':
+                        if collect:
+                            self._errors.append(InvalidSectionNameError(
+                                section, self._source(string), idx,
+                                filename=fpname
+                            ))
+                        else:
+                            self._invalid_names = True
+
+                    options = {}
+                    idx = mo.end()
+                    if wanted is not None and section not in wanted:
+                        # jump straight to the next line that looks like a
+                        # header without reading any of the options between
+                        i = bisect.bisect_left(headers, idx)
+                        idx = headers[i] if i < len(headers) else end
+                    elif events is None:
+                        config[section] = options
+                    else:
+                        events.append((section, None, None))
+
+                else:
+                    # blank lines and comments
+                    idx = mo.end()
+        finally:
+            self._section = section
+            self._options = options
+            self._statement = start
+
+        return idx
+
+
+def iterparse(fp, fpname=None, chunk_size=64 * 1024):
+    """Incrementally parse a file object, yielding `(section, option, value)'
+    events as described in `FeedParser'.
+    """
+    parser = FeedParser(fpname)
+    while True:
+        data = fp.read(chunk_size)
+        if not data:
+            break
+        for event in parser.feed(data):
+            yield event
+    for event in parser.close():
+        yield event
+
+
+def check_string(string, fpname=None):
+    """Parse `string' without keeping the result and return a list of every
+    `ParseError' found in it.
+
+    After an error, parsing resumes at the next line that looks like the start
+    of a statement, so a single bad line is reported once rather than
+    preventing the rest of the input from being checked.
+
+    Errors are listed in the order they occur in.  `read_string' only checks
+    section and option names once the rest of the input has been parsed, so
+    it raises the first error that isn't an `InvalidSectionNameError' or
+    `InvalidOptionNameError' if there is one.
+    """
+    parser = FeedParser(fpname)
+    parser._config = {}
+    parser._errors = []
+    parser.close(string)
+    return parser._errors
+
+
+def check_file(fp, fpname=None):
+    """Like `check_string' but reads the text to check from a file object."""
+    return check_string(fp.read(), fpname)
@@ -0,0 +1,95 @@
+"""Reading config files from asyncio code without blocking the event loop.
+
+Requires Python 3.5.  The functions here are also available as the `aread'
+and `aread_stream' methods of `JSONConfigParser'.
+"""
+import asyncio
+import codecs
+
+from jsonconfigparser import _read_config
+
+__all__ = ['aread', 'aread_stream']
+
+
+async def aread(parser, filenames, encoding=None, *, skip=False, cache=None,
+                executor=None):
+    """Read and parse a filename or a list of filenames into `parser'.
+
+    Each file is read and parsed on `executor', or on the event loop's default
+    executor if it is None, and all of the files are loaded concurrently.
+    The results are merged into `parser' in the order the files were given,
+    exactly as `JSONConfigParser.read' would merge them.  Pass a process pool
+    to parse large files on several cores.
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    filenames = list(filenames)
+
+    parse, cache = parser._file_parser(cache, executor)
+
+    loop = _get_running_loop()
+    futures = [
+        loop.run_in_executor(
+            executor, _read_config, parse, f, encoding, cache,
+        )
+        for f in filenames
+    ]
+
+    try:
+        for f, future in zip(filenames, futures):
+            try:
+                config, hit = await future
+            except OSError:
+                # if file could not be found, skip it
+                if skip:
+                    continue
+                else:
+                    raise
+            if cache is not None:
+                cache._record(f, hit)
+            parser._update(config)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _get_running_loop():
+    # `get_running_loop' is new in Python 3.7; before that `get_event_loop'
+    # returns the running loop when called from a coroutine.
+    try:
+        get_running_loop = asyncio.get_running_loop
+    except AttributeError:
+        return asyncio.get_event_loop()
+    return get_running_loop()
+
+
+async def aread_stream(parser, reader, fpname=None, *, encoding='utf-8',
+                       chunk_size=64 * 1024):
+    """Read and parse the bytes from an `asyncio.StreamReader' until it
+    reaches the end of the stream.
+
+    Text is parsed incrementally as it arrives, in chunks of at most
+    `chunk_size' bytes, so the event loop is never blocked for long.
+    Nothing is added to `parser' unless the whole stream was parsed.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    if parser._lazy or parser._locations is not None:
+        chunks = []
+        while True:
+            data = await reader.read(chunk_size)
+            if not data:
+                break
+            chunks.append(decoder.decode(data))
+        chunks.append(decoder.decode(b'', final=True))
+        parser.read_string(''.join(chunks), fpname=fpname)
+        return
+
+    feed = parser._feed_parser(fpname)
+    while True:
+        data = await reader.read(chunk_size)
+        if not data:
+            break
+        feed.feed(decoder.decode(data))
+    feed.close(decoder.decode(b'', final=True))
+    parser._update(parser._result(feed, None))
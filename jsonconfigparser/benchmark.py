@@ -0,0 +1,792 @@
+"""Benchmarks for parsing, lookups and error handling.
+
+Run with::
+
+    python -m jsonconfigparser.benchmark [--quick] [--json] [-k NAME]
+
+Benchmarks only use the standard library and synthetic configs generated by
+`generate_config' so they can be run offline.  With `--json' the results are
+written as a single json document that can be compared between versions.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from jsonconfigparser import JSONConfigParser, ParseError, JSONError
+from jsonconfigparser import check_string
+from jsonconfigparser.overlay import Overlay
+from jsonconfigparser.cow import VersionedConfig
+
+__all__ = ['generate_config', 'benchmark', 'run', 'main']
+
+
+_WORDS = [
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf',
+    'hotel', 'india', 'juliett', 'kilo', 'lima', 'mike', 'november',
+]
+
+
+def _generate_value(rng, size, nesting):
+    if nesting > 0:
+        if rng.random() < 0.5:
+            return [
+                _generate_value(rng, size, nesting - 1) for _ in range(size)
+            ]
+        return {
+            '%s%i' % (rng.choice(_WORDS), i):
+                _generate_value(rng, size, nesting - 1)
+            for i in range(size)
+        }
+
+    kind = rng.randrange(5)
+    if kind == 0:
+        return rng.randrange(-10000, 10000)
+    if kind == 1:
+        return round(rng.uniform(-1000, 1000), 3)
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind == 3:
+        return ' '.join(rng.choice(_WORDS) for _ in range(size))
+    return '%s-%i' % (rng.choice(_WORDS), rng.randrange(1000))
+
+
+def generate_config(sections=100, options=10, value_size=4, nesting=1,
+                    comment_density=0.1, defaults=5, seed=0):
+    """Generate the text of a synthetic config file.
+
+    `value_size' is the number of items in each list, dictionary or string and
+    `nesting' the depth to which containers are nested.  `comment_density'
+    is the probability of a comment preceding each option.  `defaults'
+    options, named `default0' upwards, are added to the default section.
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    def add_options(prefix, count):
+        for i in range(count):
+            if rng.random() < comment_density:
+                lines.append('# %s' % ' '.join(rng.sample(_WORDS, 5)))
+            depth = rng.randrange(nesting + 1)
+            value = _generate_value(rng, value_size, depth)
+            # spread roughly half of all containers over several lines
+            indent = 4 if rng.random() < 0.5 else None
+            lines.append('%s%i = %s' % (
+                prefix, i, json.dumps(value, indent=indent),
+            ))
+
+    if defaults:
+        lines.append('[DEFAULT]')
+        add_options('default', defaults)
+        lines.append('')
+
+    for i in range(sections):
+        lines.append('[section%i]' % i)
+        add_options('option', options)
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def _time(fn, number, repeat=5):
+    """Returns the best time per call of `fn' over `repeat' runs of `number'
+    calls each.
+    """
+    best = float('inf')
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best / number
+
+
+def _memory(fn):
+    """Returns the number of bytes still allocated by the result of `fn'."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def _peak_memory(fn):
+    """Returns the largest number of bytes allocated at once by `fn',
+    excluding memory that is still allocated when it returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - after
+
+
+_BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register a benchmark function.
+
+    The function is passed a boolean indicating whether a quick run was
+    requested and should return a list of result dictionaries.  Each result
+    should have a `params' dictionary and one or more measurements.
+    """
+    def decorator(fn):
+        _BENCHMARKS.append((name, fn))
+        return fn
+    return decorator
+
+
+_PARSE_CASES = [
+    dict(sections=200, options=20, value_size=4, nesting=0),
+    dict(sections=200, options=20, value_size=8, nesting=2),
+    dict(sections=2000, options=5, value_size=2, nesting=1,
+         comment_density=0.5),
+    # scalars only
+    dict(sections=2000, options=20, value_size=1, nesting=0,
+         comment_density=0),
+]
+
+
+@benchmark('parse')
+def bench_parse(quick):
+    results = []
+    for params in _PARSE_CASES:
+        if quick:
+            params = dict(params, sections=params['sections'] // 20)
+        string = generate_config(**params)
+        for lazy in (False, True):
+            seconds = _time(
+                lambda: JSONConfigParser(lazy=lazy).read_string(string),
+                number=1, repeat=2 if quick else 5,
+            )
+            results.append({
+                'params': dict(params, lazy=lazy),
+                'bytes': len(string),
+                'seconds': seconds,
+                'bytes_per_second': len(string) / seconds,
+            })
+    return results
+
+
+@benchmark('read_dict')
+def bench_read_dict(quick):
+    params = dict(sections=20 if quick else 500, options=20)
+    cf = JSONConfigParser()
+    cf.read_string(generate_config(**params))
+    config = {
+        section: dict(cf._sections[section].maps[0])
+        for section in cf.sections()
+    }
+    seconds = _time(
+        lambda: JSONConfigParser().read_dict(config),
+        number=1, repeat=2 if quick else 5,
+    )
+    return [{'params': params, 'seconds': seconds}]
+
+
+@benchmark('lookup')
+def bench_lookup(quick):
+    params = dict(sections=100, options=20, defaults=5)
+    cf = JSONConfigParser()
+    cf.read_string(generate_config(**params))
+    cached = JSONConfigParser(get_cache_size=128)
+    cached.read_string(generate_config(**params))
+    frozen = cf.freeze()
+    proxy = cf['section50']
+    number = 1000 if quick else 100000
+    variables = {'unrelated': 1}
+
+    lookups = {
+        'get': lambda: cf.get('section50', 'option10'),
+        'get_default': lambda: cf.get('section50', 'default3'),
+        'get_vars': lambda: cf.get('section50', 'option10', vars=variables),
+        'get_fallback': lambda: cf.get('section50', 'unset', None),
+        'get_cached': lambda: cached.get('section50', 'option10'),
+        'get_cached_default': lambda: cached.get('section50', 'default3'),
+        'proxy': lambda: proxy['option10'],
+        'frozen': lambda: frozen.get('section50', 'option10'),
+    }
+    results = []
+    for kind, fn in sorted(lookups.items()):
+        results.append({
+            'params': dict(params, lookup=kind),
+            'seconds': _time(fn, number=number, repeat=3 if quick else 5),
+        })
+    return results
+
+
+@benchmark('export')
+def bench_export(quick):
+    """Time to copy every option out of a parser through the mapping
+    protocol and through the bulk APIs.
+    """
+    params = dict(sections=100 if quick else 1000, options=100, defaults=5)
+    string = generate_config(**params)
+    methods = {
+        'proxies': lambda cf: {
+            name: dict(section) for name, section in cf.items()
+        },
+        'to_dict': lambda cf: cf.to_dict(),
+        'to_dict_merged': lambda cf: cf.to_dict(merge_defaults=True),
+        'items': lambda cf: [cf.items(name) for name in cf],
+        'iteroptions': lambda cf: list(cf.iteroptions()),
+    }
+    results = []
+    for compact in (False, True):
+        cf = JSONConfigParser(compact=compact)
+        cf.read_string(string)
+        for method, fn in sorted(methods.items()):
+            seconds = _time(
+                lambda: fn(cf), number=1, repeat=3 if quick else 10
+            )
+            results.append({
+                'params': dict(params, compact=compact, method=method),
+                'seconds': seconds,
+                'options_per_second': (
+                    params['sections'] * params['options'] / seconds
+                ),
+            })
+    return results
+
+
+@benchmark('diff')
+def bench_diff(quick):
+    """Time to diff two parsers with 100,000 options between them, as a
+    deploy would against a running parser whose digests are already known.
+    """
+    from jsonconfigparser.diff import diff, apply_patch
+
+    params = dict(sections=100 if quick else 1000, options=100, defaults=5)
+    string = generate_config(**params)
+
+    def edit(cf):
+        cf.set('section1', 'option1', 'changed')
+        cf.remove_option('section2', 'option2')
+        cf.set('DEFAULT', 'default1', 'changed')
+
+    cases = {
+        'identical': lambda cf: None,
+        'options': edit,
+    }
+    running = JSONConfigParser()
+    running.read_string(string)
+    results = []
+    for case, fn in sorted(cases.items()):
+        deployed = JSONConfigParser()
+        deployed.read_string(string)
+        fn(deployed)
+
+        def cold():
+            running._digests.clear()
+            deployed._digests.clear()
+            return diff(running, deployed)
+
+        def warm():
+            deployed._digests.clear()
+            return diff(running, deployed)
+
+        for method, run in (('none', cold), ('running', warm)):
+            results.append({
+                'params': dict(params, case=case, digests=method),
+                'changes': len(run()),
+                'seconds': _time(run, number=1, repeat=3 if quick else 10),
+            })
+
+        patched = JSONConfigParser()
+        patched.read_string(string)
+        changes = diff(patched, deployed, inherited=True)
+        # both parsers' digests are known, as when neither has changed since
+        # they were last compared
+        results.append({
+            'params': dict(params, case=case, digests='both'),
+            'changes': len(changes),
+            'seconds': _time(
+                lambda: diff(patched, deployed, inherited=True),
+                number=1, repeat=3 if quick else 10,
+            ),
+            'apply_seconds': _time(
+                lambda: apply_patch(patched, changes, check=False),
+                number=1, repeat=1,
+            ),
+        })
+    return results
+
+
+@benchmark('overlay')
+def bench_overlay(quick):
+    params = dict(sections=20 if quick else 500, options=20, layers=4)
+    layers = []
+    for i in range(params['layers'] - 1):
+        cf = JSONConfigParser()
+        cf.read_string(generate_config(
+            sections=params['sections'], options=params['options'], seed=i,
+        ))
+        layers.append(('layer%i' % i, cf))
+    overrides = JSONConfigParser()
+    overrides.read_string(generate_config(sections=5, options=2, defaults=0))
+    layers.append(('overrides', overrides))
+
+    overlay = Overlay(layers)
+    section = 'section%i' % (params['sections'] // 2)
+    operations = {
+        'build': (lambda: Overlay(layers), 1),
+        'replace_top': (lambda: overlay.replace_layer('overrides'), 10),
+        'get': (lambda: overlay.get(section, 'option10'), 100000),
+    }
+    results = []
+    for kind, (fn, number) in sorted(operations.items()):
+        if quick:
+            number = max(1, number // 100)
+        results.append({
+            'params': dict(params, operation=kind),
+            'seconds': _time(fn, number=number, repeat=3 if quick else 5),
+        })
+    return results
+
+
+@benchmark('query')
+def bench_query(quick):
+    params = dict(sections=20 if quick else 500)
+    cf = JSONConfigParser()
+    cf.read_string(''.join(
+        '[section%i]\n'
+        'port = %i\n'
+        'routes = {"eu": [%s]}\n' % (i, i, ', '.join(
+            '{"host": "host%i"}' % j for j in range(5)
+        ))
+        for i in range(params['sections'])
+    ))
+    number = 1000 if quick else 100000
+    queries = {
+        'walk': (
+            lambda: cf['section10']['routes']['eu'][3]['host'], number,
+        ),
+        'query': (lambda: cf.query('section10', 'routes.eu[3].host'), number),
+        'query_wildcard': (
+            lambda: cf.query('section10', 'routes.eu[*].host'), number,
+        ),
+        'walk_all': (lambda: {
+            section: cf.get(section, 'port') for section in cf.sections()
+        }, number // 1000),
+        'query_all': (lambda: cf.query_all('port'), number // 1000),
+    }
+    results = []
+    for kind, (fn, count) in sorted(queries.items()):
+        results.append({
+            'params': dict(params, query=kind),
+            'seconds': _time(fn, number=count, repeat=3 if quick else 5),
+        })
+    return results
+
+
+class _LockedConfig(object):
+    """The baseline for `bench_concurrent': a parser behind a single lock."""
+
+    def __init__(self, parser):
+        self._parser = parser
+        self._lock = threading.Lock()
+
+    def get(self, section, option):
+        with self._lock:
+            return self._parser.get(section, option)
+
+    def set(self, section, option, value):
+        with self._lock:
+            self._parser.set(section, option, value)
+
+
+@benchmark('concurrent')
+def bench_concurrent(quick):
+    """Lookups per second from several reader threads while another thread
+    keeps writing.
+    """
+    params = dict(sections=100, options=20, readers=8)
+    string = generate_config(sections=params['sections'],
+                             options=params['options'])
+    duration = 0.1 if quick else 1.0
+
+    def locked():
+        cf = JSONConfigParser()
+        cf.read_string(string)
+        return _LockedConfig(cf)
+
+    def versioned():
+        cf = JSONConfigParser()
+        cf.read_string(string)
+        return VersionedConfig(cf)
+
+    results = []
+    for kind, factory in (('locked', locked), ('versioned', versioned)):
+        config = factory()
+        done = threading.Event()
+        counts = [0] * params['readers']
+        writes = [0]
+
+        def read(i):
+            get = config.get
+            count = 0
+            while not done.is_set():
+                for _ in range(100):
+                    get('section50', 'option10')
+                count += 100
+            counts[i] = count
+
+        def write():
+            while not done.is_set():
+                config.set('section%i' % (writes[0] % 100), 'option0',
+                           writes[0])
+                writes[0] += 1
+                time.sleep(0.001)
+
+        threads = [
+            threading.Thread(target=read, args=(i,))
+            for i in range(params['readers'])
+        ] + [threading.Thread(target=write)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        done.set()
+        for thread in threads:
+            thread.join()
+
+        results.append({
+            'params': dict(params, config=kind),
+            'lookups_per_second': sum(counts) / duration,
+            'writes_per_second': writes[0] / duration,
+        })
+    return results
+
+
+@benchmark('memory')
+def bench_memory(quick):
+    results = []
+    for params in _PARSE_CASES:
+        if quick:
+            params = dict(params, sections=params['sections'] // 20)
+        string = generate_config(**params)
+        for lazy in (False, True):
+            def load():
+                cf = JSONConfigParser(lazy=lazy)
+                cf.read_string(string)
+                return cf
+            # lazily parsed values keep the source text alive, which is not
+            # included in the allocated bytes
+            results.append({
+                'params': dict(params, lazy=lazy),
+                'source_bytes': len(string),
+                'allocated_bytes': _memory(load),
+            })
+    return results
+
+
+@benchmark('section_memory')
+def bench_section_memory(quick):
+    """Bytes allocated per section for many small sections with the same
+    option names, such as one section per tenant.
+    """
+    params = dict(
+        sections=200 if quick else 10000, options=10, value_size=1,
+        nesting=0, comment_density=0, defaults=5,
+    )
+    string = generate_config(**params)
+    results = []
+    for compact in (False, True):
+        def load():
+            cf = JSONConfigParser(compact=compact)
+            cf.read_string(string)
+            return cf
+        allocated = _memory(load)
+        results.append({
+            'params': dict(params, compact=compact),
+            'allocated_bytes': allocated,
+            'bytes_per_section': allocated // params['sections'],
+        })
+    return results
+
+
+@benchmark('intern')
+def bench_intern(quick):
+    """Bytes allocated and time taken to read a config in which every
+    section repeats the same large values, as per-tenant configs often do.
+    """
+    params = dict(sections=100 if quick else 5000, origins=50, features=50)
+    words = ['%s%i' % (_WORDS[i % len(_WORDS)], i) for i in range(50)]
+    origins = json.dumps([
+        'https://%s.example.com' % word for word in words[:params['origins']]
+    ])
+    features = json.dumps({
+        word: i % 2 == 0 for i, word in enumerate(words[:params['features']])
+    })
+    string = ''.join(
+        '[tenant%i]\n'
+        'origins = %s\n'
+        'features = %s\n'
+        'limit = %i\n' % (i, origins, features, i)
+        for i in range(params['sections'])
+    )
+    results = []
+    for intern_values in (False, True):
+        def load():
+            cf = JSONConfigParser(intern_values=intern_values)
+            cf.read_string(string)
+            return cf
+        results.append({
+            'params': dict(params, intern_values=intern_values),
+            'allocated_bytes': _memory(load),
+            'saved_bytes': load().intern_info().saved_bytes,
+            'seconds': _time(load, number=1, repeat=3 if quick else 5),
+        })
+    return results
+
+
+@benchmark('read_bytes')
+def bench_read_bytes(quick):
+    """Time and peak memory, on top of the parsed result, of reading a file
+    through the text and bytes entry points.
+    """
+    params = dict(sections=100 if quick else 2000, options=20)
+    string = generate_config(**params)
+    methods = {
+        'read': lambda cf, filename: cf.read(filename, encoding='utf-8'),
+        'read_mmap': lambda cf, filename: cf.read_mmap(filename),
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'bench.cfg')
+        with open(filename, 'w', encoding='utf-8') as fp:
+            fp.write(string)
+
+        for method, fn in sorted(methods.items()):
+            def load():
+                cf = JSONConfigParser()
+                fn(cf, filename)
+                return cf
+            results.append({
+                'params': dict(params, method=method),
+                'bytes': len(string),
+                'seconds': _time(load, number=1, repeat=2 if quick else 5),
+                'peak_bytes': _peak_memory(load),
+            })
+    return results
+
+
+@benchmark('select')
+def bench_select(quick):
+    """Time to read a few sections of a file with many, in full, skipping the
+    others and through a sidecar index.
+    """
+    params = dict(sections=200 if quick else 5000, options=20)
+    string = generate_config(**params)
+    wanted = ['section1', 'section%i' % (params['sections'] // 2)]
+    methods = {
+        'full': {},
+        'sections': dict(sections=wanted),
+        'index': dict(sections=wanted, index=True),
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'bench.cfg')
+        with open(filename, 'w', encoding='utf-8') as fp:
+            fp.write(string)
+
+        for method, kwargs in sorted(methods.items()):
+            def load():
+                JSONConfigParser().read(filename, 'utf-8', **kwargs)
+            # builds the index before it is timed
+            load()
+            results.append({
+                'params': dict(params, method=method),
+                'bytes': len(string),
+                'seconds': _time(load, number=1, repeat=3 if quick else 10),
+            })
+    return results
+
+
+class _NullWriter(object):
+    def write(self, data):
+        pass
+
+
+_WRITE_FORMATS = [
+    dict(indent=None, compact=False),
+    dict(indent=None, compact=True),
+    dict(indent=4, compact=False),
+]
+
+
+@benchmark('write')
+def bench_write(quick):
+    params = dict(sections=50 if quick else 1000, options=40)
+    string = generate_config(**params)
+    results = []
+    for lazy in (False, True):
+        cf = JSONConfigParser(lazy=lazy)
+        cf.read_string(string)
+        for fmt in _WRITE_FORMATS:
+            output = cf.dumps(**fmt)
+            seconds = _time(
+                lambda: cf.write(_NullWriter(), **fmt),
+                number=1, repeat=2 if quick else 5,
+            )
+            results.append({
+                'params': dict(params, lazy=lazy, **fmt),
+                'bytes': len(output),
+                'seconds': seconds,
+                'bytes_per_second': len(output) / seconds,
+            })
+    return results
+
+
+@benchmark('errors')
+def bench_errors(quick):
+    params = dict(sections=20 if quick else 500, options=20)
+    string = generate_config(**params)
+    index = len(string) - 1
+    decoder = json.JSONDecoder()
+    try:
+        decoder.decode(string[:-1] + '{')
+    except ValueError as e:
+        json_error = e
+    number = 10 if quick else 200
+
+    results = []
+    results.append({
+        'params': dict(params, error='ParseError'),
+        'seconds': _time(
+            lambda: ParseError('message', string, index), number=number,
+        ),
+    })
+    results.append({
+        'params': dict(params, error='JSONError'),
+        'seconds': _time(
+            lambda: JSONError(json_error, string, index), number=number,
+        ),
+    })
+
+    bad = string + '\n[broken\n'
+    results.append({
+        'params': dict(params, error='read_string'),
+        'seconds': _time(
+            lambda: _expect_error(bad), number=1, repeat=2 if quick else 5,
+        ),
+    })
+
+    # one broken option in every section
+    broken = string.replace('option3 = ', 'option3 = }')
+    results.append({
+        'params': dict(params, error='check_string'),
+        'errors': len(check_string(broken)),
+        'seconds': _time(
+            lambda: check_string(broken), number=1, repeat=2 if quick else 5,
+        ),
+    })
+    return results
+
+
+def _expect_error(string):
+    try:
+        JSONConfigParser().read_string(string)
+    except ParseError:
+        return
+    raise AssertionError("expected a parse error")
+
+
+def run(names=None, quick=False):
+    """Run the registered benchmarks, or just those listed in `names', and
+    return the results as a json serialisable dictionary.
+    """
+    results = {}
+    for name, fn in _BENCHMARKS:
+        if names and name not in names:
+            continue
+        results[name] = fn(quick)
+    return {
+        'python': platform.python_implementation(),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'results': results,
+    }
+
+
+def _format_params(params):
+    return ', '.join('%s=%s' % item for item in sorted(params.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m jsonconfigparser.benchmark',
+        description=__doc__.splitlines()[0],
+    )
+    parser.add_argument(
+        '-k', dest='names', action='append',
+        choices=[name for name, _ in _BENCHMARKS],
+        help="only run the named benchmark, can be repeated",
+    )
+    parser.add_argument(
+        '--quick', action='store_true',
+        help="use small inputs and few repetitions",
+    )
+    parser.add_argument(
+        '--json', action='store_true', help="write results as json",
+    )
+    parser.add_argument(
+        '-o', '--output', type=argparse.FileType('w'), default=sys.stdout,
+        help="file to write results to",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.names, quick=args.quick)
+    if args.output is not sys.stdout:
+        with args.output:
+            _write_report(report, args.output, args.json)
+    else:
+        _write_report(report, args.output, args.json)
+
+
+def _write_report(report, output, as_json):
+    if as_json:
+        json.dump(report, output, indent=2, sort_keys=True)
+        output.write('\n')
+        return
+
+    for name, results in report['results'].items():
+        output.write('%s\n' % name)
+        for result in results:
+            measurements = ', '.join(
+                '%s=%.6g' % (key, value)
+                for key, value in sorted(result.items())
+                if key != 'params'
+            )
+            output.write('  %s: %s\n' % (
+                _format_params(result['params']), measurements,
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""On-disk cache of parsed config files.
+
+Each file read through a `ConfigCache' is stored as a compact binary
+artifact containing the parsed sections.  An artifact is only used if the
+path, size, modification time and content hash of the file all still match,
+otherwise the file is parsed again and the artifact replaced.
+"""
+import hashlib
+import io
+import marshal
+import os
+import sys
+import tempfile
+
+__all__ = ['ConfigCache']
+
+_FORMAT = ('jsonconfigparser-cache', 1, marshal.version, sys.hexversion)
+_SUFFIX = '.jcpc'
+
+
+class ConfigCache(object):
+    """A size bounded directory of parsed config artifacts.
+
+    `max_size' is the maximum total size of the artifacts in bytes.  When it
+    is exceeded the least recently used artifacts are evicted.
+    """
+
+    def __init__(self, directory, *, max_size=64 * 1024 * 1024):
+        self._directory = directory
+        self._max_size = max_size
+        self._results = {}
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    def was_hit(self, filename):
+        """Returns True if the most recent load of `filename' was served from
+        the cache and False if it had to be parsed.
+
+        Raises KeyError if `filename' has not been loaded through this cache.
+        """
+        return self._results[os.path.abspath(filename)]
+
+    def load(self, filename, parse, encoding=None):
+        """Return the parsed config for `filename'.
+
+        `parse' is called with the decoded contents of the file and its name
+        if there is no valid artifact for the file.  It should return a
+        dictionary mapping section names to dictionaries of options.
+        """
+        config, hit = self._load(filename, parse, encoding)
+        self._record(filename, hit)
+        return config
+
+    def _record(self, filename, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._results[os.path.abspath(filename)] = hit
+
+    def _load(self, filename, parse, encoding):
+        # does not touch any of the cache's own state so that it is safe to
+        # call from other threads or processes.
+        path = os.path.abspath(filename)
+
+        with open(filename, 'rb') as fp:
+            stat = os.fstat(fp.fileno())
+            data = fp.read()
+        digest = hashlib.sha1(data).digest()
+        key = (path, stat.st_size, stat.st_mtime_ns, digest)
+
+        artifact = self._artifact_path(path)
+        config = self._load_artifact(artifact, key)
+        if config is not None:
+            return config, True
+
+        # decode the same way that reading a file in text mode would so that
+        # line endings are translated identically
+        string = io.TextIOWrapper(io.BytesIO(data), encoding=encoding).read()
+        config = parse(string, fpname=filename)
+
+        self._store_artifact(artifact, key, config)
+        return config, False
+
+    def clear(self):
+        """Remove all artifacts from the cache directory."""
+        for name, _, _ in self._artifacts():
+            self._remove(name)
+
+    def _artifact_path(self, path):
+        name = hashlib.sha1(path.encode('utf-8', 'surrogateescape'))
+        return os.path.join(self._directory, name.hexdigest() + _SUFFIX)
+
+    def _load_artifact(self, artifact, key):
+        try:
+            with open(artifact, 'rb') as fp:
+                fmt, artifact_key, config = marshal.load(fp)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if fmt != _FORMAT or artifact_key != key:
+            return None
+
+        # mark the artifact as recently used
+        try:
+            os.utime(artifact)
+        except OSError:
+            pass
+
+        return config
+
+    def _store_artifact(self, artifact, key, config):
+        try:
+            payload = marshal.dumps((_FORMAT, key, config))
+        except ValueError:
+            # config contains values that can't be serialised
+            return
+
+        if len(payload) > self._max_size:
+            return
+
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self._directory)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(payload)
+            os.replace(tmp, artifact)
+        except OSError:
+            self._remove(tmp)
+            return
+
+        self._evict()
+
+    def _artifacts(self):
+        for name in os.listdir(self._directory):
+            if not name.endswith(_SUFFIX):
+                continue
+            name = os.path.join(self._directory, name)
+            try:
+                stat = os.stat(name)
+            except OSError:
+                continue
+            yield name, stat.st_size, stat.st_mtime_ns
+
+    def _evict(self):
+        artifacts = sorted(self._artifacts(), key=lambda a: a[2])
+        total = sum(size for _, size, _ in artifacts)
+        for name, size, _ in artifacts:
+            if total <= self._max_size:
+                break
+            self._remove(name)
+            total -= size
+
+    def _remove(self, name):
+        try:
+            os.remove(name)
+        except OSError:
+            pass
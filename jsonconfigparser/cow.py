@@ -0,0 +1,218 @@
+"""A copy-on-write config for many reader threads and occasional writers.
+
+A `VersionedConfig' wraps a `JSONConfigParser' that only it modifies.
+Readers look up options in, or take, the current `Snapshot', an immutable
+`FrozenConfig', without taking any locks::
+
+    config = VersionedConfig(parser)
+
+    # request threads
+    config.get('section', 'option')
+    snapshot = config.snapshot()    # a consistent view for several lookups
+
+    # admin thread
+    config.set('section', 'option', 1)
+    config.read_dict({'section': {'a': 1, 'b': 2}})
+
+Every write builds a new snapshot and publishes it by replacing a single
+attribute, so readers see either all of a write or none of it.  Sections
+that a write does not touch are shared between versions.  Old snapshots are
+freed as soon as the last reader holding one lets go of it.
+"""
+import itertools
+import threading
+
+from jsonconfigparser import JSONConfigParser, FrozenConfig, FrozenSection
+from jsonconfigparser import _UNSET, _decoded, _freeze_value, _read_config
+
+__all__ = ['VersionedConfig', 'Snapshot']
+
+
+class Snapshot(FrozenConfig):
+    """A `FrozenConfig' with the version number it was published as."""
+    __slots__ = ('version', '__weakref__')
+
+    def __repr__(self):
+        return '<Snapshot: version {}, {} sections>'.format(
+            self.version, len(self._sections) - 1
+        )
+
+
+def _frozen(value):
+    return _freeze_value(_decoded(value))
+
+
+class VersionedConfig(object):
+    """Copy-on-write wrapper around `parser', or around a new, empty
+    `JSONConfigParser' if it is not given.
+
+    `parser' should not be used directly once it has been wrapped.
+    """
+
+    def __init__(self, parser=None):
+        if parser is None:
+            parser = JSONConfigParser()
+        self._parser = parser
+        self._lock = threading.Lock()
+        current = Snapshot(parser)
+        current.version = 0
+        self._current = current
+
+    def __repr__(self):
+        return '<VersionedConfig: version {}>'.format(self._current.version)
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @property
+    def default_section(self):
+        return self._parser.default_section
+
+    def snapshot(self):
+        """Return the current `Snapshot'."""
+        return self._current
+
+    def get(self, section, option, fallback=_UNSET, *, vars=None):
+        """Get an option value from the current snapshot.  See
+        `JSONConfigParser.get'.
+        """
+        return self._current.get(section, option, fallback, vars=vars)
+
+    def has_section(self, section):
+        return self._current.has_section(section)
+
+    def has_option(self, section, option):
+        return self._current.has_option(section, option)
+
+    def sections(self):
+        return self._current.sections()
+
+    def options(self, section):
+        return self._current.options(section)
+
+    def set(self, section, option, value=None):
+        with self._lock:
+            self._parser.set(section, option, value)
+            if not section:
+                section = self._parser.default_section
+            self._publish({section: [option]})
+
+    def remove_option(self, section, option):
+        with self._lock:
+            existed = self._parser.remove_option(section, option)
+            if existed:
+                if not section:
+                    section = self._parser.default_section
+                self._publish({section: [option]})
+            return existed
+
+    def add_section(self, section):
+        with self._lock:
+            existed = self._parser.add_section(section)
+            if not existed:
+                self._publish({section: None})
+            return existed
+
+    def remove_section(self, section):
+        with self._lock:
+            existed = self._parser.remove_section(section)
+            if existed:
+                self._publish({section: None})
+            return existed
+
+    def read_dict(self, dictionary):
+        """Merge a dictionary of sections into a new version."""
+        self._parser._validate(dictionary)
+        with self._lock:
+            self._update([dictionary])
+
+    def read_string(self, string, fpname=None):
+        # parse before taking the lock so that writers only wait for each
+        # other while a new version is being built
+        config = self._parser._parse_string(string, fpname, lazy=False)
+        with self._lock:
+            self._update([config])
+
+    def read(self, filenames, encoding=None, *, skip=False):
+        """Read and parse a filename or a list of filenames, publishing all of
+        them together as a single new version.  See `JSONConfigParser.read'.
+        """
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        parse = self._parser._parse_string
+        configs = []
+        for filename in filenames:
+            try:
+                config, _ = _read_config(parse, filename, encoding, None)
+            except OSError:
+                if skip:
+                    continue
+                raise
+            configs.append(config)
+        with self._lock:
+            self._update(configs)
+
+    def _update(self, configs):
+        changes = {}
+        for config in configs:
+            self._parser._update(config)
+            for section, options in config.items():
+                if section not in changes:
+                    changes[section] = set()
+                changes[section].update(options)
+        self._publish(changes)
+
+    def _publish(self, changes):
+        """Build and publish the next snapshot.
+
+        `changes' maps the name of each section that was modified to the
+        names of the options that were set or removed in it, or to None if
+        the whole section was added or removed.  Must be called with the lock
+        held.
+        """
+        parser = self._parser
+        default = parser.default_section
+        current = self._current
+        sections = dict(current._sections)
+
+        inherited = changes.pop(default, None)
+        if inherited:
+            options = dict(sections[default]._options)
+            for option in inherited:
+                if option in parser._defaults:
+                    options[option] = _frozen(parser._defaults[option])
+                else:
+                    options.pop(option, None)
+            sections[default] = FrozenSection(default, options)
+            # every section inherits the options that were changed
+            names = itertools.chain(changes, parser._sections)
+        else:
+            inherited = ()
+            names = changes
+        defaults = sections[default]._options
+
+        for name in set(names):
+            if name not in parser._sections:
+                sections.pop(name, None)
+                continue
+            own = parser._sections[name].maps[0]
+            changed = changes.get(name, ())
+            if name not in sections or changed is None:
+                options = dict(defaults)
+                for option, value in own.items():
+                    options[option] = _frozen(value)
+            else:
+                options = dict(sections[name]._options)
+                for option in itertools.chain(changed, inherited):
+                    if option in own:
+                        options[option] = _frozen(own[option])
+                    elif option in defaults:
+                        options[option] = defaults[option]
+                    else:
+                        options.pop(option, None)
+            sections[name] = FrozenSection(name, options)
+
+        snapshot = Snapshot._from_sections(default, sections)
+        snapshot.version = current.version + 1
+        self._current = snapshot
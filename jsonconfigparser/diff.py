@@ -0,0 +1,234 @@
+"""Comparing parsers and applying the differences to a live parser.
+
+`diff' lists the options that differ between two parsers, and `apply_patch'
+makes the same changes to another parser in place::
+
+    changes = diff(running, deployed)
+    for change in changes:
+        log.info('%s %s.%s', change.kind, change.section, change.option)
+    apply_patch(running, changes)
+
+Values are compared by their json encoding, so `1' and `true' differ but a
+list and a tuple with the same items do not.  The options set in each section
+are summarized by a digest that the parser keeps until it is next modified.
+Sections whose digests match are skipped without comparing their values, so
+diffing a long running parser against each new version of a config only has
+to encode the new version.
+
+Digests are only dropped by the parser's own methods, so values returned by
+`get' must not be modified in place.  A list or dictionary that has been
+modified must be stored again with `set' before the parser is diffed.
+"""
+import copy
+import hashlib
+import json
+import marshal
+
+from collections import namedtuple
+
+from jsonconfigparser import _LazyValue
+
+__all__ = ['diff', 'apply_patch', 'Change', 'PatchError']
+
+
+Change = namedtuple('Change', [
+    'kind', 'section', 'option', 'old', 'new', 'inherited',
+])
+Change.__doc__ = """A single difference found by `diff'.
+
+`kind' is 'added', 'removed' or 'changed'.  `option' is None if a whole
+section was added or removed, in which case there is also a change for each
+of its options.  `old' is None for additions and `new' is None for removals.
+
+`inherited' is true if `section' itself is unchanged but the value it
+inherits for `option' from the default section is not.  Such changes are
+only listed if `diff' is asked for them and are skipped by `apply_patch'.
+"""
+
+
+class PatchError(ValueError):
+    """Raised by `apply_patch' if a parser is not in the state that a patch
+    was made from.
+    """
+
+
+_encode = json.JSONEncoder(
+    sort_keys=True, separators=(',', ':'), default=repr
+).encode
+
+
+def _own(parser, section):
+    """Returns a new dictionary of the options set in `section' itself."""
+    if section == parser.default_section:
+        return parser._export(section, parser._defaults)
+    return parser._export(section, parser._sections[section].maps[0])
+
+
+def _storage(parser, section):
+    if section == parser.default_section:
+        return parser._defaults
+    return parser._sections[section].maps[0]
+
+
+def _digest(parser, section):
+    digests = parser._digests
+    try:
+        return digests[section]
+    except KeyError:
+        pass
+    options = _own(parser, section)
+    try:
+        # much quicker than encoding as json and just as strict about types.
+        # Version 2 doesn't record which objects are shared, which would
+        # make the result depend on whether values were interned.
+        data = marshal.dumps(options, 2)
+    except ValueError:
+        # values that aren't built in types
+        data = _encode(options).encode('ascii')
+    digest = digests[section] = hashlib.sha1(data).digest()
+    return digest
+
+
+def _compare(section, old, new):
+    changes = []
+    for option, value in old.items():
+        if option not in new:
+            changes.append(Change(
+                'removed', section, option, value, None, False
+            ))
+            continue
+        other = new[option]
+        if value is not other and _encode(value) != _encode(other):
+            changes.append(Change(
+                'changed', section, option, value, other, False
+            ))
+    for option, value in new.items():
+        if option not in old:
+            changes.append(Change(
+                'added', section, option, None, value, False
+            ))
+    return changes
+
+
+def diff(a, b, *, inherited=False):
+    """Return a list of the `Change's that would turn parser `a' into parser
+    `b'.
+
+    Changes to the default section come first, followed by the sections of
+    `a' and then the sections that were added in `b'.  A removed section is
+    listed after the removal of its options and an added section before the
+    addition of its options.  If `inherited' is true, each section that is
+    affected by a change to the default section is listed with a copy of that
+    change.  Both parsers must use the same name for the default section.
+    """
+    if a is b:
+        return []
+
+    default = a.default_section
+    changes = []
+    default_changes = []
+    if _digest(a, default) != _digest(b, default):
+        default_changes = _compare(default, _own(a, default), _own(b, default))
+        changes.extend(default_changes)
+    if not inherited:
+        default_changes = []
+
+    for section in a._sections:
+        if section not in b._sections:
+            for option, value in _own(a, section).items():
+                changes.append(Change(
+                    'removed', section, option, value, None, False
+                ))
+            changes.append(Change('removed', section, None, None, None, False))
+            continue
+
+        if _digest(a, section) != _digest(b, section):
+            changes.extend(
+                _compare(section, _own(a, section), _own(b, section))
+            )
+        if default_changes:
+            old = _storage(a, section)
+            new = _storage(b, section)
+            for change in default_changes:
+                if change.option not in old and change.option not in new:
+                    changes.append(
+                        change._replace(section=section, inherited=True)
+                    )
+
+    for section in b._sections:
+        if section not in a._sections:
+            changes.append(Change('added', section, None, None, None, False))
+            for option, value in _own(b, section).items():
+                changes.append(Change(
+                    'added', section, option, None, value, False
+                ))
+
+    return changes
+
+
+def _check(parser, changes):
+    """Raises `PatchError' unless `changes' can be applied to `parser'."""
+    added = set()
+    for kind, section, option, old, _, _ in changes:
+        if option is None:
+            exists = parser.has_section(section) or section in added
+            if kind == 'added' and exists:
+                raise PatchError('Section %r already exists' % section)
+            if kind == 'removed' and not exists:
+                raise PatchError('Section %r does not exist' % section)
+            if kind == 'added':
+                added.add(section)
+            continue
+
+        if section in added:
+            continue
+        if section != parser.default_section and \
+                not parser.has_section(section):
+            raise PatchError('Section %r does not exist' % section)
+
+        options = _storage(parser, section)
+        if kind == 'added':
+            if option in options:
+                raise PatchError(
+                    'Option %r in section %r already exists' % (
+                        option, section
+                    )
+                )
+            continue
+        if option not in options:
+            raise PatchError(
+                'Option %r in section %r does not exist' % (option, section)
+            )
+        value = options[option]
+        if type(value) is _LazyValue:
+            value = parser._decode(section, option, value)
+        if _encode(value) != _encode(old):
+            raise PatchError(
+                'Option %r in section %r has changed' % (option, section)
+            )
+
+
+def apply_patch(parser, changes, *, check=True):
+    """Make the `changes' returned by `diff' to `parser' in place.
+
+    Inherited changes are skipped as they follow from the changes to the
+    default section.  If `check' is true, `PatchError' is raised and the
+    parser is left untouched unless every section and option that is changed
+    or removed has its old value and every one that is added does not yet
+    exist.  New values are copied so that they are not shared with the
+    parser that they came from.
+    """
+    changes = [change for change in changes if not change.inherited]
+    if check:
+        _check(parser, changes)
+
+    for kind, section, option, _, new, _ in changes:
+        if option is None:
+            if kind == 'added':
+                parser.add_section(section)
+            else:
+                parser.remove_section(section)
+        elif kind == 'removed':
+            parser.remove_option(section, option)
+        else:
+            parser.set(section, option, copy.deepcopy(new))
@@ -0,0 +1,156 @@
+"""Sidecar indexes of the sections in config files.
+
+When `JSONConfigParser.read' is given both `sections' and `index' it keeps an
+index next to each file that it reads, named after the file with `.jcpi'
+appended.  The index records the name, byte offset and line number of every
+line in the file that looks like a section header, along with the size of
+the file and a hash of its contents::
+
+    parser.read('services.cfg', sections=['billing'], index=True)
+
+While the hash still matches, later reads only decode and parse the bytes of
+the requested sections.  Otherwise the file is read in full and the index is
+written again.  Indexes are only kept for files encoded as UTF-8, ASCII or
+Latin-1 that don't contain any carriage returns, so that offsets in the
+decoded text map directly onto offsets in the file.  If an index can't be
+written, for example because the directory is read-only, the file is simply
+read without one.
+"""
+import codecs
+import hashlib
+import io
+import locale
+import marshal
+import os
+import tempfile
+
+from jsonconfigparser import ParseError, _find_headers
+
+__all__ = ['index_path']
+
+_FORMAT = ('jsonconfigparser-index', 1, marshal.version)
+_SUFFIX = '.jcpi'
+
+# encodings in which any run of complete lines can be decoded on its own
+_ENCODINGS = {'utf-8', 'ascii', 'iso8859-1'}
+
+
+def index_path(filename):
+    """Return the path of the sidecar index for `filename'."""
+    return filename + _SUFFIX
+
+
+def _indexable(encoding):
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    try:
+        return codecs.lookup(encoding).name in _ENCODINGS
+    except LookupError:
+        return False
+
+
+def _load(filename, parse, encoding, wanted):
+    """Parse `filename' with `parse', which should select only the sections
+    in `wanted', reading it through its index if the index is valid.  Returns
+    the parsed sections and False, matching `ConfigCache._load'.
+    """
+    with open(filename, 'rb') as fp:
+        data = fp.read()
+
+    headers = None
+    indexable = _indexable(encoding) and b'\r' not in data
+    if indexable:
+        key = (len(data), hashlib.sha1(data).digest())
+        path = index_path(filename)
+        headers = _load_index(path, key)
+        if headers is not None:
+            string = _splice(data, headers, wanted, encoding)
+            try:
+                return parse(string, fpname=filename), False
+            except ParseError:
+                # a line in a multi-line value may have been mistaken for a
+                # header.  Read the whole file to find out.
+                pass
+
+    # decode the same way that reading a file in text mode would so that
+    # line endings are translated identically
+    string = io.TextIOWrapper(io.BytesIO(data), encoding=encoding).read()
+    config = parse(string, fpname=filename)
+
+    if indexable and headers is None:
+        _store_index(path, key, _offsets(string, len(data), encoding))
+    return config, False
+
+
+def _offsets(string, size, encoding):
+    """Returns the name, byte offset and line number, counting from zero, of
+    every line in `string' that looks like a section header.  `size' is the
+    length of the encoded text.
+    """
+    headers = []
+    single = len(string) == size
+    offset = 0
+    lineno = 0
+    last = 0
+    for mo in _find_headers(string):
+        start = mo.start()
+        if single:
+            # every character is a single byte
+            offset = start
+        else:
+            offset += len(string[last:start].encode(encoding))
+        lineno += string.count('\n', last, start)
+        last = start
+        headers.append((mo.group('section'), offset, lineno))
+    return headers
+
+
+def _splice(data, headers, wanted, encoding):
+    """Returns the decoded text of the sections in `wanted' and of anything
+    before the first header.  Every other section is replaced by as many
+    empty lines as it spanned so that line numbers are unchanged.
+    """
+    # anything before the first header is always kept
+    spans = [(0, headers[0][1] if headers else len(data), 0)]
+    for i, (section, start, lineno) in enumerate(headers):
+        if section in wanted:
+            end = headers[i + 1][1] if i + 1 < len(headers) else len(data)
+            spans.append((start, end, lineno))
+
+    chunks = []
+    lines = 0
+    for start, end, lineno in spans:
+        chunks.append(b'\n' * (lineno - lines))
+        chunks.append(data[start:end])
+        lines = lineno + data.count(b'\n', start, end)
+    return b''.join(chunks).decode(encoding)
+
+
+def _load_index(path, key):
+    try:
+        with open(path, 'rb') as fp:
+            fmt, index_key, headers = marshal.loads(fp.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if fmt != _FORMAT or index_key != key:
+        return None
+    return headers
+
+
+def _store_index(path, key, headers):
+    payload = marshal.dumps((_FORMAT, key, headers))
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(payload)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
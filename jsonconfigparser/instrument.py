@@ -0,0 +1,176 @@
+"""Opt-in instrumentation of parsing and lookups.
+
+An `Instrumentation' attached to a parser records how long each file or
+string took to parse, how much of that time was spent decoding json, and
+counts the outcome of every lookup through `get' or a section proxy::
+
+    stats = Instrumentation()
+    stats.attach(parser)
+    parser.read('app.cfg')
+    parser['section']['option']
+
+    stats.parses[0].seconds
+    stats.lookups['section', 'option'].hits
+
+Parsers without an instrumentation attached pay for a single attribute check
+per lookup and per file.  Files parsed in another process by `read' with a
+process pool executor are not recorded.
+"""
+import threading
+
+from collections import namedtuple
+from time import perf_counter
+
+from jsonconfigparser import _UNSET
+
+__all__ = ['Instrumentation', 'ParseRecord', 'LookupCounts']
+
+
+ParseRecord = namedtuple('ParseRecord', [
+    'filename', 'seconds', 'decode_seconds', 'characters', 'options',
+])
+ParseRecord.__doc__ = """Statistics for a single file or string.
+
+`seconds' is the total time taken to parse it and `decode_seconds' the part of
+that spent decoding json values.  The remainder was spent scanning.  For a
+lazy parser most values are decoded when they are first read, which is
+counted in `Instrumentation.lazy_decode_seconds' instead.
+"""
+
+
+class LookupCounts(object):
+    """The outcomes of the lookups of a single option.
+
+    `hits' counts values found in the section itself or in `vars', `defaults'
+    values inherited from the default section, `fallbacks' lookups that
+    returned the fallback and `misses' lookups that raised an error.
+    """
+    __slots__ = ('hits', 'defaults', 'fallbacks', 'misses')
+
+    def __init__(self):
+        self.hits = 0
+        self.defaults = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return (
+            '<LookupCounts: hits={}, defaults={}, fallbacks={}, misses={}>'
+        ).format(self.hits, self.defaults, self.fallbacks, self.misses)
+
+    @property
+    def total(self):
+        return self.hits + self.defaults + self.fallbacks + self.misses
+
+
+class _Timer(object):
+    """Accumulates the time spent in the functions it wraps."""
+    __slots__ = ('start', 'seconds')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.seconds = 0.0
+
+    def wrap(self, fn):
+        def timed(*args):
+            start = perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.seconds += perf_counter() - start
+        return timed
+
+
+class Instrumentation(object):
+    """Collects statistics from the parsers it is attached to.
+
+    If `callback' is given it is called as `callback("parse", record)' with a
+    `ParseRecord' after every file or string is parsed, and as
+    `callback("lookup", (section, option, outcome))' after every lookup, where
+    outcome is one of "hit", "default", "fallback" or "miss".
+    """
+
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Discard all of the statistics collected so far."""
+        with self._lock:
+            self.parses = []
+            self.lookups = {}
+            self.lazy_decode_seconds = 0.0
+
+    def attach(self, parser):
+        parser._instrument = self
+
+    def detach(self, parser):
+        if parser._instrument is self:
+            parser._instrument = None
+
+    def __reduce__(self):
+        # parsers are pickled to parse files in other processes, where there
+        # is nothing to report to
+        return (_detached, ())
+
+    def _timer(self):
+        return _Timer()
+
+    def _parsed(self, parser, config):
+        timer = parser._timer
+        record = ParseRecord(
+            filename=parser._fpname,
+            seconds=perf_counter() - timer.start,
+            decode_seconds=timer.seconds,
+            characters=parser._size,
+            options=sum(len(options) for options in config.values()),
+        )
+        with self._lock:
+            self.parses.append(record)
+        if self._callback is not None:
+            self._callback('parse', record)
+
+    def _decoded(self, seconds):
+        with self._lock:
+            self.lazy_decode_seconds += seconds
+
+    def _lookup(self, parser, section, option, fallback, vars):
+        """Classify a lookup from `JSONConfigParser.get' before it happens."""
+        if section == parser.default_section:
+            own = parser._defaults
+        elif section in parser._sections:
+            own = parser._sections[section].maps[0]
+        else:
+            own = None
+
+        if own is None:
+            outcome = 'miss'
+        elif (vars is not None and option in vars) or option in own:
+            outcome = 'hit'
+        elif option in parser._defaults:
+            outcome = 'default'
+        else:
+            outcome = None
+
+        if outcome is None:
+            outcome = 'miss' if fallback is _UNSET else 'fallback'
+
+        with self._lock:
+            counts = self.lookups.get((section, option))
+            if counts is None:
+                counts = self.lookups[section, option] = LookupCounts()
+            if outcome == 'hit':
+                counts.hits += 1
+            elif outcome == 'default':
+                counts.defaults += 1
+            elif outcome == 'fallback':
+                counts.fallbacks += 1
+            else:
+                counts.misses += 1
+        if self._callback is not None:
+            self._callback('lookup', (section, option, outcome))
+
+
+def _detached():
+    return None
@@ -0,0 +1,293 @@
+"""Composing a config from several layers of parsers.
+
+An `Overlay' stacks parsers from the lowest priority to the highest, such as
+packaged defaults, site files, host files and runtime overrides::
+
+    config = Overlay([
+        ('defaults', defaults),
+        ('site', site),
+        ('host', host),
+    ])
+    config.get('section', 'option')
+    config.provenance('section', 'option').layer
+
+Options are resolved as they would be if every layer were read into a single
+`JSONConfigParser' in order.  An option set in a section by any layer takes
+precedence over one inherited from the default section of any layer.
+
+The effective value of every option is computed up front, so lookups are a
+single dictionary probe.  Layers are copied when they are added, so later
+changes to a parser only take effect once its layer is replaced.  Replacing
+a layer only recomputes the options that the old or the new version of it
+sets.
+"""
+from collections import namedtuple
+from collections.abc import Mapping
+
+from jsonconfigparser import DEFAULT_SECT, FrozenSection
+from jsonconfigparser import NoSectionError, NoOptionError
+from jsonconfigparser import _UNSET, _decoded, _freeze_value
+
+__all__ = ['Overlay', 'Provenance']
+
+
+Provenance = namedtuple('Provenance', [
+    'layer', 'section', 'filename', 'lineno', 'line',
+])
+Provenance.__doc__ = """Where the effective value of an option came from.
+
+`layer' is the name of the layer that set it and `section' the section it
+was set in, which is the default section if it was inherited.  `filename',
+`lineno' and `line' are only known if the layer's parser was created with
+`track_locations' and are None otherwise.
+"""
+
+
+class _Layer(object):
+    __slots__ = ('name', 'parser', 'sections')
+
+    def __init__(self, name, parser, default_section):
+        self.name = name
+        self.parser = parser
+        # frozen copies of the options set in each section, with the default
+        # section stored under the name used by the overlay
+        self.sections = {
+            default_section: {
+                option: _freeze_value(_decoded(value))
+                for option, value in parser._defaults.items()
+            },
+        }
+        for section, options in parser._sections.items():
+            self.sections[section] = {
+                option: _freeze_value(_decoded(value))
+                for option, value in options.maps[0].items()
+            }
+
+    def __repr__(self):
+        return '<Layer: {}>'.format(self.name)
+
+
+class Overlay(Mapping):
+    """A read-only, flattened view of a stack of parsers.
+
+    `layers' is an iterable of `(name, parser)' pairs, from the lowest
+    priority to the highest.  Behaves like a `FrozenConfig' that is updated
+    in place as layers are added, replaced and removed.
+    """
+
+    def __init__(self, layers=(), *, default_section=DEFAULT_SECT):
+        self._default_section = default_section
+        self._layers = []
+        for name, parser in layers:
+            if self._find(name) is not None:
+                raise ValueError('Duplicate layer name: %r' % name)
+            self._layers.append(_Layer(name, parser, default_section))
+
+        # the effective value of every option in each section, including the
+        # default section and the options inherited from it
+        self._values = {}
+        # the layer and section each of those values came from
+        self._origins = {}
+
+        self._build_section(default_section)
+        for layer in self._layers:
+            for section in layer.sections:
+                if section not in self._values:
+                    self._build_section(section)
+
+    def __repr__(self):
+        return '<Overlay: {}>'.format(
+            ', '.join(layer.name for layer in self._layers)
+        )
+
+    @property
+    def layers(self):
+        """The names of the layers, from the lowest priority to the highest.
+        """
+        return [layer.name for layer in self._layers]
+
+    def _find(self, name):
+        for i, layer in enumerate(self._layers):
+            if layer.name == name:
+                return i
+        return None
+
+    def _index(self, name):
+        i = self._find(name)
+        if i is None:
+            raise KeyError(name)
+        return i
+
+    def add_layer(self, name, parser, *, below=None):
+        """Add `parser' as a new layer called `name'.
+
+        The layer takes precedence over all of the existing layers unless
+        `below' is given, in which case it is inserted immediately beneath the
+        layer of that name.
+        """
+        if self._find(name) is not None:
+            raise ValueError('Duplicate layer name: %r' % name)
+        i = len(self._layers) if below is None else self._index(below)
+        layer = _Layer(name, parser, self._default_section)
+        self._layers.insert(i, layer)
+        self._update(layer.sections)
+
+    def replace_layer(self, name, parser=None):
+        """Replace the parser of the layer called `name' with `parser'.
+
+        If `parser' is not given the layer is copied again from its current
+        parser, to pick up any changes made since it was added.
+        """
+        i = self._index(name)
+        old = self._layers[i]
+        if parser is None:
+            parser = old.parser
+        new = self._layers[i] = _Layer(name, parser, self._default_section)
+        self._update(old.sections, new.sections)
+
+    def remove_layer(self, name):
+        """Remove the layer called `name'."""
+        old = self._layers.pop(self._index(name))
+        self._update(old.sections)
+
+    def _build_section(self, section):
+        default = self._default_section
+        values = self._values[section] = {}
+        origins = self._origins[section] = {}
+        for layer in self._layers:
+            for option, value in layer.sections[default].items():
+                values[option] = value
+                origins[option] = (layer, default)
+        if section == default:
+            return
+        for layer in self._layers:
+            options = layer.sections.get(section)
+            if options is None:
+                continue
+            for option, value in options.items():
+                values[option] = value
+                origins[option] = (layer, section)
+
+    def _resolve(self, section, option):
+        """Recompute the effective value of a single option in a section that
+        exists.
+        """
+        default = self._default_section
+        for source in (section, default):
+            for layer in reversed(self._layers):
+                options = layer.sections.get(source)
+                if options is not None and option in options:
+                    self._values[section][option] = options[option]
+                    self._origins[section][option] = (layer, source)
+                    return
+        self._values[section].pop(option, None)
+        self._origins[section].pop(option, None)
+
+    def _update(self, *changed):
+        """Recompute every option set by the layer sections in `changed'."""
+        default = self._default_section
+        defaults = set()
+        options = {}
+        for sections in changed:
+            for section, names in sections.items():
+                if section == default:
+                    defaults.update(names)
+                else:
+                    options.setdefault(section, set()).update(names)
+
+        for section, names in options.items():
+            exists = any(section in layer.sections for layer in self._layers)
+            if not exists:
+                self._values.pop(section, None)
+                self._origins.pop(section, None)
+            elif section not in self._values:
+                self._build_section(section)
+            else:
+                for option in names:
+                    self._resolve(section, option)
+
+        # inherited options need to be updated in every section
+        for option in defaults:
+            for section in self._values:
+                self._resolve(section, option)
+
+    def provenance(self, section, option):
+        """Return a `Provenance' describing where the effective value of
+        `option' in `section' came from.
+        """
+        try:
+            origins = self._origins[section]
+        except KeyError:
+            raise NoSectionError(section)
+        try:
+            layer, source = origins[option]
+        except KeyError:
+            raise NoOptionError(option)
+
+        parser = layer.parser
+        location = parser.location(
+            parser.default_section if source == self._default_section
+            else source,
+            option,
+        )
+        if location is None:
+            location = (None, None, None)
+        return Provenance(layer.name, source, *location)
+
+    def __getitem__(self, key):
+        return FrozenSection(key, self._values[key])
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def sections(self):
+        """Return a list of section names, excluding [DEFAULT]"""
+        return [
+            name for name in self._values
+            if name != self._default_section
+        ]
+
+    def has_section(self, section):
+        return section != self._default_section and section in self._values
+
+    def options(self, section):
+        """Return a list of option names for the given section name."""
+        if not self.has_section(section):
+            raise NoSectionError(section)
+        return list(self._values[section])
+
+    def has_option(self, section, option):
+        if not section:
+            section = self._default_section
+        try:
+            return option in self._values[section]
+        except KeyError:
+            return False
+
+    def get(self, section, option, fallback=_UNSET, *, vars=None):
+        """Get an option value for a given section.
+
+        Behaves the same as `JSONConfigParser.get'.
+        """
+        if vars is not None and option in vars:
+            if section not in self._values:
+                raise NoSectionError(section)
+            return vars[option]
+        try:
+            return self._values[section][option]
+        except KeyError:
+            if section not in self._values:
+                raise NoSectionError(section)
+            if fallback is _UNSET:
+                raise NoOptionError(option)
+            return fallback
+
+    @property
+    def default_section(self):
+        return self._default_section
@@ -0,0 +1,315 @@
+"""Reloading of config files that have changed since they were read.
+
+A `Reloader' remembers which span of which file produced each section.  When
+a file changes only the sections between its unchanged prefix and unchanged
+suffix are parsed again and only the options whose values actually changed are
+updated on the live parser.
+"""
+import os
+
+from collections import OrderedDict
+
+from jsonconfigparser import FeedParser, ParseError
+
+__all__ = ['Reloader']
+
+
+class _Section(object):
+    __slots__ = ('name', 'start', 'end', 'options')
+
+    def __init__(self, name, start, end, options):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.options = options
+
+
+class _File(object):
+    __slots__ = ('stat', 'text', 'sections', 'config')
+
+    def __init__(self, stat, text, sections):
+        self.stat = stat
+        self.text = text
+        self.sections = sections
+        self.config = {
+            s.name: s.options for s in sections if s.name is not None
+        }
+
+
+def _common_prefix(a, b):
+    """Returns the length of the longest common prefix of `a' and `b'."""
+    lo, hi = 0, min(len(a), len(b))
+    if a[:hi] == b[:hi]:
+        return hi
+    # invariant: a[:lo] == b[:lo] and a[:hi] != b[:hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _common_suffix(a, b, limit):
+    """Returns the length of the longest common suffix of `a' and `b', up to a
+    maximum of `limit'.
+    """
+    la, lb = len(a), len(b)
+    lo, hi = 0, limit
+    if a[la - hi:] == b[lb - hi:]:
+        return hi
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[la - mid:la - lo] == b[lb - mid:lb - lo]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _parse(text, filename, start=0, end=None):
+    """Parse `text[start:end]' into a list of sections.  Any comments and blank
+    lines before the first header are represented by a section named None.
+    """
+    if end is None:
+        end = len(text)
+
+    parser = FeedParser(filename)
+    events = parser.close(text[start:end])
+
+    offsets = iter(parser._offsets)
+    first = parser._offsets[0] if parser._offsets else end - start
+
+    sections = []
+    if first > 0:
+        sections.append(_Section(None, start, None, {}))
+    for section, option, value in events:
+        if option is None:
+            sections.append(
+                _Section(section, start + next(offsets), None, {})
+            )
+        else:
+            sections[-1].options[option] = value
+
+    for section, following in zip(sections, sections[1:]):
+        section.end = following.start
+    if sections:
+        sections[-1].end = end
+    return sections
+
+
+def _reparse(old, text, filename):
+    """Parse the new contents of a file, reusing the sections of `old' that lie
+    entirely outside of the region that changed.
+    """
+    old_text = old.text
+    prefix = _common_prefix(old_text, text)
+    if prefix == len(old_text) == len(text):
+        return old.sections
+    suffix = _common_suffix(
+        old_text, text, min(len(old_text), len(text)) - prefix
+    )
+    delta = len(text) - len(old_text)
+
+    head = [s for s in old.sections if s.end < prefix]
+    tail = [
+        s for s in old.sections
+        if s.start >= len(old_text) - suffix and s.name is not None
+    ]
+
+    start = head[-1].end if head else 0
+    end = tail[0].start + delta if tail else len(text)
+
+    # the reparsed region must finish at the end of a line, otherwise the last
+    # statement in it would run into the following section
+    if start < end < len(text) and text[end - 1] not in '\r\n':
+        return _parse(text, filename)
+
+    try:
+        middle = _parse(text, filename, start, end) if start < end else []
+    except ParseError:
+        # parse the whole file to get accurate error locations, or in case
+        # the region boundaries were wrong
+        return _parse(text, filename)
+
+    if middle and middle[0].name is None and start > 0:
+        return _parse(text, filename)
+
+    tail = [
+        _Section(s.name, s.start + delta, s.end + delta, s.options)
+        for s in tail
+    ]
+    sections = head + middle + tail
+
+    names = [s.name for s in sections if s.name is not None]
+    if len(set(names)) != len(names):
+        # raises an appropriate DuplicateSectionError
+        return _parse(text, filename)
+
+    return sections
+
+
+def _differs(a, b):
+    # `1 == 1.0 == True', so equal values of different types, even deep
+    # inside lists and objects, still count as changes
+    if type(a) is not type(b):
+        return True
+    if isinstance(a, dict):
+        return a.keys() != b.keys() or any(_differs(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) != len(b) or any(map(_differs, a, b))
+    return a != b
+
+
+class Reloader(object):
+    """Reads `filenames' into `parser' and keeps it up to date as they change.
+
+    Files that do not exist are treated as empty.  `poll' checks the
+    modification time and size of each file and applies any changes.
+    `reload' checks the contents of every file regardless.  Both return the
+    set of `(section, option)' pairs that were modified.
+    """
+
+    def __init__(self, parser, filenames, encoding=None):
+        if isinstance(filenames, str):
+            filenames = [filenames]
+
+        self._parser = parser
+        self._filenames = list(filenames)
+        self._encoding = encoding
+        self._effective = {}
+
+        files = {}
+        for f in self._filenames:
+            files[f] = self._load(f, None, False)
+
+        touched = OrderedDict()
+        for f in self._filenames:
+            for section in files[f].sections:
+                if section.name is not None:
+                    touched[section.name] = None
+        self._apply(files, touched)
+
+    @property
+    def parser(self):
+        return self._parser
+
+    @property
+    def filenames(self):
+        return list(self._filenames)
+
+    def spans(self, filename):
+        """Return a list of `(section, start, end)' tuples giving the
+        character offsets of each section read from `filename'.
+        """
+        return [
+            (s.name, s.start, s.end) for s in self._files[filename].sections
+            if s.name is not None
+        ]
+
+    def poll(self):
+        return self._refresh(force=False)
+
+    def reload(self):
+        return self._refresh(force=True)
+
+    def _stat(self, filename):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, filename, old, force):
+        if not force and old is not None and old.stat == self._stat(filename):
+            return old
+
+        try:
+            with open(filename, 'r', encoding=self._encoding) as fp:
+                stat = os.fstat(fp.fileno())
+                stat = stat.st_mtime_ns, stat.st_size
+                text = fp.read()
+        except FileNotFoundError:
+            stat, text = None, ''
+
+        if old is None:
+            return _File(stat, text, _parse(text, filename))
+        if old.text == text:
+            old.stat = stat
+            return old
+        return _File(stat, text, _reparse(old, text, filename))
+
+    def _refresh(self, force):
+        # parse everything before touching the parser so that errors leave it
+        # unmodified
+        files = {}
+        for f in self._filenames:
+            files[f] = self._load(f, self._files[f], force)
+
+        touched = OrderedDict()
+        for f in self._filenames:
+            old, new = self._files[f], files[f]
+            if old is new:
+                continue
+            for name in old.config.keys() | new.config.keys():
+                if old.config.get(name) is not new.config.get(name):
+                    touched[name] = None
+
+        return self._apply(files, touched)
+
+    def _apply(self, files, touched):
+        """Update the parser from the newly loaded `files'.  Nothing is
+        recorded until the parser has accepted the new values, so a file that
+        fails to apply is compared against the old state on the next attempt.
+        """
+        parser = self._parser
+        default_section = parser.default_section
+
+        changed = set()
+        updates = OrderedDict()
+        removals = []
+        effective = dict(self._effective)
+        for name in touched:
+            present = False
+            merged = {}
+            for f in self._filenames:
+                options = files[f].config.get(name)
+                if options is not None:
+                    present = True
+                    merged.update(options)
+
+            old = effective.get(name, {})
+            if present:
+                effective[name] = merged
+            else:
+                effective.pop(name, None)
+
+            updated = {
+                option: value for option, value in merged.items()
+                if option not in old or _differs(old[option], value)
+            }
+            removed = [option for option in old if option not in merged]
+
+            if updated or (present and name not in parser):
+                updates[name] = updated
+            removals.append((name, present, removed))
+
+            changed.update((name, option) for option in updated)
+            changed.update((name, option) for option in removed)
+
+        # validates all names before anything is modified
+        parser.read_dict(updates)
+        self._files = files
+        self._effective = effective
+
+        for name, present, removed in removals:
+            if not present and name != default_section:
+                parser.remove_section(name)
+                continue
+            if name != default_section and not parser.has_section(name):
+                continue
+            for option in removed:
+                parser.remove_option(name, option)
+
+        return changed
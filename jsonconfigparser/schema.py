@@ -0,0 +1,402 @@
+"""Validation of parsed configs against a declarative schema.
+
+A schema maps section names to dictionaries describing their options::
+
+    schema = Schema({
+        'server': {
+            'host': str,
+            'port': Option(int, min=1, max=65535, default=8080),
+            'tags': [str],
+            'limits': {'cpu': float, 'memory': int},
+            'env': {str: str},
+        },
+    })
+
+An option is described by one of the json types `str', `int', `float',
+`bool', `None', `list' or `dict', by a list containing the description of
+every item, by a dictionary of descriptions for a fixed set of keys, by a
+dictionary with the single key `str' describing the values of a mapping with
+arbitrary keys, or by an `Option' wrapping any of these.  Tuples, which
+parsers created with `intern_values' store lists as, are accepted wherever a
+list is.
+
+The schema is compiled once.  `Schema.validate' checks every option of a
+parser and returns a `ValidatedConfig' from which the checked values can be
+read as attributes or items without any further checks.
+"""
+import keyword
+
+from jsonconfigparser import NoOptionError, ParseError, _UNSET
+
+__all__ = ['Schema', 'Option', 'SchemaError', 'ValidatedConfig']
+
+_TYPE_NAMES = {
+    str: 'a string',
+    int: 'an integer',
+    float: 'a number',
+    bool: 'a boolean',
+    type(None): 'null',
+    list: 'a list',
+    dict: 'a dictionary',
+}
+
+# parsers created with `intern_values' store lists as tuples
+_LIST_TYPES = (list, tuple)
+
+
+class SchemaError(ParseError):
+    """Raised if a config does not match a schema.  If the parser tracks
+    locations the error gives the file and line of the offending option.
+    """
+
+
+class _Invalid(Exception):
+    def __init__(self, message):
+        self.message = message
+        self.path = []
+
+
+class Option(object):
+    """Describes an option in more detail than a type.
+
+    `min' and `max' are inclusive bounds on a number.  If `default' is given
+    the option may be left out of the config.
+    """
+
+    def __init__(self, spec, *, min=None, max=None, default=_UNSET):
+        self.spec = spec
+        self.min = min
+        self.max = max
+        self.default = default
+
+    def __repr__(self):
+        return 'Option({!r}, min={!r}, max={!r})'.format(
+            self.spec, self.min, self.max,
+        )
+
+
+def _describe(value):
+    for type_, name in _TYPE_NAMES.items():
+        if type(value) is type_:
+            return name
+    return type(value).__name__
+
+
+def _compile(spec):
+    """Returns a function that checks a value against `spec' and returns it,
+    converted if necessary, or raises `_Invalid'.
+    """
+    if isinstance(spec, Option):
+        return _compile_option(spec)
+    if spec is None:
+        spec = type(None)
+    if isinstance(spec, list):
+        if len(spec) != 1:
+            raise TypeError("List schema must have exactly one item")
+        return _compile_list(_compile(spec[0]))
+    if isinstance(spec, dict):
+        if list(spec) == [str]:
+            return _compile_mapping(_compile(spec[str]))
+        return _compile_shape(spec)
+    if isinstance(spec, type) and spec in _TYPE_NAMES:
+        return _compile_type(spec)
+    raise TypeError("Invalid schema: %r" % (spec,))
+
+
+def _compile_type(type_):
+    expected = 'expected %s' % _TYPE_NAMES[type_]
+
+    if type_ is bool:
+        def check(value):
+            if value is True or value is False:
+                return value
+            raise _Invalid('%s, got %s' % (expected, _describe(value)))
+    elif type_ is int:
+        def check(value):
+            if type(value) is int:
+                return value
+            raise _Invalid('%s, got %s' % (expected, _describe(value)))
+    elif type_ is float:
+        def check(value):
+            if type(value) is float:
+                return value
+            if type(value) is int:
+                return float(value)
+            raise _Invalid('%s, got %s' % (expected, _describe(value)))
+    elif type_ is type(None):
+        def check(value):
+            if value is None:
+                return value
+            raise _Invalid('%s, got %s' % (expected, _describe(value)))
+    elif type_ is list:
+        def check(value):
+            if isinstance(value, _LIST_TYPES):
+                return value
+            raise _Invalid('%s, got %s' % (expected, _describe(value)))
+    else:
+        def check(value):
+            if isinstance(value, type_):
+                return value
+            raise _Invalid('%s, got %s' % (expected, _describe(value)))
+    return check
+
+
+def _compile_option(option):
+    check = _compile(option.spec)
+    lower, upper = option.min, option.max
+
+    if lower is not None or upper is not None:
+        if option.spec not in (int, float):
+            raise TypeError("Only numbers can have a minimum or maximum")
+        inner = check
+
+        def check(value):
+            value = inner(value)
+            if lower is not None and value < lower:
+                raise _Invalid('%r is less than the minimum of %r' % (
+                    value, lower,
+                ))
+            if upper is not None and value > upper:
+                raise _Invalid('%r is greater than the maximum of %r' % (
+                    value, upper,
+                ))
+            return value
+
+    if option.default is not _UNSET:
+        try:
+            check(option.default)
+        except _Invalid as e:
+            raise ValueError("Invalid default: %s" % e.message)
+    return check
+
+
+def _compile_list(check_item):
+    def check(value):
+        if not isinstance(value, _LIST_TYPES):
+            raise _Invalid('expected a list, got %s' % _describe(value))
+        result = []
+        for i, item in enumerate(value):
+            try:
+                result.append(check_item(item))
+            except _Invalid as e:
+                e.path.insert(0, i)
+                raise
+        return result
+    return check
+
+
+def _compile_mapping(check_value):
+    def check(value):
+        if not isinstance(value, dict):
+            raise _Invalid('expected a dictionary, got %s' % _describe(value))
+        result = {}
+        for key, item in value.items():
+            try:
+                result[key] = check_value(item)
+            except _Invalid as e:
+                e.path.insert(0, key)
+                raise
+        return result
+    return check
+
+
+def _compile_shape(spec):
+    fields = []
+    for key, item in spec.items():
+        if not isinstance(key, str):
+            raise TypeError("Invalid key in schema: %r" % (key,))
+        default = item.default if isinstance(item, Option) else _UNSET
+        fields.append((key, _compile(item), default))
+    keys = frozenset(spec)
+
+    def check(value):
+        if not isinstance(value, dict):
+            raise _Invalid('expected a dictionary, got %s' % _describe(value))
+        result = {}
+        for key, check_item, default in fields:
+            if key not in value:
+                if default is _UNSET:
+                    raise _Invalid('missing key %r' % key)
+                result[key] = default
+                continue
+            try:
+                result[key] = check_item(value[key])
+            except _Invalid as e:
+                e.path.insert(0, key)
+                raise
+        for key in value:
+            if key not in keys:
+                raise _Invalid('unexpected key %r' % key)
+        return result
+    return check
+
+
+class _Accessor(object):
+    """Base class for the classes generated to hold validated values.  Values
+    are stored in slots named after them, so they can be read as attributes.
+    Names that can't be used as attributes are only available as items.
+    """
+    __slots__ = ()
+    _slots = {}
+
+    def __getitem__(self, key):
+        try:
+            slot = self._slots[key]
+        except KeyError:
+            raise KeyError(key)
+        return getattr(self, slot)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(self[key] == other[key] for key in self._slots)
+
+    def __repr__(self):
+        return '<%s: %s>' % (type(self).__name__, ', '.join(
+            '%s=%r' % (key, self[key]) for key in self._slots
+        ))
+
+
+def _accessor_class(name, base, keys):
+    slots = {}
+    used = set()
+    for i, key in enumerate(keys):
+        attribute = key.replace('-', '_')
+        if (not attribute.isidentifier() or attribute.startswith('_') or
+                keyword.iskeyword(attribute) or attribute in used):
+            attribute = '_%i' % i
+        slots[key] = attribute
+        used.add(attribute)
+    return type(name, (base,), {
+        '__slots__': tuple(slots.values()),
+        '_slots': slots,
+    })
+
+
+class ValidatedSection(_Accessor):
+    """The validated options of a section."""
+    __slots__ = ()
+
+
+class ValidatedConfig(_Accessor):
+    """The validated sections of a config."""
+    __slots__ = ()
+
+
+class _Section(object):
+    __slots__ = ('name', 'fields', 'options', 'cls')
+
+    def __init__(self, name, spec):
+        if not isinstance(spec, dict):
+            raise TypeError("Section schema must be a dictionary")
+        self.name = name
+        self.fields = []
+        for option, item in spec.items():
+            default = item.default if isinstance(item, Option) else _UNSET
+            self.fields.append((option, _compile(item), default))
+        self.options = frozenset(spec)
+        self.cls = _accessor_class(
+            'ValidatedSection', ValidatedSection, list(spec),
+        )
+
+
+class Schema(object):
+    """A compiled description of the sections and options of a config.
+
+    Unless `allow_unknown' is true, sections and options that are not in the
+    schema are reported as errors.  Options inherited from the default
+    section are only checked in the sections that declare them.
+    """
+
+    def __init__(self, sections, *, allow_unknown=False):
+        self._sections = [
+            _Section(name, spec) for name, spec in sections.items()
+        ]
+        self._names = frozenset(sections)
+        self._allow_unknown = allow_unknown
+        self._cls = _accessor_class(
+            'ValidatedConfig', ValidatedConfig, list(sections),
+        )
+
+    def validate(self, parser):
+        """Check every option of `parser' against the schema and return a
+        `ValidatedConfig' holding the values.
+
+        Raises `SchemaError' at the first option that doesn't match.
+        """
+        config = self._cls()
+        slots = self._cls._slots
+        for section in self._sections:
+            setattr(config, slots[section.name], self._validate_section(
+                parser, section,
+            ))
+
+        if not self._allow_unknown:
+            for name in parser.sections():
+                if name not in self._names:
+                    raise SchemaError(
+                        'Unexpected section %r' % name, section=name,
+                    )
+        return config
+
+    def _validate_section(self, parser, section):
+        name = section.name
+        present = name == parser.default_section or parser.has_section(name)
+        result = section.cls()
+        slots = section.cls._slots
+
+        for option, check, default in section.fields:
+            value = _UNSET
+            if present:
+                try:
+                    value = parser.get(name, option)
+                except NoOptionError:
+                    pass
+            if value is _UNSET:
+                if default is _UNSET:
+                    raise SchemaError(
+                        'Missing option %r' % option, section=name,
+                    )
+                setattr(result, slots[option], default)
+                continue
+
+            try:
+                value = check(value)
+            except _Invalid as e:
+                path = ''.join('[%r]' % key for key in e.path)
+                raise self._error(
+                    'Invalid value for %r%s: %s' % (option, path, e.message),
+                    parser, name, option,
+                )
+            setattr(result, slots[option], value)
+
+        if present and not self._allow_unknown:
+            if name == parser.default_section:
+                options = parser._defaults
+            else:
+                options = parser._sections[name].maps[0]
+            for option in options:
+                if option not in section.options:
+                    raise self._error(
+                        'Unexpected option %r' % option, parser, name, option,
+                    )
+        return result
+
+    def _error(self, message, parser, section, option):
+        location = parser.location(section, option)
+        if location is None:
+            return SchemaError(message, section=section)
+        filename, lineno, line = location
+        return SchemaError(
+            message,
+            filename=filename, section=section, lineno=lineno, line=line,
+        )
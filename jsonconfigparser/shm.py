@@ -0,0 +1,415 @@
+"""Sharing parsed configs between processes through shared memory.
+
+Requires Python 3.8.  A `Publisher' serializes a parser into a new shared
+memory segment each time `publish' is called, and any process on the same
+host can then `attach' a read-only `SharedSnapshot' of it by name::
+
+    publisher = Publisher('app-config')
+    publisher.publish(parser)
+
+    # in each worker
+    snapshot = attach('app-config')
+    snapshot.get('section', 'option')
+
+Values are kept in the segment as json and only decoded, once per process,
+when they are first read, so workers that fork after a snapshot is attached
+share its pages instead of each holding a copy of every decoded value.
+
+A small control segment holds the generation number of the latest snapshot.
+Workers can check `SharedSnapshot.stale' and call `refresh' to pick up a
+newer one.
+"""
+import os
+import sys
+import json
+import struct
+
+from multiprocessing import shared_memory, resource_tracker
+from collections.abc import Mapping
+
+from jsonconfigparser import NoSectionError, NoOptionError
+from jsonconfigparser import _UNSET, _decoded, _freeze_value
+
+__all__ = ['Publisher', 'attach', 'SharedSnapshot', 'SharedSection']
+
+
+_MAGIC = b'JCPSHM01'
+
+# magic, generation
+_CONTROL = struct.Struct('<8sQ')
+
+# magic, generation, index size
+_HEADER = struct.Struct('<8sQQ')
+
+# the segments of previous generations are kept around for a while after a
+# new one is published so that workers that have just read the generation
+# number have time to attach
+_KEEP = 2
+
+_ATTACH_RETRIES = 10
+
+# `track' was added in 3.13.  Before that, attaching to a segment registers it
+# with the resource tracker, which would then remove it when the attaching
+# process exits.
+_TRACK_ARGUMENT = sys.version_info >= (3, 13)
+_TRACKED = os.name == 'posix'
+
+
+def _open(name):
+    if _TRACK_ARGUMENT:
+        return shared_memory.SharedMemory(name, track=False)
+    segment = shared_memory.SharedMemory(name)
+    if _TRACKED:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _unlink(segment):
+    if _TRACKED and not _TRACK_ARGUMENT:
+        # a forked worker shares the resource tracker of its parent, in which
+        # case attaching will have removed the registration made when the
+        # segment was created
+        resource_tracker.register(segment._name, 'shared_memory')
+    segment.unlink()
+
+
+def _segment_name(name, generation):
+    return '{}-{}'.format(name, generation)
+
+
+def _serialize(parser, generation):
+    """Return the contents of a snapshot segment for `parser'.
+
+    The segment starts with a header, followed by a json index of the
+    sections, each given as `[name, options, offsets]' with the default
+    section first.  The values of each section follow as json text, one
+    after the other.  Offsets are relative to the start of the values and
+    there is one more than the number of options.
+    """
+    encode = json.JSONEncoder(
+        separators=(',', ':'), ensure_ascii=False
+    ).encode
+
+    sections = [(parser.default_section, parser._defaults)]
+    sections.extend(
+        (name, section.maps[0]) for name, section in parser._sections.items()
+    )
+
+    index = []
+    values = []
+    offset = 0
+    for name, options in sections:
+        offsets = [offset]
+        for value in options.values():
+            value = encode(_decoded(value)).encode('utf-8')
+            values.append(value)
+            offset += len(value)
+            offsets.append(offset)
+        index.append([name, list(options), offsets])
+    index = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    header = _HEADER.pack(_MAGIC, generation, len(index))
+    return b''.join([header, index] + values)
+
+
+class Publisher(object):
+    """Publishes snapshots of parsers under `name'.
+
+    Creates the control segment for `name', raising `FileExistsError' if one
+    already exists.  Call `close' to remove all of the segments when the
+    snapshots are no longer needed.  Workers that are still attached keep
+    their snapshots until they close them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.generation = 0
+        self._segments = []
+        self._control = shared_memory.SharedMemory(
+            name, create=True, size=_CONTROL.size
+        )
+        _CONTROL.pack_into(self._control.buf, 0, _MAGIC, 0)
+
+    def __repr__(self):
+        return '<Publisher: {} generation {}>'.format(
+            self.name, self.generation
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def publish(self, parser):
+        """Copy the contents of `parser' into a new snapshot and make it the
+        latest.  Returns the snapshot's generation number.
+        """
+        if self._control is None:
+            raise ValueError('Publisher is closed')
+
+        generation = self.generation + 1
+        data = _serialize(parser, generation)
+        segment = shared_memory.SharedMemory(
+            _segment_name(self.name, generation), create=True, size=len(data)
+        )
+        segment.buf[:len(data)] = data
+
+        _CONTROL.pack_into(self._control.buf, 0, _MAGIC, generation)
+        self.generation = generation
+
+        self._segments.append(segment)
+        while len(self._segments) > _KEEP:
+            old = self._segments.pop(0)
+            old.close()
+            _unlink(old)
+        return generation
+
+    def close(self):
+        """Remove the control segment and all of the snapshots."""
+        if self._control is None:
+            return
+        for segment in self._segments:
+            segment.close()
+            _unlink(segment)
+        self._segments = []
+        self._control.close()
+        _unlink(self._control)
+        self._control = None
+
+
+def _read_generation(control):
+    magic, generation = _CONTROL.unpack_from(control.buf, 0)
+    if magic != _MAGIC:
+        raise ValueError('Not a config snapshot: %r' % control.name)
+    return generation
+
+
+def attach(name):
+    """Attach to the latest snapshot published under `name'.
+
+    Raises `FileNotFoundError' if there is no publisher by that name or it
+    has not published anything yet.
+    """
+    control = _open(name)
+    try:
+        for _ in range(_ATTACH_RETRIES):
+            generation = _read_generation(control)
+            if generation == 0:
+                raise FileNotFoundError(
+                    'No snapshot has been published to %r' % name
+                )
+            try:
+                segment = _open(_segment_name(name, generation))
+            except FileNotFoundError:
+                # replaced and removed since the generation was read
+                continue
+            try:
+                return SharedSnapshot(name, control, segment)
+            except BaseException:
+                segment.close()
+                raise
+        raise FileNotFoundError(
+            'Could not attach to a snapshot of %r' % name
+        )
+    except BaseException:
+        control.close()
+        raise
+
+
+class SharedSection(Mapping):
+    """A read-only view of a single section of a `SharedSnapshot'.
+
+    Options inherited from the default section are included, as they are in
+    a `FrozenSection'.
+    """
+    __slots__ = ('_snapshot', '_name', '_offsets', '_defaults', '_values')
+
+    def __init__(self, snapshot, name, offsets, defaults):
+        self._snapshot = snapshot
+        self._name = name
+        # maps option names to the start and end of their values
+        self._offsets = offsets
+        self._defaults = defaults
+        # values decoded so far
+        self._values = {}
+
+    def __repr__(self):
+        return '<SharedSection: {}>'.format(self._name)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        if key in self._offsets:
+            start, end = self._offsets[key]
+            value = self._values[key] = self._snapshot._decode(start, end)
+            return value
+        if self._defaults is not None:
+            return self._defaults[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._offsets or (
+            self._defaults is not None and key in self._defaults
+        )
+
+    def __len__(self):
+        if self._defaults is None:
+            return len(self._offsets)
+        return len(set(self._offsets).union(self._defaults._offsets))
+
+    def __iter__(self):
+        if self._defaults is not None:
+            for key in self._defaults._offsets:
+                yield key
+            for key in self._offsets:
+                if key not in self._defaults._offsets:
+                    yield key
+        else:
+            for key in self._offsets:
+                yield key
+
+    def get(self, option, fallback=_UNSET, *, vars=None):
+        if vars is not None and option in vars:
+            return vars[option]
+        try:
+            return self[option]
+        except KeyError:
+            if fallback is _UNSET:
+                raise NoOptionError(option)
+            return fallback
+
+    @property
+    def name(self):
+        return self._name
+
+
+class SharedSnapshot(Mapping):
+    """A read-only view of a snapshot published by a `Publisher'.
+
+    Behaves like a `FrozenConfig'.  Values are decoded from the shared
+    segment the first time they are read and returned frozen, with lists
+    converted to tuples and dictionaries to read-only mappings.  The segment
+    stays attached until `close' is called.
+    """
+
+    def __init__(self, name, control, segment):
+        self.name = name
+        self._control = control
+        self._segment = segment
+        self._buf = segment.buf
+
+        magic, self.generation, size = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC:
+            raise ValueError('Not a config snapshot: %r' % segment.name)
+        start = _HEADER.size
+        index = json.loads(str(self._buf[start:start + size], 'utf-8'))
+        self._base = start + size
+
+        self._default_section = index[0][0]
+        self._sections = {}
+        defaults = None
+        for name, options, offsets in index:
+            section = SharedSection(self, name, {
+                sys.intern(option): (offsets[i], offsets[i + 1])
+                for i, option in enumerate(options)
+            }, defaults)
+            if defaults is None:
+                defaults = section
+            self._sections[name] = section
+
+    def __repr__(self):
+        return '<SharedSnapshot: {} generation {}>'.format(
+            self.name, self.generation
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _decode(self, start, end):
+        if self._buf is None:
+            raise ValueError('Snapshot is closed')
+        base = self._base
+        return _freeze_value(json.loads(
+            str(self._buf[base + start:base + end], 'utf-8')
+        ))
+
+    @property
+    def stale(self):
+        """True if a newer snapshot has been published since this one."""
+        return _read_generation(self._control) != self.generation
+
+    def refresh(self):
+        """Return the latest snapshot, which is this one unless it is stale.
+
+        The old snapshot is left attached.
+        """
+        if not self.stale:
+            return self
+        return attach(self.name)
+
+    def close(self):
+        """Detach from the shared segment.  Values that have already been
+        decoded remain valid.
+        """
+        if self._buf is None:
+            return
+        self._buf = None
+        self._segment.close()
+        self._control.close()
+
+    def __getitem__(self, key):
+        return self._sections[key]
+
+    def __contains__(self, key):
+        return key in self._sections
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def sections(self):
+        """Return a list of section names, excluding [DEFAULT]"""
+        return [
+            name for name in self._sections
+            if name != self._default_section
+        ]
+
+    def has_section(self, section):
+        return section != self._default_section and section in self._sections
+
+    def options(self, section):
+        """Return a list of option names for the given section name."""
+        if not self.has_section(section):
+            raise NoSectionError(section)
+        return list(self._sections[section])
+
+    def has_option(self, section, option):
+        if not section:
+            section = self._default_section
+        try:
+            return option in self._sections[section]
+        except KeyError:
+            return False
+
+    def get(self, section, option, fallback=_UNSET, *, vars=None):
+        """Get an option value for a given section.
+
+        Behaves the same as `JSONConfigParser.get'.
+        """
+        try:
+            section = self._sections[section]
+        except KeyError:
+            raise NoSectionError(section)
+        return section.get(option, fallback, vars=vars)
+
+    @property
+    def default_section(self):
+        return self._default_section
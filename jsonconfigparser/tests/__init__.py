@@ -1,7 +1,28 @@
+import io
+import os
+import pickle
+import sys
 import unittest
 import tempfile
 
 from jsonconfigparser import JSONConfigParser, NoSectionError, ParseError
+from jsonconfigparser import DuplicateOptionError, FeedParser, iterparse
+from jsonconfigparser import NoOptionError, InvalidOptionNameError
+from jsonconfigparser import InvalidSectionNameError, JSONError
+from jsonconfigparser import MissingSectionHeaderError, DuplicateSectionError
+from jsonconfigparser import check_string, check_file, FrozenConfig
+from jsonconfigparser import get_line
+from jsonconfigparser.benchmark import generate_config
+
+from jsonconfigparser.tests import test_cache, test_read, test_reload
+from jsonconfigparser.tests import test_benchmark, test_schema
+from jsonconfigparser.tests import test_instrument, test_overlay, test_cow
+from jsonconfigparser.tests import test_index, test_diff
+
+if sys.version_info >= (3, 5):
+    from jsonconfigparser.tests import test_aio
+if sys.version_info >= (3, 8):
+    from jsonconfigparser.tests import test_shm
 
 
 class JSONConfigTestCase(unittest.TestCase):
@@ -114,6 +135,25 @@ class JSONConfigTestCase(unittest.TestCase):
                         msg="has_option should return True if option set in \
                              defaults")
 
+    def test_options(self):
+        cf = JSONConfigParser()
+        cf.read_string(
+            '[DEFAULT]\n'
+            'default = 1\n'
+            '[first]\n'
+            'one = 1\n'
+            'two = 2\n'
+            '[second]\n'
+            'three = 3\n'
+        )
+
+        # options of the given section, not the names of the sections
+        self.assertEqual(sorted(cf.options('first')),
+                         ['default', 'one', 'two'])
+        self.assertEqual(sorted(cf.options('second')), ['default', 'three'])
+
+        self.assertRaises(NoSectionError, cf.options, 'missing')
+
     def test_remove_option(self):
         cf = JSONConfigParser()
 
@@ -187,5 +227,980 @@ class JSONConfigTestCase(unittest.TestCase):
         else:  # pragma: no cover
             self.fail()
 
+    def test_invalid_names(self):
+        cf = JSONConfigParser()
+
+        with self.assertRaises(InvalidOptionNameError):
+            cf.read_string((
+                '[section]\n'
+                'valid = 1\n'
+                '-invalid = 2\n'
+            ))
+        # check that nothing was added
+        self.assertEqual(sum(1 for _ in cf.sections()), 0)
+
+        with self.assertRaises(InvalidSectionNameError):
+            cf.read_string((
+                '[-section]\n'
+                'valid = 1\n'
+            ))
+        self.assertEqual(sum(1 for _ in cf.sections()), 0)
+
+
+class FeedParserTestCase(unittest.TestCase):
+    string = (
+        '[section]\n'
+        '# comment\n'
+        'number = 12345\n'
+        'list = [1,\n'
+        '        2,\n'
+        '        3]\n'
+        '\n'
+        '[empty]\n'
+        '[section2]\n'
+        'string = "a string"\n'
+    )
+
+    events = [
+        ('section', None, None),
+        ('section', 'number', 12345),
+        ('section', 'list', [1, 2, 3]),
+        ('empty', None, None),
+        ('section2', None, None),
+        ('section2', 'string', 'a string'),
+    ]
+
+    def test_chunked(self):
+        for chunk_size in range(1, len(self.string) + 1):
+            events = list(iterparse(io.StringIO(self.string),
+                                    chunk_size=chunk_size))
+            self.assertEqual(events, self.events)
+
+    def test_events_emitted_early(self):
+        parser = FeedParser()
+        self.assertEqual(parser.feed('[section]\nnumber = 1'),
+                         [('section', None, None)])
+        self.assertEqual(parser.feed('2\nlist = [1,\n'),
+                         [('section', 'number', 12)])
+        self.assertEqual(parser.feed('2]\n[section2]\n'),
+                         [('section', 'list', [1, 2]),
+                          ('section2', None, None)])
+        self.assertEqual(parser.close(), [])
+
+    def test_error_location(self):
+        string = self.string + 'unmatched = [1,\n2}\n'
+        for chunk_size in (1, 7, len(string)):
+            try:
+                list(iterparse(io.StringIO(string), chunk_size=chunk_size))
+            except ParseError as e:
+                self.assertEqual(e.lineno, 12)
+            else:  # pragma: no cover
+                self.fail()
+
+    def test_crlf_error_location(self):
+        string = '[a]\r\nw = true\r\n bad\r\nk2 = 01\r\n'
+        for chunk_size in range(1, len(string) + 1):
+            try:
+                list(iterparse(io.StringIO(string, newline=''),
+                               chunk_size=chunk_size))
+            except ParseError as e:
+                self.assertEqual(e.lineno, 3)
+                self.assertEqual(e.line.strip(), 'bad')
+            else:  # pragma: no cover
+                self.fail()
+
+        string = '[a]\r\nx = [1,\r\n 2]\r\n\r\ny = {"a":\r\n 1 2}\r\n'
+        for chunk_size in range(1, len(string) + 1):
+            try:
+                list(iterparse(io.StringIO(string, newline=''),
+                               chunk_size=chunk_size))
+            except JSONError as e:
+                self.assertEqual(e.lineno, 6)
+            else:  # pragma: no cover
+                self.fail()
+
+    def test_truncated_value(self):
+        parser = FeedParser()
+        parser.feed('[section]\nlist = [1, 2,\n')
+        self.assertRaises(ParseError, parser.close)
+
+    def test_duplicate_option(self):
+        cf = JSONConfigParser()
+        try:
+            cf.read_file(io.StringIO('[section]\na = 1\n\na = 2\n'))
+        except DuplicateOptionError as e:
+            self.assertEqual(e.lineno, 4)
+            self.assertEqual(sum(1 for _ in cf.sections()), 0)
+        else:  # pragma: no cover
+            self.fail()
+
+
+class FrozenConfigTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cf = JSONConfigParser()
+        self.cf.read_string((
+            '[DEFAULT]\n'
+            'inherited = "default"\n'
+            'overridden = "default"\n'
+            '[section]\n'
+            'overridden = "section"\n'
+            'nested = {"list": [1, 2, {"key": "value"}]}\n'
+        ))
+
+    def test_lookup(self):
+        frozen = self.cf.freeze()
+
+        self.assertEqual(frozen.get('section', 'inherited'), 'default')
+        self.assertEqual(frozen['section']['overridden'], 'section')
+        self.assertEqual(frozen.get('DEFAULT', 'overridden'), 'default')
+        self.assertEqual(frozen.get('section', 'unset', 'fallback'),
+                         'fallback')
+        self.assertEqual(frozen.get('section', 'inherited',
+                                    vars={'inherited': 'vars'}), 'vars')
+        self.assertRaises(NoOptionError, frozen.get, 'section', 'unset')
+        self.assertRaises(NoSectionError, frozen.get, 'unset', 'unset', None)
+        self.assertRaises(KeyError, frozen['section'].__getitem__, 'unset')
+
+        self.assertEqual(list(frozen.sections()), ['section'])
+        self.assertEqual(
+            sorted(frozen.options('section')),
+            ['inherited', 'nested', 'overridden']
+        )
+
+    def test_immutable(self):
+        frozen = self.cf.freeze()
+        nested = frozen.get('section', 'nested')
+
+        self.assertEqual(nested['list'][2]['key'], 'value')
+        with self.assertRaises(TypeError):
+            nested['key'] = 'value'
+        with self.assertRaises(TypeError):
+            nested['list'][2]['key'] = 'value'
+        with self.assertRaises(TypeError):
+            nested['list'][0] = 'value'
+
+        # changes to the parser are not visible in the snapshot
+        self.cf.get('section', 'nested')['list'].append(3)
+        self.cf.set('section', 'overridden', 'changed')
+        self.assertEqual(len(nested['list']), 3)
+        self.assertEqual(frozen.get('section', 'overridden'), 'section')
+
+    def test_hashable(self):
+        a = self.cf.freeze()
+        b = self.cf.freeze()
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(len({a, b}), 1)
+
+        self.cf.set('section', 'overridden', 'changed')
+        self.assertNotEqual(a, self.cf.freeze())
+
+
+class LazyDecodingTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'inherited = {"a": [1, 2, 3]}\n'
+        '[section]\n'
+        'scalar = "string"\n'
+        'nested = [\n'
+        '[1]\n'
+        ']\n'
+        '\n'
+        'brackets = ["]", "["]\n'
+        '# comment\n'
+        'invalid = [1, 2 3]\n'
+    )
+
+    def test_values(self):
+        lazy = JSONConfigParser(lazy=True)
+        lazy.read_string(self.string)
+
+        self.assertEqual(lazy.get('section', 'scalar'), 'string')
+        self.assertEqual(lazy.get('section', 'nested'), [[1]])
+        self.assertEqual(lazy['section']['brackets'], [']', '['])
+        self.assertEqual(lazy.get('section', 'inherited'), {'a': [1, 2, 3]})
+
+    def test_memoized(self):
+        lazy = JSONConfigParser(lazy=True)
+        lazy.read_string(self.string)
+
+        value = lazy.get('section', 'inherited')
+        self.assertIs(lazy.get('section', 'inherited'), value)
+        self.assertIs(lazy.get('DEFAULT', 'inherited'), value)
+
+    def test_deferred_error(self):
+        lazy = JSONConfigParser(lazy=True)
+        lazy.read_string(self.string, fpname='lazy.cfg')
+
+        try:
+            lazy.get('section', 'invalid')
+        except ParseError as e:
+            self.assertEqual(e.lineno, 11)
+            self.assertEqual(e.filename, 'lazy.cfg')
+            self.assertEqual(e.section, 'section')
+        else:  # pragma: no cover
+            self.fail()
+
+    def test_structural_errors(self):
+        for string in ('[section]\nlist = [1, 2\nfoo = 1\n',
+                       '[section]\nlist = [1, 2}\n',
+                       '[section]\nlist = [\n[1]\nfoo = 2\n',
+                       # text that follows a value on later lines
+                       '[section]\nx = {"k": 1,\n "j": 2}\nfoo bar baz {}\n',
+                       '[a]\nx = [1,\n 2]\n[c][c]\n',
+                       '[a]\nx = [1,\n 2] [3]\n',
+                       '[a]\nx = ["a\n]", 1]\n',
+                       # lines that look like statements after a value that
+                       # continues on them
+                       '[a]\nx = [[1]\n[c]\n]\n',
+                       '[a]\nx = ["]", [1]\n[c]\n'):
+            try:
+                JSONConfigParser().read_string(string)
+            except ParseError as e:
+                expected = e
+            else:  # pragma: no cover
+                self.fail()
+
+            try:
+                JSONConfigParser(lazy=True).read_string(string)
+            except ParseError as e:
+                self.assertEqual(str(e), str(expected))
+            else:  # pragma: no cover
+                self.fail()
+
+    def test_freeze(self):
+        lazy = JSONConfigParser(lazy=True)
+        lazy.read_string(self.string.replace('invalid', '# invalid'))
+
+        eager = JSONConfigParser()
+        eager.read_string(self.string.replace('invalid', '# invalid'))
+
+        self.assertEqual(lazy.freeze(), eager.freeze())
+
+    def test_scalars(self):
+        # scalars are decoded straight away by lazy parsers
+        values = [
+            '0', '-0', '12', '-12', '123456789012345678',
+            '1234567890123456789012345', '0.5', '-0.0', '1e3', '1E-3',
+            '-1.5e+300', '1e400', 'true', 'false', 'null', 'NaN',
+            '-Infinity', '""', '"plain"', '"\\u00e9\\n"', '"\xe9"',
+        ]
+        string = '[section]\n' + ''.join(
+            'option%i = %s\n' % (i, value) for i, value in enumerate(values)
+        )
+        eager = JSONConfigParser()
+        eager.read_string(string)
+        lazy = JSONConfigParser(lazy=True)
+        lazy.read_string(string)
+        for i in range(len(values)):
+            expected = eager.get('section', 'option%i' % i)
+            value = lazy.get('section', 'option%i' % i)
+            self.assertIs(type(value), type(expected))
+            self.assertEqual(repr(value), repr(expected))
+
+        for value in ('01', '1.', '.5', '1e', '-', 'True', '"\t"', '1 ',
+                      '"a" "b"', '- 1', '"unterminated'):
+            string = '[section]\noption = %s\n' % value
+            with self.assertRaises(ParseError) as cm:
+                JSONConfigParser().read_string(string)
+            expected = str(cm.exception)
+            with self.assertRaises(ParseError) as cm:
+                JSONConfigParser(lazy=True).read_string(string)
+            self.assertEqual(str(cm.exception), expected)
+
+
+class CheckTestCase(unittest.TestCase):
+    string = (
+        'orphan = 1\n'
+        '[section]\n'
+        'valid = 1\n'
+        'valid = 2\n'
+        'unmatched = [1,\n'
+        '    2}\n'
+        'trailing = "value" junk\n'
+        '-invalid = 3\n'
+        '[section]\n'
+        'valid = 3\n'
+        '[other]\n'
+        'nested = [\n'
+        '[1]\n'
+        ']\n'
+        '???\n'
+    )
+
+    def test_check_string(self):
+        errors = check_string(self.string, 'test.cfg')
+        self.assertEqual(
+            [(type(e), e.lineno) for e in errors],
+            [
+                (MissingSectionHeaderError, 1),
+                (DuplicateOptionError, 4),
+                (JSONError, 6),
+                (ParseError, 7),
+                (InvalidOptionNameError, 8),
+                (DuplicateSectionError, 9),
+                (ParseError, 15),
+            ]
+        )
+        self.assertEqual(errors[2].line, '    2}')
+        self.assertEqual(errors[2].filename, 'test.cfg')
+
+    def test_first_error_matches(self):
+        cf = JSONConfigParser()
+        with self.assertRaises(ParseError) as cm:
+            cf.read_string(self.string, 'test.cfg')
+        self.assertEqual(
+            str(cm.exception), str(check_string(self.string, 'test.cfg')[0])
+        )
+
+    def test_names_checked_last(self):
+        string = '[-x]\n-o = 1\n[section]\nbroken = }\n'
+        errors = check_string(string)
+        self.assertEqual(
+            [type(e) for e in errors],
+            [InvalidSectionNameError, InvalidOptionNameError, JSONError]
+        )
+
+        # `read_string' raises the first error that isn't an invalid name
+        with self.assertRaises(JSONError) as cm:
+            JSONConfigParser().read_string(string)
+        self.assertEqual(str(cm.exception), str(errors[2]))
+
+        with self.assertRaises(InvalidSectionNameError) as cm:
+            JSONConfigParser().read_string('[-x]\n-o = 1\n')
+        self.assertEqual(
+            cm.exception.message, check_string('[-x]\n-o = 1\n')[0].message
+        )
+
+    def test_get_line(self):
+        self.assertEqual(get_line('a\nbc\nd', 3), (2, 1, 'bc\n'))
+        self.assertEqual(get_line('a\nbc\nd', 5), (3, 0, 'd'))
+        self.assertEqual(get_line('a\r\nb\rc\u2028d', 5), (3, 0, 'c\u2028'))
+        with self.assertRaises(IndexError):
+            get_line('a\n', 2)
+
+    def test_valid(self):
+        self.assertEqual(check_string('[section]\nvalue = [1,\n2]\n'), [])
+
+    def test_check_file(self):
+        errors = check_file(io.StringIO('[section]\nbroken = }\n'))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].lineno, 2)
+
+
+class WriteTestCase(unittest.TestCase):
+    def test_dumps(self):
+        cf = JSONConfigParser(defaults={'shared': [1, 2]})
+        cf.read_string((
+            '[section]\n'
+            'dict = {"a": 1, "b": [true, null]}\n'
+            'string = "\\u00e9\\"quoted\\""\n'
+            '[empty]\n'
+        ))
+        self.assertEqual(cf.dumps(), (
+            '[DEFAULT]\n'
+            'shared = [1, 2]\n'
+            '\n'
+            '[section]\n'
+            'dict = {"a": 1, "b": [true, null]}\n'
+            'string = "\\u00e9\\"quoted\\""\n'
+            '\n'
+            '[empty]\n'
+            '\n'
+        ))
+        self.assertEqual(
+            cf.dumps(compact=True).splitlines()[4],
+            'dict = {"a":1,"b":[true,null]}',
+        )
+        self.assertEqual(
+            cf.dumps(indent=2).splitlines()[1:5],
+            ['shared = [', '  1,', '  2', ']'],
+        )
+
+    def test_round_trip(self):
+        # 20000 options
+        string = generate_config(sections=500, options=40)
+        cf = JSONConfigParser()
+        cf.read_string(string)
+        expected = cf.freeze()
+
+        for kwargs in [{}, {'compact': True}, {'indent': 4}]:
+            result = JSONConfigParser()
+            result.read_string(cf.dumps(**kwargs))
+            self.assertEqual(result.freeze(), expected)
+
+        # values that have not been decoded are copied from the source
+        lazy = JSONConfigParser(lazy=True)
+        lazy.read_string(string)
+        result = JSONConfigParser()
+        result.read_string(lazy.dumps())
+        self.assertEqual(result.freeze(), expected)
+
+    def test_write(self):
+        cf = JSONConfigParser()
+        cf.read_string('[a]\nx = 1\n[b]\ny = 2\n')
+        fp = io.StringIO()
+        cf.write(fp)
+        self.assertEqual(fp.getvalue(), cf.dumps())
+
+
+class GetCacheTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'inherited = "default"\n'
+        '[section]\n'
+        'value = 1\n'
+        '[other]\n'
+        'value = 2\n'
+    )
+
+    def setUp(self):
+        self.cf = JSONConfigParser(get_cache_size=4)
+        self.cf.read_string(self.string)
+
+    def test_hits(self):
+        for _ in range(3):
+            self.assertEqual(self.cf.get('section', 'value'), 1)
+            self.assertEqual(self.cf.get('section', 'inherited'), 'default')
+            self.assertEqual(self.cf.get('section', 'missing', None), None)
+        info = self.cf.get_cache_info()
+        self.assertEqual((info.hits, info.misses), (6, 3))
+        self.assertEqual((info.maxsize, info.currsize), (4, 3))
+
+        with self.assertRaises(NoOptionError):
+            self.cf.get('section', 'missing')
+        with self.assertRaises(NoSectionError):
+            self.cf.get('missing', 'value')
+
+    def test_vars(self):
+        self.cf.get('section', 'value')
+        self.assertEqual(
+            self.cf.get('section', 'value', vars={'value': 3}), 3
+        )
+        self.assertEqual(
+            self.cf.get('section', 'value', vars={'other': 3}), 1
+        )
+        self.assertEqual(
+            self.cf.get('section', 'missing', vars={'missing': 4}), 4
+        )
+        self.assertEqual(self.cf.get_cache_info().hits, 1)
+
+    def test_eviction(self):
+        for i in range(10):
+            self.cf.set('section', 'option%i' % i, i)
+        for i in range(10):
+            self.cf.get('section', 'option%i' % i)
+        self.assertEqual(self.cf.get_cache_info().currsize, 4)
+
+        # the most recently used entries are kept
+        self.cf.get('section', 'option6')
+        self.cf.get('section', 'option0')
+        self.cf.get('section', 'option6')
+        info = self.cf.get_cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 11))
+
+    def test_invalidation(self):
+        def check(section, option, expected):
+            self.cf.get(section, option, None)
+            self.assertEqual(self.cf.get(section, option, None), expected)
+
+        check('section', 'value', 1)
+        self.cf.set('section', 'value', 3)
+        check('section', 'value', 3)
+        self.cf['section']['value'] = 4
+        check('section', 'value', 4)
+        self.cf.remove_option('section', 'value')
+        check('section', 'value', None)
+        self.cf.read_string('[section]\nvalue = 5\n')
+        check('section', 'value', 5)
+        self.cf.read_dict({'section': {'value': 6}})
+        check('section', 'value', 6)
+        self.cf['section'] = {'other': 1}
+        check('section', 'value', None)
+
+        check('other', 'inherited', 'default')
+        self.cf.set('DEFAULT', 'inherited', 'changed')
+        check('other', 'inherited', 'changed')
+        self.cf['DEFAULT'] = {}
+        check('other', 'inherited', None)
+
+        self.cf.remove_section('other')
+        with self.assertRaises(NoSectionError):
+            self.cf.get('other', 'value')
+
+    def test_lazy(self):
+        cf = JSONConfigParser(lazy=True, get_cache_size=4)
+        cf.read_string(self.string)
+        self.assertEqual(cf.get('section', 'value'), 1)
+        self.assertEqual(cf.get('section', 'value'), 1)
+        self.assertEqual(cf.get_cache_info().hits, 1)
+
+    def test_disabled(self):
+        cf = JSONConfigParser()
+        cf.read_string(self.string)
+        cf.get('section', 'value')
+        self.assertEqual(tuple(cf.get_cache_info()), (0, 0, 0, 0))
+
+
+class CompactTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'shared = "default"\n'
+        '[tenant0]\n'
+        'host = "a"\n'
+        'port = 1\n'
+        '[tenant1]\n'
+        'host = "b"\n'
+        'port = 2\n'
+        'shared = "own"\n'
+        '[tenant2]\n'
+        'host = "c"\n'
+        'port = 3\n'
+    )
+
+    def parse(self, string, **kwargs):
+        cf = JSONConfigParser(compact=True, **kwargs)
+        cf.read_string(string)
+        return cf
+
+    def test_equivalent(self):
+        string = generate_config(sections=20, options=5, seed=3)
+        for lazy in (False, True):
+            expected = JSONConfigParser(lazy=lazy)
+            expected.read_string(string)
+            cf = self.parse(string, lazy=lazy)
+
+            self.assertEqual(cf.freeze(), expected.freeze())
+            self.assertEqual(cf.dumps(), expected.dumps())
+            for section in expected.sections():
+                self.assertEqual(
+                    list(cf.options(section)),
+                    list(expected.options(section)),
+                )
+                self.assertEqual(dict(cf[section]), dict(expected[section]))
+
+    def test_shared_layouts(self):
+        cf = self.parse(self.string)
+        layout = cf._sections['tenant0'].maps[0]._layout
+        self.assertIs(cf._sections['tenant2'].maps[0]._layout, layout)
+        self.assertIsNot(cf._sections['tenant1'].maps[0]._layout, layout)
+
+        # option names are shared between sections
+        names = [
+            list(cf._sections[section].maps[0])
+            for section in ('tenant0', 'tenant1')
+        ]
+        self.assertIs(names[0][0], names[1][0])
+
+    def test_modify(self):
+        cf = self.parse(self.string)
+        cf.set('tenant0', 'shared', 'set')
+        self.assertEqual(cf.get('tenant0', 'shared'), 'set')
+        self.assertEqual(cf.get('tenant2', 'shared'), 'default')
+
+        cf.remove_option('tenant0', 'host')
+        self.assertEqual(list(cf['tenant0']), ['shared', 'port'])
+        self.assertFalse(cf.has_option('tenant0', 'host'))
+        self.assertEqual(cf.get('tenant0', 'port'), 1)
+        self.assertFalse(cf.remove_option('tenant0', 'host'))
+
+        cf.set('tenant0', 'host', 'd')
+        self.assertEqual(cf.get('tenant0', 'host'), 'd')
+        self.assertEqual(cf.get('tenant2', 'host'), 'c')
+
+        cf['tenant2'] = {'other': 1}
+        self.assertEqual(list(cf.options('tenant2')), ['shared', 'other'])
+
+        del cf['tenant1']
+        self.assertNotIn('tenant1', cf)
+
+    def test_pickle(self):
+        string = self.string + '[large]\n' + ''.join(
+            'option%i = %i\n' % (i, i) for i in range(500)
+        )
+        cf = pickle.loads(pickle.dumps(self.parse(string)))
+
+        self.assertEqual(cf.get('large', 'option499'), 499)
+        self.assertEqual(len(cf.options('large')), 501)
+        self.assertIs(
+            cf._sections['tenant2'].maps[0]._layout,
+            cf._sections['tenant0'].maps[0]._layout,
+        )
+        self.assertIs(cf._sections['tenant0'].maps[0]._layout.root,
+                      cf._layouts)
+
+        cf.set('large', 'extra', True)
+        cf.remove_option('large', 'option0')
+        self.assertEqual(list(cf['large'])[-2:], ['option499', 'extra'])
+
+    def test_proxies(self):
+        cf = self.parse(self.string)
+        self.assertEqual(cf['tenant0']['host'], 'a')
+        self.assertEqual(cf['DEFAULT']['shared'], 'default')
+        cf['tenant0']['port'] = 4
+        self.assertEqual(cf.get('tenant0', 'port'), 4)
+        del cf['tenant0']['port']
+        self.assertNotIn('port', cf['tenant0'])
+        with self.assertRaises(KeyError):
+            cf['missing']
+        with self.assertRaises(AttributeError):
+            cf['tenant0'].attribute = 1
+
+
+class QueryTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'port = 80\n'
+        '[web]\n'
+        'routes = {"eu": [{"host": "a"}, {"host": "b", "port": 1}],\n'
+        '          "us": [{"host": "c"}], "a.b": {"c": 1}}\n'
+        '[db]\n'
+        'port = 5432\n'
+        'hosts = ["x", "y"]\n'
+        '[other]\n'
+    )
+
+    def setUp(self):
+        self.cf = JSONConfigParser()
+        self.cf.read_string(self.string)
+
+    def test_query(self):
+        cf = self.cf
+        self.assertEqual(cf.query('web', 'routes.eu[1].host'), 'b')
+        self.assertEqual(cf.query('web', 'routes.eu[-1].port'), 1)
+        self.assertEqual(cf.query('web', 'routes["a.b"].c'), 1)
+        self.assertEqual(cf.query('web', 'routes.us'), [{'host': 'c'}])
+        self.assertEqual(cf.query('web', 'port'), 80)
+        self.assertEqual(cf['db'].query('hosts[0]'), 'x')
+
+    def test_wildcard(self):
+        cf = self.cf
+        self.assertEqual(cf.query('web', 'routes.eu[*].host'), ['a', 'b'])
+        self.assertEqual(cf.query('web', 'routes.*[*].port'), [1])
+        self.assertEqual(cf.query('web', 'routes.*[0].host'), ['a', 'c'])
+        self.assertEqual(cf.query('db', 'hosts[*]'), ['x', 'y'])
+        self.assertEqual(cf.query('db', 'port.*'), [])
+
+        # results are copied
+        cf.query('db', 'hosts[*]').append('z')
+        self.assertEqual(cf.query('db', 'hosts[*]'), ['x', 'y'])
+
+    def test_missing(self):
+        cf = self.cf
+        for path in ('routes.eu[2]', 'routes.eu.host', 'routes.us[0].port',
+                     'routes[0]', 'port.a'):
+            with self.assertRaises(KeyError):
+                cf.query('web', path)
+            self.assertIsNone(cf.query('web', path, None))
+        with self.assertRaises(NoOptionError):
+            cf.query('web', 'missing.a')
+        with self.assertRaises(NoSectionError):
+            cf.query('missing', 'port')
+        for path in ('', 'routes.', 'routes[a]', 'routes..a', '.routes'):
+            with self.assertRaises(ValueError):
+                cf.query('web', path)
+
+    def test_query_all(self):
+        cf = self.cf
+        self.assertEqual(
+            dict(cf.query_all('port')), {'web': 80, 'db': 5432, 'other': 80},
+        )
+        self.assertEqual(list(cf.query_all('hosts[1]')), ['db'])
+        self.assertEqual(
+            dict(cf.query_all('routes.*[*].host', ['web', 'db', 'missing'])),
+            {'web': ['a', 'b', 'c']},
+        )
+
+    def test_invalidation(self):
+        cf = self.cf
+        self.assertEqual(cf.query('db', 'hosts[1]'), 'y')
+        self.assertEqual(cf.query_all('hosts[1]'), {'db': 'y'})
+        cf.set('db', 'hosts', ['z'])
+        self.assertIsNone(cf.query('db', 'hosts[1]', None))
+        self.assertEqual(cf.query_all('hosts[1]'), {})
+
+        cf.set('DEFAULT', 'port', 8080)
+        self.assertEqual(cf.query('other', 'port'), 8080)
+
+        # new sections inherit from the default section
+        self.assertNotIn('new', cf.query_all('port'))
+        cf.add_section('new')
+        self.assertEqual(cf.query_all('port')['new'], 8080)
+
+
+class ReadBytesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, data):
+        filename = os.path.join(self.tmpdir.name, 'test.cfg')
+        with open(filename, 'wb') as fp:
+            fp.write(data)
+        return filename
+
+    def read_all(self, data, **kwargs):
+        """Parse `data' with `read' and each of the bytes entry points and
+        return a list of the results.
+        """
+        filename = self.write(data)
+        results = []
+        for method in ('read', 'read_mmap', 'read_bytes', 'read_bytes_view'):
+            cf = JSONConfigParser(**kwargs)
+            try:
+                if method == 'read':
+                    cf.read(filename, encoding='utf-8')
+                elif method == 'read_mmap':
+                    cf.read_mmap(filename)
+                elif method == 'read_bytes':
+                    cf.read_bytes(data, filename, chunk_size=7)
+                else:
+                    cf.read_bytes(memoryview(data), filename)
+            except ParseError as e:
+                results.append((str(e), e.lineno, e.line))
+            else:
+                results.append(cf.freeze())
+        return results
+
+    def test_equivalent(self):
+        string = generate_config(sections=20, options=5) + (
+            '\n[unicode]\nvalue = ["\xe9\u20ac\U0001f600"]\n'
+        )
+        for data in (string, string.replace('\n', '\r\n'),
+                     string.replace('\n', '\r')):
+            for kwargs in ({}, {'lazy': True}, {'track_locations': True}):
+                results = self.read_all(data.encode('utf-8'), **kwargs)
+                self.assertIsInstance(results[0], FrozenConfig)
+                for result in results[1:]:
+                    self.assertEqual(result, results[0])
+
+    def test_errors(self):
+        for string in ('[section]\nvalue = 1\r\nbroken = [1,\n2 3]\n',
+                       '[section]\nvalue = "\xe9\xe9\xe9" 1\n',
+                       '[section]\r\n-invalid = 1\r\n',
+                       'orphan = 1\n'):
+            results = self.read_all(string.encode('utf-8'))
+            self.assertIsInstance(results[0], tuple)
+            for result in results[1:]:
+                self.assertEqual(result, results[0])
+
+    def test_bom(self):
+        cf = JSONConfigParser()
+        cf.read_bytes(b'\xef\xbb\xbf[section]\nvalue = 1\n')
+        self.assertEqual(cf.get('section', 'value'), 1)
+
+    def test_empty(self):
+        cf = JSONConfigParser()
+        cf.read_mmap(self.write(b''))
+        self.assertEqual(list(cf.sections()), [])
+
+
+class ExportTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'port = 80\n'
+        'debug = false\n'
+        '[web]\n'
+        'hosts = ["a", "b"]\n'
+        'port = 8080\n'
+        '[db]\n'
+        'options = {"timeout": 5}\n'
+        '[empty]\n'
+    )
+
+    def parsers(self):
+        for kwargs in ({}, {'lazy': True}, {'compact': True}):
+            cf = JSONConfigParser(**kwargs)
+            cf.read_string(self.string)
+            yield cf
+
+    def test_to_dict(self):
+        for cf in self.parsers():
+            self.assertEqual(cf.to_dict(), {
+                'DEFAULT': {'port': 80, 'debug': False},
+                'web': {'hosts': ['a', 'b'], 'port': 8080},
+                'db': {'options': {'timeout': 5}},
+                'empty': {},
+            })
+            merged = cf.to_dict(merge_defaults=True)
+            self.assertEqual(merged['web'], {
+                'port': 8080, 'debug': False, 'hosts': ['a', 'b'],
+            })
+            self.assertEqual(merged['empty'], {'port': 80, 'debug': False})
+            self.assertEqual(list(merged['db']), ['port', 'debug', 'options'])
+
+            # round trips through `read_dict'
+            copy = JSONConfigParser()
+            copy.read_dict(cf.to_dict())
+            self.assertEqual(copy.to_dict(), cf.to_dict())
+
+    def test_items(self):
+        for cf in self.parsers():
+            self.assertEqual(cf.items('web'), [
+                ('port', 8080), ('debug', False), ('hosts', ['a', 'b']),
+            ])
+            self.assertEqual(cf['db'].items(), [
+                ('port', 80), ('debug', False), ('options', {'timeout': 5}),
+            ])
+            self.assertEqual(cf['DEFAULT'].items(), cf.items('DEFAULT'))
+            self.assertEqual(
+                [name for name, section in cf.items()],
+                ['DEFAULT', 'web', 'db', 'empty'],
+            )
+            self.assertRaises(NoSectionError, cf.items, 'missing')
+
+    def test_iteroptions(self):
+        for cf in self.parsers():
+            self.assertEqual(list(cf.iteroptions()), [
+                ('DEFAULT', 'port', 80),
+                ('DEFAULT', 'debug', False),
+                ('web', 'hosts', ['a', 'b']),
+                ('web', 'port', 8080),
+                ('db', 'options', {'timeout': 5}),
+            ])
+            self.assertEqual(
+                len(list(cf.iteroptions(merge_defaults=True))), 10,
+            )
+
+    def test_default_proxy(self):
+        cf = JSONConfigParser()
+        cf.read_string(self.string)
+        self.assertEqual(dict(cf['DEFAULT']), {'port': 80, 'debug': False})
+        self.assertEqual(len(cf['DEFAULT']), 2)
+        with self.assertRaises(KeyError):
+            cf['web']['missing']
+
+        # copies the options each section inherits along with its own
+        copy = JSONConfigParser()
+        copy.read_dict(cf)
+        self.assertEqual(
+            copy.to_dict(merge_defaults=True),
+            cf.to_dict(merge_defaults=True),
+        )
+
+
+class InternTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'origins = ["a.example", "b.example"]\n'
+        '[tenant1]\n'
+        'origins = ["a.example", "b.example"]\n'
+        'features = {"x": true, "y": [1, 2]}\n'
+        '[tenant2]\n'
+        'features = {"x": true, "y": [1, 2]}\n'
+        'nested = [\n'
+        '[1]\n'
+        ']\n'
+        '[tenant3]\n'
+        'features = {"x": true, "y": [1, 2]}\n'
+        'nested = [\n'
+        '[1]\n'
+        ']\n'
+    )
+
+    def setUp(self):
+        self.cf = JSONConfigParser(intern_values=True)
+        self.cf.read_string(self.string)
+
+    def test_shared(self):
+        cf = self.cf
+        self.assertIs(
+            cf.get('tenant1', 'features'), cf.get('tenant3', 'features'),
+        )
+        self.assertIs(
+            cf.get('tenant1', 'origins'), cf.get('DEFAULT', 'origins'),
+        )
+        self.assertIs(cf.get('tenant2', 'nested'), cf.get('tenant3', 'nested'))
+        self.assertEqual(
+            cf.get('tenant1', 'origins'), ('a.example', 'b.example'),
+        )
+        self.assertEqual(
+            cf.get('tenant2', 'features'), {'x': True, 'y': (1, 2)},
+        )
+        self.assertEqual(cf.get('tenant2', 'nested'), ((1,),))
+        self.assertEqual(cf.query('tenant2', 'features.y[1]'), 2)
+
+        info = cf.intern_info()
+        self.assertEqual(info.hits, 4)
+        self.assertEqual(info.misses, 3)
+        self.assertGreater(info.saved_bytes, 0)
+
+    def test_immutable(self):
+        features = self.cf.get('tenant1', 'features')
+        with self.assertRaises(TypeError):
+            features['x'] = False
+        with self.assertRaises(TypeError):
+            features.update(x=False)
+        with self.assertRaises(AttributeError):
+            features['y'].append(3)
+        self.assertEqual(self.cf.get('tenant2', 'features')['x'], True)
+
+        # copies can be changed freely
+        copy = features.copy()
+        copy['x'] = False
+        self.assertEqual(self.cf.get('tenant2', 'features')['x'], True)
+
+    def test_write(self):
+        cf = JSONConfigParser()
+        cf.read_string(self.cf.dumps())
+        self.assertEqual(cf.get('tenant2', 'features'), {
+            'x': True, 'y': [1, 2],
+        })
+
+    def test_pickle(self):
+        cf = pickle.loads(pickle.dumps(self.cf))
+        features = cf.get('tenant1', 'features')
+        self.assertEqual(features, {'x': True, 'y': (1, 2)})
+        self.assertRaises(TypeError, features.pop, 'x')
+
+    def test_lazy(self):
+        cf = JSONConfigParser(intern_values=True, lazy=True)
+        cf.read_string(self.string)
+        self.assertIs(
+            cf.get('tenant1', 'features'), cf.get('tenant2', 'features'),
+        )
+
+    def test_chunked(self):
+        cf = JSONConfigParser(intern_values=True)
+        cf.read_bytes(
+            (self.string + '[tenant4]\nlimit = 123456\n').encode('utf-8'),
+            chunk_size=7,
+        )
+        self.assertEqual(cf.get('tenant4', 'limit'), 123456)
+        self.assertIs(
+            cf.get('tenant1', 'features'), cf.get('tenant2', 'features'),
+        )
+        self.assertEqual(cf.intern_info().hits, 4)
+
 
-suite = unittest.TestLoader().loadTestsFromTestCase(JSONConfigTestCase)
+# the other test modules are loaded as modules rather than by importing their
+# test cases here, where discovery would find and run them a second time
+_loader = unittest.TestLoader()
+suite = unittest.TestSuite([
+    _loader.loadTestsFromTestCase(JSONConfigTestCase),
+    _loader.loadTestsFromTestCase(FeedParserTestCase),
+    _loader.loadTestsFromTestCase(FrozenConfigTestCase),
+    _loader.loadTestsFromTestCase(LazyDecodingTestCase),
+    _loader.loadTestsFromTestCase(CheckTestCase),
+    _loader.loadTestsFromTestCase(WriteTestCase),
+    _loader.loadTestsFromTestCase(GetCacheTestCase),
+    _loader.loadTestsFromTestCase(CompactTestCase),
+    _loader.loadTestsFromTestCase(QueryTestCase),
+    _loader.loadTestsFromTestCase(ReadBytesTestCase),
+    _loader.loadTestsFromTestCase(ExportTestCase),
+    _loader.loadTestsFromTestCase(InternTestCase),
+    _loader.loadTestsFromModule(test_cache),
+    _loader.loadTestsFromModule(test_read),
+    _loader.loadTestsFromModule(test_reload),
+    _loader.loadTestsFromModule(test_benchmark),
+    _loader.loadTestsFromModule(test_schema),
+    _loader.loadTestsFromModule(test_instrument),
+    _loader.loadTestsFromModule(test_overlay),
+    _loader.loadTestsFromModule(test_cow),
+    _loader.loadTestsFromModule(test_index),
+    _loader.loadTestsFromModule(test_diff),
+])
+if sys.version_info >= (3, 5):
+    suite.addTest(_loader.loadTestsFromModule(test_aio))
+if sys.version_info >= (3, 8):
+    suite.addTest(_loader.loadTestsFromModule(test_shm))
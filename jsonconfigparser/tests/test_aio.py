@@ -0,0 +1,108 @@
+import os
+import asyncio
+import unittest
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from jsonconfigparser import JSONConfigParser, ParseError
+
+
+class AsyncReadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filenames = []
+        for i in range(10):
+            self.filenames.append(self.write('%02i.cfg' % i, (
+                '[DEFAULT]\n'
+                'last = %i\n'
+                '[section%i]\n'
+                'value = %i\n'
+                '[shared]\n'
+                'value = %i\n'
+            ) % (i, i % 3, i, i)))
+
+    def tearDown(self):
+        self.loop.close()
+        self.tmpdir.cleanup()
+
+    def write(self, name, string):
+        filename = os.path.join(self.tmpdir.name, name)
+        with open(filename, 'w') as fp:
+            fp.write(string)
+        return filename
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def read_stream(self, cf, data, **kwargs):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            await cf.aread_stream(reader, 'stream', **kwargs)
+        self.run_async(read())
+
+    def test_aread(self):
+        expected = JSONConfigParser()
+        expected.read(self.filenames)
+
+        cf = JSONConfigParser()
+        self.run_async(cf.aread(self.filenames))
+        self.assertEqual(cf.freeze(), expected.freeze())
+        self.assertEqual(cf.get('shared', 'value'), 9)
+        self.assertEqual(cf.get('section2', 'last'), 9)
+
+        with ThreadPoolExecutor(4) as executor:
+            cf = JSONConfigParser(lazy=True)
+            self.run_async(cf.aread(self.filenames, executor=executor))
+        self.assertEqual(cf.freeze(), expected.freeze())
+
+    def test_aread_process_pool(self):
+        expected = JSONConfigParser(lazy=True)
+        expected.read(self.filenames)
+
+        cf = JSONConfigParser(lazy=True, track_locations=True)
+        with ProcessPoolExecutor(2) as executor:
+            self.run_async(cf.aread(self.filenames, executor=executor))
+        self.assertEqual(cf.freeze(), expected.freeze())
+        self.assertEqual(cf.location('section2', 'value')[1], 4)
+
+    def test_aread_missing(self):
+        filenames = self.filenames[:2] + ['missing.cfg']
+
+        cf = JSONConfigParser()
+        with self.assertRaises(OSError):
+            self.run_async(cf.aread(filenames))
+
+        cf = JSONConfigParser()
+        self.run_async(cf.aread(filenames, skip=True))
+        self.assertEqual(cf.get('shared', 'value'), 1)
+
+    def test_aread_error(self):
+        broken = self.write('broken.cfg', '[section0]\nvalue = {\n')
+        cf = JSONConfigParser()
+        with self.assertRaises(ParseError) as cm:
+            self.run_async(cf.aread(self.filenames[:2] + [broken]))
+        self.assertEqual(cm.exception.filename, broken)
+
+    def test_aread_stream(self):
+        with open(self.filenames[0]) as fp:
+            data = fp.read() + '[unicode]\nvalue = "\xe9\xe9\xe9"\n'
+        data = data.encode('utf-8')
+
+        for lazy in (False, True):
+            cf = JSONConfigParser(lazy=lazy)
+            # multibyte characters are split between chunks
+            self.read_stream(cf, data, chunk_size=7)
+            self.assertEqual(cf.get('section0', 'value'), 0)
+            self.assertEqual(cf.get('unicode', 'value'), '\xe9\xe9\xe9')
+
+    def test_aread_stream_error(self):
+        cf = JSONConfigParser()
+        with self.assertRaises(ParseError) as cm:
+            self.read_stream(cf, b'[section]\nvalue = 1\nbroken = }\n')
+        self.assertEqual(cm.exception.filename, 'stream')
+        self.assertEqual(cm.exception.lineno, 3)
+        self.assertEqual(list(cf.sections()), [])
@@ -0,0 +1,38 @@
+import os
+import json
+import unittest
+import tempfile
+
+from jsonconfigparser import JSONConfigParser
+from jsonconfigparser import benchmark
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def test_generate_config(self):
+        string = benchmark.generate_config(
+            sections=10, options=5, nesting=3, comment_density=0.5,
+        )
+        cf = JSONConfigParser()
+        cf.read_string(string)
+        self.assertEqual(len(cf.sections()), 10)
+        self.assertEqual(len(cf.options('section3')), 10)
+
+        # output is deterministic
+        self.assertEqual(string, benchmark.generate_config(
+            sections=10, options=5, nesting=3, comment_density=0.5,
+        ))
+
+    def test_json_output(self):
+        # every benchmark is run so that they all at least work in quick mode
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'results.json')
+            benchmark.main(['--quick', '--json', '-o', filename])
+            with open(filename) as fp:
+                report = json.load(fp)
+
+        self.assertEqual(
+            sorted(report['results']),
+            sorted(name for name, _ in benchmark._BENCHMARKS),
+        )
+        for result in report['results']['parse']:
+            self.assertGreater(result['seconds'], 0)
@@ -0,0 +1,77 @@
+import os
+import unittest
+import tempfile
+
+from jsonconfigparser import JSONConfigParser, ParseError
+from jsonconfigparser.cache import ConfigCache
+
+
+class ConfigCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ConfigCache(os.path.join(self.tmpdir.name, 'cache'))
+        self.filename = os.path.join(self.tmpdir.name, 'config.cfg')
+        self.write((
+            '[section]\n'
+            'foo = "bar"\n'
+            'list = [1,\n'
+            '        2]\n'
+        ))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, string):
+        with open(self.filename, 'w') as fp:
+            fp.write(string)
+
+    def test_hit_and_miss(self):
+        cf = JSONConfigParser()
+        cf.read(self.filename, cache=self.cache)
+        self.assertFalse(self.cache.was_hit(self.filename))
+
+        cf = JSONConfigParser()
+        cf.read(self.filename, cache=self.cache)
+        self.assertTrue(self.cache.was_hit(self.filename))
+        self.assertEqual(cf.get('section', 'foo'), 'bar')
+        self.assertEqual(cf.get('section', 'list'), [1, 2])
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_invalidated_by_change(self):
+        JSONConfigParser().read(self.filename, cache=self.cache)
+
+        # same size and mtime, different content
+        stat = os.stat(self.filename)
+        self.write((
+            '[section]\n'
+            'foo = "baz"\n'
+            'list = [3,\n'
+            '        4]\n'
+        ))
+        os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        cf = JSONConfigParser()
+        cf.read(self.filename, cache=self.cache)
+        self.assertFalse(self.cache.was_hit(self.filename))
+        self.assertEqual(cf.get('section', 'foo'), 'baz')
+
+    def test_errors_not_cached(self):
+        self.write('[section]\nfoo = [1, 2}\n')
+        for _ in range(2):
+            with self.assertRaises(ParseError) as cm:
+                JSONConfigParser().read(self.filename, cache=self.cache)
+            self.assertEqual(cm.exception.filename, self.filename)
+
+    def test_eviction(self):
+        cache = ConfigCache(self.cache.directory, max_size=1)
+        JSONConfigParser().read(self.filename, cache=cache)
+        self.assertEqual(os.listdir(cache.directory), [])
+
+    def test_skip_missing(self):
+        cf = JSONConfigParser()
+        cf.read(os.path.join(self.tmpdir.name, 'missing.cfg'),
+                cache=self.cache, skip=True)
+        self.assertRaises(OSError, cf.read,
+                          os.path.join(self.tmpdir.name, 'missing.cfg'),
+                          cache=self.cache)
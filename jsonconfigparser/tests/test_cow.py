@@ -0,0 +1,149 @@
+import os
+import gc
+import random
+import weakref
+import tempfile
+import threading
+import unittest
+
+from jsonconfigparser import JSONConfigParser, NoSectionError
+from jsonconfigparser.cow import VersionedConfig
+
+
+class VersionedConfigTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'inherited = 1\n'
+        '[a]\n'
+        'value = [1, 2]\n'
+        '[b]\n'
+        'inherited = 2\n'
+    )
+
+    def setUp(self):
+        self.expected = JSONConfigParser()
+        self.expected.read_string(self.string)
+        parser = JSONConfigParser()
+        parser.read_string(self.string)
+        self.config = VersionedConfig(parser)
+
+    def apply(self, method, *args):
+        getattr(self.config, method)(*args)
+        getattr(self.expected, method)(*args)
+        self.assertEqual(self.config.snapshot(), self.expected.freeze())
+
+    def test_get(self):
+        config = self.config
+        self.assertEqual(config.version, 0)
+        self.assertEqual(config.get('a', 'value'), (1, 2))
+        self.assertEqual(config.get('a', 'inherited'), 1)
+        self.assertEqual(config.get('b', 'inherited'), 2)
+        self.assertEqual(config.get('a', 'missing', None), None)
+        self.assertEqual(config.sections(), ['a', 'b'])
+        self.assertTrue(config.has_option('a', 'inherited'))
+        with self.assertRaises(NoSectionError):
+            config.get('c', 'value')
+
+    def test_writes(self):
+        self.apply('set', 'a', 'value', {'a': [1]})
+        self.apply('set', 'DEFAULT', 'inherited', 3)
+        self.apply('set', 'DEFAULT', 'new', 4)
+        self.apply('remove_option', 'b', 'inherited')
+        self.apply('remove_option', 'DEFAULT', 'inherited')
+        self.apply('add_section', 'c')
+        self.apply('read_dict', {'c': {'x': 1}, 'DEFAULT': {'y': 2}})
+        self.apply('read_string', '[d]\nz = 3\n[a]\nvalue = 5\n')
+        self.apply('remove_section', 'a')
+        self.assertEqual(self.config.version, 9)
+
+        # failed writes don't publish a new version
+        with self.assertRaises(NoSectionError):
+            self.config.set('missing', 'option', 1)
+        self.assertFalse(self.config.remove_section('missing'))
+        with self.assertRaises(ValueError):
+            self.config.read_dict({'section': {'-invalid': 1}})
+        self.assertEqual(self.config.version, 9)
+
+    def test_read(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filenames = []
+            for i in range(3):
+                filenames.append(os.path.join(tmpdir, '%i.cfg' % i))
+                with open(filenames[-1], 'w') as fp:
+                    fp.write('[a]\nvalue = %i\n[file%i]\n' % (i, i))
+            self.config.read(filenames + ['missing.cfg'], skip=True)
+            self.expected.read(filenames)
+        self.assertEqual(self.config.snapshot(), self.expected.freeze())
+        self.assertEqual(self.config.version, 1)
+
+    def test_random(self):
+        rng = random.Random(0)
+        sections = ['DEFAULT', 'a', 'b', 'c']
+        options = ['x', 'y', 'inherited']
+        for _ in range(500):
+            section = rng.choice(sections)
+            if rng.random() < 0.1 and section != 'DEFAULT':
+                if rng.random() < 0.5:
+                    self.apply('add_section', section)
+                else:
+                    self.apply('remove_section', section)
+            elif section != 'DEFAULT' and section not in self.expected:
+                continue
+            elif rng.random() < 0.7:
+                self.apply('set', section, rng.choice(options), rng.random())
+            else:
+                self.apply('remove_option', section, rng.choice(options))
+
+    def test_sharing(self):
+        old = self.config.snapshot()
+        self.config.set('a', 'value', 1)
+        new = self.config.snapshot()
+        self.assertEqual(old.version, 0)
+        self.assertEqual(old.get('a', 'value'), (1, 2))
+        self.assertIs(old['b'], new['b'])
+        self.assertIsNot(old['a'], new['a'])
+
+        ref = weakref.ref(old)
+        del old
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_stress(self):
+        # each write sets both options to the same value, which readers must
+        # always see together
+        config = VersionedConfig()
+        config.read_dict({'section': {'a': 0, 'b': 0}, 'DEFAULT': {'c': 0}})
+        writes = 500
+        errors = []
+        done = threading.Event()
+
+        def read():
+            last = 0
+            try:
+                while not done.is_set():
+                    snapshot = config.snapshot()
+                    a = snapshot.get('section', 'a')
+                    self.assertEqual(snapshot.get('section', 'b'), a)
+                    self.assertEqual(snapshot.get('section', 'c'), a)
+                    self.assertGreaterEqual(snapshot.version, last)
+                    last = snapshot.version
+                    config.get('section', 'a')
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(8)]
+        for thread in readers:
+            thread.start()
+        try:
+            for i in range(1, writes + 1):
+                config.read_dict({
+                    'section': {'a': i, 'b': i}, 'DEFAULT': {'c': i},
+                })
+        finally:
+            done.set()
+            for thread in readers:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(config.get('section', 'c'), writes)
+        self.assertEqual(config.version, writes + 1)
@@ -0,0 +1,115 @@
+import unittest
+
+from jsonconfigparser import JSONConfigParser
+from jsonconfigparser.diff import diff, apply_patch, Change, PatchError
+
+
+class DiffTestCase(unittest.TestCase):
+    old = (
+        '[DEFAULT]\n'
+        'port = 80\n'
+        'debug = false\n'
+        '[web]\n'
+        'hosts = ["a", "b"]\n'
+        '[db]\n'
+        'port = 5432\n'
+        'enabled = 1\n'
+        '[cache]\n'
+        'size = 10\n'
+    )
+    new = (
+        '[DEFAULT]\n'
+        'port = 8080\n'
+        'debug = false\n'
+        '[web]\n'
+        'hosts = ["a", "b"]\n'
+        '[db]\n'
+        'port = 5432\n'
+        'enabled = true\n'
+        'replicas = 2\n'
+        '[queue]\n'
+        'workers = 4\n'
+    )
+
+    def parse(self, string, **kwargs):
+        cf = JSONConfigParser(**kwargs)
+        cf.read_string(string)
+        return cf
+
+    def test_diff(self):
+        changes = diff(self.parse(self.old), self.parse(self.new))
+        self.assertEqual(changes, [
+            Change('changed', 'DEFAULT', 'port', 80, 8080, False),
+            Change('changed', 'db', 'enabled', 1, True, False),
+            Change('added', 'db', 'replicas', None, 2, False),
+            Change('removed', 'cache', 'size', 10, None, False),
+            Change('removed', 'cache', None, None, None, False),
+            Change('added', 'queue', None, None, None, False),
+            Change('added', 'queue', 'workers', None, 4, False),
+        ])
+
+    def test_inherited(self):
+        changes = diff(
+            self.parse(self.old), self.parse(self.new), inherited=True,
+        )
+        self.assertEqual(
+            [change for change in changes if change.inherited],
+            [Change('changed', 'web', 'port', 80, 8080, True)],
+        )
+
+    def test_identical(self):
+        a = self.parse(self.old)
+        self.assertEqual(diff(a, a), [])
+        self.assertEqual(diff(a, self.parse(self.old, lazy=True)), [])
+        self.assertEqual(
+            diff(a, self.parse(self.old, intern_values=True)), [],
+        )
+        self.assertEqual(diff(a, self.parse(self.old, compact=True)), [])
+
+        # digests are dropped when the parser is modified
+        b = self.parse(self.old)
+        self.assertEqual(diff(a, b), [])
+        b.set('web', 'hosts', ['a'])
+        self.assertEqual(diff(a, b), [
+            Change('changed', 'web', 'hosts', ['a', 'b'], ['a'], False),
+        ])
+
+    def test_modified_in_place(self):
+        a = self.parse(self.old)
+        b = self.parse(self.old)
+        self.assertEqual(diff(a, b), [])
+
+        # values modified in place must be set again to be seen
+        hosts = b.get('web', 'hosts')
+        hosts.append('c')
+        b.set('web', 'hosts', hosts)
+        self.assertEqual(diff(a, b), [
+            Change('changed', 'web', 'hosts', ['a', 'b'], hosts, False),
+        ])
+
+    def test_apply_patch(self):
+        for kwargs in ({}, {'lazy': True}, {'compact': True}):
+            cf = self.parse(self.old, **kwargs)
+            new = self.parse(self.new)
+            apply_patch(cf, diff(cf, new, inherited=True))
+            self.assertEqual(cf.to_dict(), new.to_dict())
+            self.assertEqual(diff(cf, new), [])
+
+            # values are not shared with the source of the patch
+            cf.get('web', 'hosts').append('c')
+            self.assertEqual(new.get('web', 'hosts'), ['a', 'b'])
+
+    def test_conflict(self):
+        changes = diff(self.parse(self.old), self.parse(self.new))
+        cf = self.parse(self.old)
+        cf.set('db', 'enabled', 0)
+        self.assertRaises(PatchError, apply_patch, cf, changes)
+        # nothing was changed
+        self.assertEqual(cf.get('DEFAULT', 'port'), 80)
+
+        cf = self.parse(self.old)
+        cf.add_section('queue')
+        self.assertRaises(PatchError, apply_patch, cf, changes)
+
+        cf = self.parse(self.new)
+        self.assertRaises(PatchError, apply_patch, cf, changes)
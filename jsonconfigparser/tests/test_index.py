@@ -0,0 +1,97 @@
+import os
+import unittest
+import tempfile
+
+from jsonconfigparser import JSONConfigParser, ParseError
+from jsonconfigparser.index import index_path
+
+
+class SectionIndexTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'inherited = 1\n'
+        '[first]\n'
+        'value = [\n'
+        '[1]\n'
+        ']\n'
+        '[second]\n'
+        'value = "é"\n'
+        '[third]\n'
+        'value = {"a": 3}\n'
+    )
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = self.write('config.cfg', self.string)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, string, newline=None):
+        filename = os.path.join(self.tmpdir.name, name)
+        with open(filename, 'w', encoding='utf-8', newline=newline) as fp:
+            fp.write(string)
+        return filename
+
+    def read(self, filename, sections):
+        cf = JSONConfigParser(track_locations=True)
+        cf.read(filename, 'utf-8', sections=sections, index=True)
+        return cf
+
+    def test_index(self):
+        self.assertFalse(os.path.exists(index_path(self.filename)))
+        self.read(self.filename, ['first'])
+        self.assertTrue(os.path.exists(index_path(self.filename)))
+
+        for sections in (['second'], ['third', 'first'], ['1']):
+            cf = self.read(self.filename, sections)
+            expected = JSONConfigParser()
+            expected.read(self.filename, 'utf-8', sections=sections)
+            self.assertEqual(cf.sections(), expected.sections())
+            for section in cf.sections():
+                self.assertEqual(dict(cf[section]), dict(expected[section]))
+
+        cf = self.read(self.filename, ['third'])
+        self.assertEqual(cf.get('third', 'inherited'), 1)
+        self.assertEqual(
+            cf.location('third', 'value'),
+            (self.filename, 10, 'value = {"a": 3}\n'),
+        )
+
+    def test_stale(self):
+        self.read(self.filename, ['second'])
+        self.write('config.cfg', self.string.replace('[first]', '[other]'))
+        cf = self.read(self.filename, ['other'])
+        self.assertEqual(list(cf.sections()), ['other'])
+
+    def test_error(self):
+        filename = self.write('bad.cfg', (
+            '[good]\n'
+            'value = 1\n'
+            '[bad]\n'
+            'value = {]\n'
+        ))
+        self.read(filename, ['good'])
+        try:
+            self.read(filename, ['bad'])
+        except ParseError as e:
+            self.assertEqual(e.lineno, 4)
+        else:  # pragma: no cover
+            self.fail()
+
+    def test_carriage_returns(self):
+        filename = self.write('crlf.cfg', self.string, newline='\r\n')
+        cf = self.read(filename, ['third'])
+        self.assertEqual(cf.get('third', 'value'), {'a': 3})
+        self.assertFalse(os.path.exists(index_path(filename)))
+
+    def test_read_only(self):
+        os.mkdir(os.path.join(self.tmpdir.name, 'readonly'))
+        filename = self.write(os.path.join('readonly', 'config.cfg'),
+                              self.string)
+        os.chmod(os.path.dirname(filename), 0o500)
+        try:
+            cf = self.read(filename, ['third'])
+        finally:
+            os.chmod(os.path.dirname(filename), 0o700)
+        self.assertEqual(cf.get('third', 'value'), {'a': 3})
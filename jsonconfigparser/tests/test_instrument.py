@@ -0,0 +1,92 @@
+import io
+import pickle
+import unittest
+
+from jsonconfigparser import JSONConfigParser, NoOptionError, NoSectionError
+from jsonconfigparser.instrument import Instrumentation
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'inherited = 1\n'
+        '[section]\n'
+        'value = {"a": [1, 2, 3]}\n'
+        'other = "string"\n'
+    )
+
+    def setUp(self):
+        self.events = []
+        self.stats = Instrumentation(
+            callback=lambda *event: self.events.append(event)
+        )
+        self.cf = JSONConfigParser()
+        self.stats.attach(self.cf)
+
+    def test_parse(self):
+        self.cf.read_string(self.string, 'test.cfg')
+        self.cf.read_file(io.StringIO(self.string), 'file.cfg')
+
+        self.assertEqual(len(self.stats.parses), 2)
+        record = self.stats.parses[0]
+        self.assertEqual(record.filename, 'test.cfg')
+        self.assertEqual(record.characters, len(self.string))
+        self.assertEqual(record.options, 3)
+        self.assertGreater(record.seconds, 0)
+        self.assertGreater(record.decode_seconds, 0)
+        self.assertLessEqual(record.decode_seconds, record.seconds)
+        self.assertEqual(self.stats.parses[1].filename, 'file.cfg')
+        self.assertEqual(self.events[0], ('parse', record))
+
+    def test_lazy_decode(self):
+        cf = JSONConfigParser(lazy=True)
+        self.stats.attach(cf)
+        cf.read_string(self.string)
+        self.assertEqual(self.stats.lazy_decode_seconds, 0)
+        cf.get('section', 'value')
+        self.assertGreater(self.stats.lazy_decode_seconds, 0)
+
+    def test_lookups(self):
+        self.cf.read_string(self.string)
+        self.events = []
+
+        self.cf.get('section', 'value')
+        self.cf['section']['value']
+        self.cf.get('section', 'inherited')
+        self.cf.get('section', 'missing', None)
+        self.cf.get('section', 'missing', vars={'missing': 1})
+        with self.assertRaises(NoOptionError):
+            self.cf.get('section', 'missing')
+        with self.assertRaises(NoSectionError):
+            self.cf.get('nonexistent', 'value')
+
+        lookups = self.stats.lookups
+        self.assertEqual(lookups['section', 'value'].hits, 2)
+        self.assertEqual(lookups['section', 'inherited'].defaults, 1)
+        self.assertEqual(lookups['section', 'missing'].fallbacks, 1)
+        self.assertEqual(lookups['section', 'missing'].hits, 1)
+        self.assertEqual(lookups['section', 'missing'].misses, 1)
+        self.assertEqual(lookups['section', 'missing'].total, 3)
+        self.assertEqual(lookups['nonexistent', 'value'].misses, 1)
+        self.assertEqual(
+            self.events[2], ('lookup', ('section', 'inherited', 'default')),
+        )
+
+    def test_detach(self):
+        self.stats.detach(self.cf)
+        self.cf.read_string(self.string)
+        self.cf.get('section', 'value')
+        self.assertEqual(self.stats.parses, [])
+        self.assertEqual(self.stats.lookups, {})
+
+    def test_reset(self):
+        self.cf.read_string(self.string)
+        self.cf.get('section', 'value')
+        self.stats.reset()
+        self.assertEqual(self.stats.parses, [])
+        self.assertEqual(self.stats.lookups, {})
+
+    def test_pickle(self):
+        # instrumentation is not carried over to other processes
+        cf = pickle.loads(pickle.dumps(self.cf))
+        self.assertIsNone(cf._instrument)
@@ -0,0 +1,145 @@
+import random
+import unittest
+
+from jsonconfigparser import JSONConfigParser, NoOptionError, NoSectionError
+from jsonconfigparser.overlay import Overlay
+
+
+def _parser(string, **kwargs):
+    cf = JSONConfigParser(**kwargs)
+    cf.read_string(string, kwargs.get('track_locations') and 'test.cfg')
+    return cf
+
+
+def _random_layer(rng):
+    cf = JSONConfigParser()
+    for section in rng.sample(['DEFAULT', 'a', 'b', 'c', 'd'], 3):
+        if section != 'DEFAULT':
+            cf.add_section(section)
+        for option in rng.sample(['x', 'y', 'z', 'w'], rng.randrange(3)):
+            cf.set(section, option, rng.randrange(100))
+    return cf
+
+
+class OverlayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.defaults = _parser(
+            '[DEFAULT]\n'
+            'timeout = 10\n'
+            'retries = 3\n'
+            '[server]\n'
+            'host = "localhost"\n'
+            'port = 80\n',
+            track_locations=True,
+        )
+        self.site = _parser(
+            '[DEFAULT]\n'
+            'timeout = 20\n'
+            '[server]\n'
+            'port = 8080\n'
+            '[client]\n'
+            'name = "site"\n'
+        )
+        self.overlay = Overlay([
+            ('defaults', self.defaults), ('site', self.site),
+        ])
+
+    def test_get(self):
+        overlay = self.overlay
+        self.assertEqual(overlay.layers, ['defaults', 'site'])
+        self.assertEqual(overlay.sections(), ['server', 'client'])
+        self.assertEqual(overlay.get('server', 'port'), 8080)
+        self.assertEqual(overlay.get('server', 'host'), 'localhost')
+        self.assertEqual(overlay.get('client', 'timeout'), 20)
+        self.assertEqual(overlay.get('client', 'retries'), 3)
+        self.assertEqual(overlay['client']['name'], 'site')
+        self.assertEqual(overlay.get('client', 'missing', None), None)
+        self.assertEqual(overlay.get('client', 'name', vars={'name': 1}), 1)
+        self.assertTrue(overlay.has_option('server', 'timeout'))
+        with self.assertRaises(NoOptionError):
+            overlay.get('client', 'missing')
+        with self.assertRaises(NoSectionError):
+            overlay.get('missing', 'name')
+
+    def test_provenance(self):
+        provenance = self.overlay.provenance('server', 'host')
+        self.assertEqual(provenance.layer, 'defaults')
+        self.assertEqual(provenance.section, 'server')
+        self.assertEqual(provenance.filename, 'test.cfg')
+        self.assertEqual(provenance.lineno, 5)
+        self.assertEqual(provenance.line, 'host = "localhost"\n')
+
+        provenance = self.overlay.provenance('server', 'retries')
+        self.assertEqual(
+            provenance[:4], ('defaults', 'DEFAULT', 'test.cfg', 3),
+        )
+
+        # the site layer does not track locations
+        provenance = self.overlay.provenance('client', 'timeout')
+        self.assertEqual(tuple(provenance), ('site', 'DEFAULT') + (None,) * 3)
+
+        with self.assertRaises(NoOptionError):
+            self.overlay.provenance('client', 'missing')
+
+    def test_layers(self):
+        overrides = _parser('[server]\nhost = "example.com"\n[new]\n')
+        self.overlay.add_layer('overrides', overrides)
+        self.assertEqual(self.overlay.get('server', 'host'), 'example.com')
+        self.assertEqual(self.overlay.get('new', 'timeout'), 20)
+        self.assertEqual(
+            self.overlay.provenance('server', 'host').layer, 'overrides',
+        )
+
+        self.overlay.add_layer('base', _parser('[server]\nport = 1\n'),
+                               below='defaults')
+        self.assertEqual(
+            self.overlay.layers, ['base', 'defaults', 'site', 'overrides'],
+        )
+        self.assertEqual(self.overlay.get('server', 'port'), 8080)
+
+        self.overlay.remove_layer('overrides')
+        self.assertEqual(self.overlay.get('server', 'host'), 'localhost')
+        self.assertNotIn('new', self.overlay)
+
+        # layers are copied until they are replaced
+        self.site.set('DEFAULT', 'timeout', 30)
+        self.assertEqual(self.overlay.get('server', 'timeout'), 20)
+        self.overlay.replace_layer('site')
+        self.assertEqual(self.overlay.get('server', 'timeout'), 30)
+
+        self.overlay.replace_layer('site', _parser('[client]\n'))
+        self.assertEqual(self.overlay.get('server', 'timeout'), 10)
+        self.assertEqual(self.overlay.get('server', 'port'), 80)
+        self.assertEqual(
+            self.overlay.options('client'), ['timeout', 'retries'],
+        )
+
+        with self.assertRaises(ValueError):
+            self.overlay.add_layer('site', self.site)
+        with self.assertRaises(KeyError):
+            self.overlay.remove_layer('missing')
+
+    def test_equivalent(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            layers = [_random_layer(rng) for _ in range(4)]
+            overlay = Overlay(
+                ('layer%i' % i, layer) for i, layer in enumerate(layers[:3])
+            )
+
+            # change the overlay incrementally
+            overlay.add_layer('layer3', layers[3])
+            replacement = _random_layer(rng)
+            overlay.replace_layer('layer1', replacement)
+            layers[1] = replacement
+            overlay.remove_layer('layer0')
+            del layers[0]
+
+            expected = JSONConfigParser()
+            for layer in layers:
+                expected.read_string(layer.dumps())
+            frozen = expected.freeze()
+            self.assertEqual(sorted(overlay), sorted(frozen))
+            for section in frozen:
+                self.assertEqual(dict(overlay[section]),
+                                 dict(frozen[section]))
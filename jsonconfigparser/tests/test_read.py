@@ -0,0 +1,218 @@
+import os
+import pickle
+import unittest
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import Executor, Future
+
+from jsonconfigparser import JSONConfigParser, ParseError
+from jsonconfigparser import DuplicateSectionError
+from jsonconfigparser.cache import ConfigCache
+
+
+class PicklingExecutor(Executor):
+    """Runs each task immediately, after pickling it the way a process pool
+    would.  Records the size of each pickled task.
+    """
+    def __init__(self):
+        self.sizes = []
+
+    def submit(self, fn, *args, **kwargs):
+        data = pickle.dumps((fn, args, kwargs))
+        self.sizes.append(len(data))
+        fn, args, kwargs = pickle.loads(data)
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class ParallelReadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filenames = []
+        for i in range(20):
+            self.filenames.append(self.write('%02i.cfg' % i, (
+                '[DEFAULT]\n'
+                'last = %i\n'
+                '[section%i]\n'
+                'value = %i\n'
+                '[shared]\n'
+                'value = %i\n'
+            ) % (i, i % 3, i, i)))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, string):
+        filename = os.path.join(self.tmpdir.name, name)
+        with open(filename, 'w') as fp:
+            fp.write(string)
+        return filename
+
+    def assertSameAsSerial(self, cf, filenames, **kwargs):
+        serial = JSONConfigParser()
+        serial.read(filenames, **kwargs)
+        self.assertEqual(list(cf.sections()), list(serial.sections()))
+        for section in serial.sections():
+            self.assertEqual(dict(cf[section]), dict(serial[section]))
+
+    def test_thread_pool(self):
+        cf = JSONConfigParser()
+        with ThreadPoolExecutor(4) as executor:
+            cf.read(self.filenames, executor=executor)
+        self.assertEqual(cf.get('shared', 'value'), 19)
+        self.assertEqual(cf.get('section1', 'last'), 19)
+        self.assertSameAsSerial(cf, self.filenames)
+
+    def test_process_pool(self):
+        cf = JSONConfigParser()
+        with ProcessPoolExecutor(2) as executor:
+            cf.read(self.filenames, executor=executor)
+        self.assertSameAsSerial(cf, self.filenames)
+
+    def test_parser_not_pickled(self):
+        cf = JSONConfigParser(lazy=True, track_locations=True)
+        cf.read_string('[large]\n' + ''.join(
+            'option%i = "%s"\n' % (i, 'x' * 100) for i in range(1000)
+        ))
+        executor = PicklingExecutor()
+        cf.read(self.filenames, executor=executor)
+        self.assertEqual(len(executor.sizes), len(self.filenames))
+        self.assertLess(max(executor.sizes), 1000)
+
+        # the parsers doing the work are created with the same settings
+        self.assertEqual(cf.location('section1', 'value')[1], 4)
+        self.assertEqual(cf.get('shared', 'value'), 19)
+        cf.remove_section('large')
+        self.assertSameAsSerial(cf, self.filenames)
+
+    def test_skip(self):
+        filenames = list(self.filenames)
+        filenames.insert(5, os.path.join(self.tmpdir.name, 'missing.cfg'))
+
+        cf = JSONConfigParser()
+        with ThreadPoolExecutor(4) as executor:
+            cf.read(filenames, executor=executor, skip=True)
+            self.assertSameAsSerial(cf, filenames, skip=True)
+
+            self.assertRaises(OSError, JSONConfigParser().read, filenames,
+                              executor=executor)
+
+    def test_error(self):
+        filenames = list(self.filenames)
+        filenames.insert(5, self.write('bad.cfg', '[bad]\nvalue = {]\n'))
+
+        cf = JSONConfigParser()
+        with ThreadPoolExecutor(4) as executor:
+            try:
+                cf.read(filenames, executor=executor)
+            except ParseError as e:
+                self.assertEqual(e.filename, filenames[5])
+                self.assertEqual(e.lineno, 2)
+            else:  # pragma: no cover
+                self.fail()
+
+        # files before the broken one are merged, just as when reading
+        # serially
+        self.assertSameAsSerial(cf, self.filenames[:5])
+
+    def test_cache(self):
+        cache = ConfigCache(os.path.join(self.tmpdir.name, 'cache'))
+        with ThreadPoolExecutor(4) as executor:
+            JSONConfigParser().read(self.filenames, executor=executor,
+                                    cache=cache)
+            cf = JSONConfigParser()
+            cf.read(self.filenames, executor=executor, cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (20, 20))
+        self.assertSameAsSerial(cf, self.filenames)
+
+
+class SelectiveReadTestCase(unittest.TestCase):
+    string = (
+        '# preamble\n'
+        '[DEFAULT]\n'
+        'inherited = 1\n'
+        '[first]\n'
+        'value = [\n'
+        '[1]\n'
+        ']\n'
+        '[second]\n'
+        'value = {"a": 2}\n'
+        '[third]\n'
+        'value = "three"\n'
+    )
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = self.write('config.cfg', self.string)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, string):
+        filename = os.path.join(self.tmpdir.name, name)
+        with open(filename, 'w') as fp:
+            fp.write(string)
+        return filename
+
+    def test_sections(self):
+        cf = JSONConfigParser()
+        cf.read(self.filename, sections=['second', 'missing'])
+        self.assertEqual(list(cf.sections()), ['second'])
+        self.assertEqual(cf.get('second', 'value'), {'a': 2})
+        self.assertEqual(cf.get('second', 'inherited'), 1)
+
+    def test_skipped_values_not_decoded(self):
+        filename = self.write('bad.cfg', (
+            '[bad]\n'
+            'value = {]\n'
+            '[good]\n'
+            'value = 1\n'
+        ))
+        cf = JSONConfigParser()
+        cf.read(filename, sections=['good'])
+        self.assertEqual(cf.get('good', 'value'), 1)
+        self.assertRaises(ParseError, cf.read, filename, sections=['bad'])
+
+    def test_duplicate_sections(self):
+        filename = self.write('duplicate.cfg', (
+            '[first]\n'
+            '[wanted]\n'
+            'value = 1\n'
+            '[first]\n'
+        ))
+        cf = JSONConfigParser()
+        self.assertRaises(DuplicateSectionError, cf.read, filename,
+                          sections=['wanted'])
+        self.assertEqual(list(cf.sections()), [])
+
+    def test_header_in_value(self):
+        # `[1]' in the first section looks like a header but isn't one
+        for sections in (['1', 'second'], ['first'], ['third']):
+            cf = JSONConfigParser()
+            cf.read(self.filename, sections=sections)
+            expected = JSONConfigParser()
+            expected.read(self.filename)
+            self.assertEqual(list(cf.sections()), [
+                section for section in expected.sections()
+                if section in sections
+            ])
+            for section in cf.sections():
+                self.assertEqual(dict(cf[section]), dict(expected[section]))
+
+    def test_lazy(self):
+        cf = JSONConfigParser(lazy=True, track_locations=True)
+        cf.read(self.filename, sections=['third'])
+        self.assertEqual(list(cf.sections()), ['third'])
+        self.assertEqual(cf.get('third', 'value'), 'three')
+        self.assertEqual(cf.location('third', 'value')[1], 11)
+
+    def test_cache(self):
+        cache = ConfigCache(os.path.join(self.tmpdir.name, 'cache'))
+        JSONConfigParser().read(self.filename, cache=cache)
+        cf = JSONConfigParser()
+        cf.read(self.filename, cache=cache, sections=['third'])
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(list(cf.sections()), ['third'])
+        self.assertEqual(cf.get('third', 'inherited'), 1)
@@ -0,0 +1,172 @@
+import os
+import unittest
+import tempfile
+
+from jsonconfigparser import JSONConfigParser, ParseError
+from jsonconfigparser import InvalidOptionNameError
+from jsonconfigparser.reload import Reloader
+
+
+class ReloaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.tmpdir.name, 'base.cfg')
+        self.local = os.path.join(self.tmpdir.name, 'local.cfg')
+        self.write(self.base, (
+            '[DEFAULT]\n'
+            'timeout = 10\n'
+            '\n'
+            '[server]\n'
+            'host = "localhost"\n'
+            'port = 80\n'
+            '\n'
+            '[client]\n'
+            'retries = [1,\n'
+            '           2]\n'
+        ))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, filename, string):
+        # make sure the modification is visible to mtime polling
+        try:
+            mtime = os.stat(filename).st_mtime_ns + 1000000
+        except FileNotFoundError:
+            mtime = None
+        with open(filename, 'w') as fp:
+            fp.write(string)
+        if mtime is not None:
+            os.utime(filename, ns=(mtime, mtime))
+
+    def test_initial_load(self):
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, [self.base, self.local])
+        self.assertEqual(cf.get('server', 'port'), 80)
+        self.assertEqual(cf.get('client', 'timeout'), 10)
+        self.assertEqual(reloader.poll(), set())
+        self.assertEqual(
+            reloader.spans(self.base),
+            [('DEFAULT', 0, 24), ('server', 24, 63), ('client', 63, 100)]
+        )
+
+    def test_change_option(self):
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, self.base)
+        with open(self.base) as fp:
+            string = fp.read()
+        self.write(self.base, string.replace('80', '8080'))
+
+        self.assertEqual(reloader.poll(), {('server', 'port')})
+        self.assertEqual(cf.get('server', 'port'), 8080)
+        self.assertEqual(cf.get('server', 'host'), 'localhost')
+        self.assertEqual(
+            reloader.spans(self.base),
+            [('DEFAULT', 0, 24), ('server', 24, 65), ('client', 65, 102)]
+        )
+
+    def test_add_and_remove(self):
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, [self.base, self.local])
+
+        self.write(self.local, (
+            '[server]\n'
+            'port = 81\n'
+            '[extra]\n'
+            'enabled = true\n'
+        ))
+        self.assertEqual(reloader.poll(), {
+            ('server', 'port'), ('extra', 'enabled'),
+        })
+        self.assertEqual(cf.get('server', 'port'), 81)
+        self.assertTrue(cf.get('extra', 'enabled'))
+
+        os.remove(self.local)
+        self.assertEqual(reloader.poll(), {
+            ('server', 'port'), ('extra', 'enabled'),
+        })
+        self.assertEqual(cf.get('server', 'port'), 80)
+        self.assertFalse(cf.has_section('extra'))
+
+    def test_defaults(self):
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, self.base)
+        with open(self.base) as fp:
+            string = fp.read()
+        self.write(self.base, string.replace('timeout = 10\n', ''))
+
+        self.assertEqual(reloader.poll(), {('DEFAULT', 'timeout')})
+        self.assertFalse(cf.has_option('client', 'timeout'))
+
+    def test_error_leaves_parser_unchanged(self):
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, self.base)
+        with open(self.base) as fp:
+            string = fp.read()
+        self.write(self.base, string.replace('80', '8080').replace(
+            '2]', '2}'
+        ))
+
+        try:
+            reloader.poll()
+        except ParseError as e:
+            self.assertEqual(e.filename, self.base)
+            self.assertEqual(e.lineno, 10)
+        else:  # pragma: no cover
+            self.fail()
+        self.assertEqual(cf.get('server', 'port'), 80)
+
+    def test_invalid_name_then_fix(self):
+        self.write(self.base, '[a]\nx = 1\n')
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, self.base)
+
+        self.write(self.base, '[a]\nx = 2\n-o = 1\n')
+        with self.assertRaises(InvalidOptionNameError):
+            reloader.poll()
+        self.assertEqual(cf.get('a', 'x'), 1)
+        self.assertFalse(cf.has_option('a', '-o'))
+
+        self.write(self.base, '[a]\nx = 2\n')
+        self.assertEqual(reloader.poll(), {('a', 'x')})
+        self.assertEqual(cf.get('a', 'x'), 2)
+
+    def test_reload_ignores_mtime(self):
+        cf = JSONConfigParser()
+        reloader = Reloader(cf, self.base)
+        stat = os.stat(self.base)
+        with open(self.base) as fp:
+            string = fp.read()
+        with open(self.base, 'w') as fp:
+            fp.write(string.replace('80', '90'))
+        os.utime(self.base, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertEqual(reloader.poll(), set())
+        self.assertEqual(reloader.reload(), {('server', 'port')})
+        self.assertEqual(cf.get('server', 'port'), 90)
+
+    def test_type_changes(self):
+        cf = JSONConfigParser()
+        self.write(self.base, (
+            '[a]\n'
+            'flag = 1\n'
+            'list = [1]\n'
+            'object = {"k": 0}\n'
+            'number = [{"k": 1}]\n'
+        ))
+        reloader = Reloader(cf, self.base)
+
+        self.write(self.base, (
+            '[a]\n'
+            'flag = true\n'
+            'list = [true]\n'
+            'object = {"k": false}\n'
+            'number = [{"k": 1.0}]\n'
+        ))
+        self.assertEqual(reloader.poll(), {
+            ('a', 'flag'), ('a', 'list'), ('a', 'object'), ('a', 'number'),
+        })
+        self.assertIs(cf.get('a', 'flag'), True)
+        self.assertIs(cf.get('a', 'list')[0], True)
+        self.assertIs(cf.get('a', 'object')['k'], False)
+        self.assertIsInstance(cf.get('a', 'number')[0]['k'], float)
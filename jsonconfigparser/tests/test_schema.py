@@ -0,0 +1,150 @@
+import unittest
+
+from jsonconfigparser import JSONConfigParser, ParseError
+from jsonconfigparser.schema import Schema, Option, SchemaError
+
+
+class SchemaTestCase(unittest.TestCase):
+    schema = Schema({
+        'DEFAULT': {
+            'debug': Option(bool, default=False),
+        },
+        'server': {
+            'host': str,
+            'port': Option(int, min=1, max=65535, default=8080),
+            'ratio': float,
+            'tags': [str],
+            'limits': {'cpu': float, 'memory': Option(int, default=64)},
+            'env': {str: str},
+            'log-level': Option(str, default='info'),
+            'debug': bool,
+        },
+    })
+
+    string = (
+        '[DEFAULT]\n'
+        'debug = true\n'
+        '[server]\n'
+        'host = "example.com"\n'
+        'ratio = 1\n'
+        'tags = ["a",\n'
+        '        "b"]\n'
+        'limits = {"cpu": 0.5}\n'
+        'env = {"HOME": "/root"}\n'
+    )
+
+    def parse(self, string):
+        cf = JSONConfigParser(track_locations=True)
+        cf.read_string(string, 'test.cfg')
+        return cf
+
+    def test_validate(self):
+        config = self.schema.validate(self.parse(self.string))
+
+        self.assertEqual(config.server.host, 'example.com')
+        self.assertEqual(config.server.port, 8080)
+        self.assertEqual(config.server.tags, ['a', 'b'])
+        self.assertEqual(config.server.limits, {'cpu': 0.5, 'memory': 64})
+        self.assertEqual(config.server.log_level, 'info')
+        self.assertIs(config.server.debug, True)
+        self.assertIs(config.DEFAULT.debug, True)
+
+        # numbers are converted to the declared type
+        self.assertIsInstance(config.server.ratio, float)
+
+        # options can also be read as items using their original names
+        self.assertEqual(config['server']['log-level'], 'info')
+        self.assertEqual(sorted(config), ['DEFAULT', 'server'])
+
+    def test_interned_values(self):
+        # interned lists are stored as tuples
+        cf = JSONConfigParser(intern_values=True)
+        cf.read_string(self.string)
+        config = self.schema.validate(cf)
+        self.assertEqual(config.server.tags, ['a', 'b'])
+        self.assertEqual(config.server.env, {'HOME': '/root'})
+
+        schema = Schema({'section': {'raw': list, 'nested': {str: [[int]]}}})
+        cf = JSONConfigParser(intern_values=True)
+        cf.read_string(
+            '[section]\nraw = [1, "a"]\nnested = {"a": [[1], [2, 3]]}\n'
+        )
+        config = schema.validate(cf)
+        self.assertEqual(list(config.section.raw), [1, 'a'])
+        self.assertEqual(config.section.nested, {'a': [[1], [2, 3]]})
+
+        cf.read_string('[section]\nraw = {}\n')
+        with self.assertRaises(SchemaError) as cm:
+            schema.validate(cf)
+        self.assertIn('expected a list', cm.exception.message)
+
+    def test_invalid_value(self):
+        cf = self.parse(self.string.replace('"b"', '3'))
+        with self.assertRaises(SchemaError) as cm:
+            self.schema.validate(cf)
+        e = cm.exception
+        self.assertIsInstance(e, ParseError)
+        self.assertEqual(e.filename, 'test.cfg')
+        self.assertEqual(e.section, 'server')
+        self.assertEqual(e.lineno, 6)
+        self.assertEqual(e.line, 'tags = ["a",\n')
+        self.assertIn("'tags'[1]: expected a string", e.message)
+
+    def test_range(self):
+        cf = self.parse(self.string + 'port = 0\n')
+        with self.assertRaises(SchemaError) as cm:
+            self.schema.validate(cf)
+        self.assertEqual(cm.exception.lineno, 10)
+        self.assertIn('minimum', cm.exception.message)
+
+    def test_bool_is_not_int(self):
+        cf = self.parse(self.string + 'port = true\n')
+        with self.assertRaises(SchemaError):
+            self.schema.validate(cf)
+
+    def test_missing_option(self):
+        cf = self.parse(self.string.replace('host', '# host'))
+        with self.assertRaises(SchemaError) as cm:
+            self.schema.validate(cf)
+        self.assertEqual(cm.exception.message, "Missing option 'host'")
+
+    def test_unexpected(self):
+        cf = self.parse(self.string + 'unknown = 1\n')
+        with self.assertRaises(SchemaError) as cm:
+            self.schema.validate(cf)
+        self.assertEqual(cm.exception.lineno, 10)
+
+        cf = self.parse(self.string + '[other]\n')
+        with self.assertRaises(SchemaError):
+            self.schema.validate(cf)
+
+        schema = Schema({'server': {'host': str}}, allow_unknown=True)
+        config = schema.validate(cf)
+        self.assertEqual(config.server.host, 'example.com')
+
+    def test_locations_without_tracking(self):
+        cf = JSONConfigParser()
+        cf.read_string(self.string + 'port = "80"\n')
+        with self.assertRaises(SchemaError) as cm:
+            self.schema.validate(cf)
+        self.assertIsNone(cm.exception.lineno)
+        self.assertEqual(cm.exception.section, 'server')
+
+    def test_modified_option_has_no_location(self):
+        cf = self.parse(self.string)
+        self.assertEqual(cf.location('server', 'host')[:2], ('test.cfg', 4))
+        self.assertEqual(cf.location('server', 'debug')[:2], ('test.cfg', 2))
+
+        cf.set('server', 'host', 1)
+        self.assertIsNone(cf.location('server', 'host'))
+        with self.assertRaises(SchemaError) as cm:
+            self.schema.validate(cf)
+        self.assertIsNone(cm.exception.lineno)
+
+    def test_invalid_schema(self):
+        with self.assertRaises(TypeError):
+            Schema({'section': {'option': object}})
+        with self.assertRaises(TypeError):
+            Schema({'section': {'option': Option(str, min=1)}})
+        with self.assertRaises(ValueError):
+            Schema({'section': {'option': Option(int, max=1, default=2)}})
@@ -0,0 +1,120 @@
+import os
+import itertools
+import unittest
+import multiprocessing
+
+from jsonconfigparser import JSONConfigParser, NoOptionError, NoSectionError
+from jsonconfigparser.shm import Publisher, attach
+
+
+_names = itertools.count()
+
+
+def _read_in_child(name, queue):
+    with attach(name) as snapshot:
+        value = snapshot.get('section', 'list')
+        queue.put((snapshot.generation, value[0], dict(value[1])))
+
+
+class SharedMemoryTestCase(unittest.TestCase):
+    string = (
+        '[DEFAULT]\n'
+        'inherited = "default"\n'
+        'overridden = 1\n'
+        '[section]\n'
+        'overridden = 2\n'
+        'list = [1, {"a": "\xe9"}]\n'
+        'value = 3.5\n'
+        '[other]\n'
+    )
+
+    def setUp(self):
+        self.name = 'jcp%i_%i' % (os.getpid(), next(_names))
+        self.publisher = Publisher(self.name)
+        self.addCleanup(self.publisher.close)
+        self.cf = JSONConfigParser()
+        self.cf.read_string(self.string)
+
+    def attach(self):
+        snapshot = attach(self.name)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_values(self):
+        self.assertEqual(self.publisher.publish(self.cf), 1)
+        snapshot = self.attach()
+        frozen = self.cf.freeze()
+
+        self.assertEqual(snapshot.sections(), frozen.sections())
+        self.assertEqual(list(snapshot), list(frozen))
+        for section in frozen:
+            self.assertEqual(list(snapshot[section]), list(frozen[section]))
+            self.assertEqual(dict(snapshot[section]), dict(frozen[section]))
+
+        self.assertEqual(snapshot.get('section', 'list'), (1, {'a': '\xe9'}))
+        self.assertEqual(snapshot.get('section', 'overridden'), 2)
+        self.assertEqual(snapshot.get('other', 'inherited'), 'default')
+        self.assertEqual(snapshot.get('other', 'missing', None), None)
+        self.assertEqual(snapshot.get('other', 'value', vars={'value': 1}), 1)
+        self.assertTrue(snapshot.has_option('section', 'inherited'))
+        self.assertFalse(snapshot.has_section('DEFAULT'))
+        with self.assertRaises(NoOptionError):
+            snapshot.get('section', 'missing')
+        with self.assertRaises(NoSectionError):
+            snapshot.get('missing', 'value')
+
+    def test_lazy(self):
+        self.publisher.publish(self.cf)
+        snapshot = self.attach()
+        section = snapshot['section']
+        self.assertEqual(section._values, {})
+        value = section['list']
+        self.assertIs(section['list'], value)
+        self.assertEqual(list(section._values), ['list'])
+
+        snapshot.close()
+        self.assertIs(section['list'], value)
+        with self.assertRaises(ValueError):
+            section['value']
+
+    def test_generations(self):
+        self.publisher.publish(self.cf)
+        snapshot = self.attach()
+        self.assertFalse(snapshot.stale)
+        self.assertIs(snapshot.refresh(), snapshot)
+
+        for i in range(3):
+            self.cf.set('section', 'value', i)
+            self.publisher.publish(self.cf)
+        self.assertTrue(snapshot.stale)
+        latest = snapshot.refresh()
+        self.addCleanup(latest.close)
+        self.assertEqual(latest.generation, 4)
+        self.assertEqual(latest.get('section', 'value'), 2)
+
+        # old snapshots remain readable while attached
+        self.assertEqual(snapshot.get('section', 'value'), 3.5)
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            attach(self.name)
+        with self.assertRaises(FileNotFoundError):
+            attach(self.name + 'missing')
+        with self.assertRaises(FileExistsError):
+            Publisher(self.name)
+
+    def test_other_process(self):
+        self.publisher.publish(self.cf)
+        self.publisher.publish(self.cf)
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_read_in_child, args=(self.name, queue)
+        )
+        process.start()
+        result = queue.get(timeout=30)
+        process.join()
+        self.assertEqual(result, (2, 1, {'a': '\xe9'}))
+        self.assertEqual(process.exitcode, 0)
+
+        # the child detaching does not remove the snapshot
+        self.assertEqual(self.attach().generation, 2)